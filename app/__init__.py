@@ -2,16 +2,17 @@ import os
 from flask import Flask
 from flask_restx import Api
 from flask_sqlalchemy import SQLAlchemy
-from dotenv import load_dotenv
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_caching import Cache
 from flask_cors import CORS
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 
-load_dotenv()
+from app.replicas import RoutingSession, REPLICA_BIND
 
 # Initialize components
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 api = Api(
     prefix="/api/v1",
     title="Tiberbu Healthcare Interview Challenge",
@@ -47,19 +48,22 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    from app.metrics.pool import InstrumentedQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config, app.config['SQLALCHEMY_DATABASE_URI'], poolclass=InstrumentedQueuePool
+    )
+    replica_uri = app.config['SQLALCHEMY_REPLICA_URI']
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {"url": replica_uri, **engine_options(app.config, replica_uri, InstrumentedQueuePool)},
+        }
+
     # JWT configuration
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
     app.config['JWT_TOKEN_LOCATION'] = ["headers"]
     app.config['JWT_HEADER_NAME'] = "Authorization"
     app.config['JWT_HEADER_TYPE'] = "Bearer"
 
-    # Redis Cache configuration
-    app.config['CACHE_TYPE'] = "redis"
-    app.config['CACHE_REDIS_HOST'] = os.getenv("REDIS_HOST", "localhost")
-    app.config['CACHE_REDIS_PORT'] = int(os.getenv("REDIS_PORT", 6379))
-    app.config['CACHE_REDIS_DB'] = 0
-    app.config['CACHE_DEFAULT_TIMEOUT'] = 300
-
     # Initialize components
     db.init_app(app)
     migrate.init_app(app, db)
@@ -67,6 +71,47 @@ def create_app():
     cache.init_app(app)
     api.init_app(app)
 
+    from app.serialization import init_serialization, output_json
+    init_serialization(app)
+    api.representation("application/json")(output_json)
+
+    from app.compression import init_compression
+    init_compression(app)
+
+    from app.caching import init_caching
+    init_caching(app)
+
+    from app.metrics.pool import init_pool_metrics
+    init_pool_metrics(app)
+
+    from app.metrics.instrumentation import init_metrics
+    init_metrics(app)
+
+    from app.auth.tokens import is_token_revoked, init_denylist
+    jwt.token_in_blocklist_loader(is_token_revoked)
+    init_denylist(app)
+
+    from app.auth.passwords import init_password_hasher
+    init_password_hasher(app)
+
+    from app.images.store import init_image_store
+    init_image_store(app)
+
+    from app.images.processing import init_image_processing
+    init_image_processing(app)
+
+    from utils.mail import mail
+    mail.init_app(app)
+
+    from app.notifications.worker import mail_worker_command
+    app.cli.add_command(mail_worker_command)
+
+    from app.auth.bulk_import import import_users_command
+    app.cli.add_command(import_users_command)
+
+    from app.admin.commands import issue_admin_token_command
+    app.cli.add_command(issue_admin_token_command)
+
     # Register API namespaces
     from app.patients.routes import patient_namespace
     api.add_namespace(patient_namespace, path="/patients")
@@ -77,4 +122,68 @@ def create_app():
     from app.appointments.routes import appointment_namespace
     api.add_namespace(appointment_namespace, path="/appointments")
 
+    from app.medical_records.routes import medical_record_namespace
+    api.add_namespace(medical_record_namespace, path="/medical-records")
+
+    from app.images.routes import image_namespace
+    api.add_namespace(image_namespace, path="/images")
+
+    from app.admin.routes import admin_namespace
+    api.add_namespace(admin_namespace, path="/admin")
+
+    from app.metrics.routes import metrics_namespace, metrics_blueprint
+    api.add_namespace(metrics_namespace, path="/metrics")
+    app.register_blueprint(metrics_blueprint)
+
     return app
+
+
+def engine_options(config, uri, poolclass=None):
+    """
+    Build engine keyword arguments from the DB_POOL_* settings.
+
+    In PgBouncer mode every checkout opens a fresh connection and PgBouncer
+    does the pooling. SQLite keeps the pool SQLAlchemy picks for it.
+
+    Args:
+        config (dict): The app config.
+        uri (str): The database URI the engine is created for.
+        poolclass (type): Queue pool class to use, if not SQLAlchemy's default.
+    Returns:
+        dict: Keyword arguments for create_engine.
+    """
+    if config["DB_PGBOUNCER"]:
+        return {"poolclass": NullPool}
+    if uri and make_url(uri).get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    if poolclass is not None:
+        options["poolclass"] = poolclass
+    return options
+
+
+def reset_after_fork(app):
+    """
+    Drop the connections a worker inherited from a preloading gunicorn master.
+
+    Pooled database connections are discarded without being closed, so the
+    master's sockets are left alone. Background threads and executors are
+    per-process already and restart on first use.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    redis_client = getattr(cache.cache, "_write_client", None)
+    if redis_client is not None:
+        redis_client.connection_pool.reset()
+
+    from app.caching import local_cache
+    local_cache.clear()
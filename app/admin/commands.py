@@ -0,0 +1,18 @@
+import uuid
+from datetime import timedelta
+import click
+from flask.cli import with_appcontext
+from flask_jwt_extended import create_access_token
+
+
+@click.command("issue-admin-token")
+@click.option("--minutes", type=int, default=60, help="How long the token stays valid.")
+@with_appcontext
+def issue_admin_token_command(minutes):
+    """Print a short-lived access token with the admin role."""
+    token = create_access_token(
+        identity=str(uuid.uuid4()),
+        additional_claims={"role": "admin"},
+        expires_delta=timedelta(minutes=minutes),
+    )
+    click.echo(token)
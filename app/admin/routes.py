@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import io
+from itertools import islice
+from flask import current_app, request
+from flask_restx import Namespace, Resource
+from app.auth.utils import role_required
+from app.auth.bulk_import import import_users, read_rows, FORMATS
+
+admin_namespace = Namespace('admin', description='Administrative operations')
+
+IMPORT_ROLES = {"patients": "patient", "doctors": "doctor"}
+
+
+def _too_large(config):
+    return (
+        f"Uploads are limited to {config['IMPORT_HTTP_MAX_ROWS']} rows and {config['IMPORT_HTTP_MAX_BYTES']} bytes;"
+        " use the flask import-users command for larger files."
+    )
+
+
+@admin_namespace.route("/import/<string:collection>")
+class BulkImport(Resource):
+    @role_required("admin")
+    @admin_namespace.doc(params={
+        "format": "csv or jsonl (defaults to the uploaded file's extension, then csv)",
+    })
+    def post(self, collection):
+        """
+        Import patients or doctors from a CSV or JSONL upload, reporting per-row errors.
+
+        Uploads are capped at IMPORT_HTTP_MAX_BYTES and IMPORT_HTTP_MAX_ROWS so
+        the import finishes within a request; larger files go through the
+        `flask import-users` command.
+        """
+        role = IMPORT_ROLES.get(collection)
+        if role is None:
+            return {"status": "error", "message": "Import patients or doctors."}, 404
+
+        config = current_app.config
+        if (request.content_length or 0) > config["IMPORT_HTTP_MAX_BYTES"]:
+            return {"status": "error", "message": _too_large(config)}, 413
+
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        filename = upload.filename if upload else ""
+
+        fmt = request.args.get("format") or ("jsonl" if filename.endswith((".jsonl", ".json")) else "csv")
+        if fmt not in FORMATS:
+            return {"status": "error", "message": "format must be csv or jsonl."}, 400
+
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        records = list(islice(read_rows(text, fmt), config["IMPORT_HTTP_MAX_ROWS"] + 1))
+        if len(records) > config["IMPORT_HTTP_MAX_ROWS"]:
+            return {"status": "error", "message": _too_large(config)}, 413
+        report = import_users(records, role, processes=1)
+
+        return {
+            "status": "success",
+            "message": f"Imported {report['imported']} of {report['processed']} rows.",
+            "data": report,
+        }, 200
+
@@ -0,0 +1,267 @@
+"""
+Apply a list of book, reschedule and cancel operations in one transaction.
+
+Every appointment, doctor, patient and target slot the batch touches is read
+up front in a handful of set-based queries. Operations are then resolved in
+order against that snapshot, so a slot freed earlier in the batch can be
+reused later in it. The writes that survive are issued together, one
+statement per kind, so the statement count does not grow with the batch.
+Each item gets its own result; one failing item does not undo the others.
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import bindparam, delete, update, tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.appointments.models import Appointment, ACTIVE_STATUSES
+from app.appointments.booking import book_slots
+from app.doctors.models import Doctor
+from app.doctors.slots import record_slot_change
+from app.notifications.queue import enqueue_email
+from app.patients.models import Patient
+
+OPERATIONS = ("book", "reschedule", "cancel")
+
+
+class BatchItemError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _parse(item, user_id, role):
+    """Validate one operation and return it with typed values."""
+    if not isinstance(item, dict) or item.get("op") not in OPERATIONS:
+        raise BatchItemError(400, f"op must be one of {', '.join(OPERATIONS)}")
+
+    op = {"op": item["op"]}
+    try:
+        if item["op"] == "book":
+            op["doctor_id"] = user_id if role == "doctor" else uuid.UUID(str(item.get("doctor_id")))
+            op["patient_id"] = user_id if role == "patient" else uuid.UUID(str(item.get("patient_id")))
+        else:
+            op["appointment_id"] = uuid.UUID(str(item.get("appointment_id")))
+        if item["op"] != "cancel":
+            op["date"] = datetime.strptime(str(item.get("date")), "%Y-%m-%d").date()
+            op["time"] = datetime.strptime(str(item.get("time")), "%H:%M").time()
+    except ValueError as e:
+        raise BatchItemError(400, str(e))
+    return op
+
+
+def _can_manage(appointment, user_id, role):
+    if role == "admin":
+        return True
+    owner = appointment["doctor_id"] if role == "doctor" else appointment["patient_id"]
+    return owner == user_id
+
+
+def _appointment_data(appointment_id, patient_id, doctor_id, date, time, status):
+    return {
+        "appointmentId": str(appointment_id),
+        "patientId": str(patient_id),
+        "doctorId": str(doctor_id),
+        "date": date.strftime("%Y-%m-%d"),
+        "time": time.strftime("%H:%M"),
+        "status": status,
+    }
+
+
+def apply_batch(items, user_id, role):
+    """
+    Apply operations for the caller and return one result per item.
+
+    Patients act on their own appointments and book for themselves, doctors
+    act on their own schedule and book for any patient, admins act on any
+    appointment. The caller commits.
+
+    Returns:
+        list: Results in input order, each with index, op, status and either
+        the resulting appointment or an error code and message.
+    """
+    results = [None] * len(items)
+    ops = {}
+    for index, item in enumerate(items):
+        try:
+            ops[index] = _parse(item, user_id, role)
+        except BatchItemError as e:
+            results[index] = e
+
+    # One query per kind of thing the batch refers to.
+    appointment_ids = {op["appointment_id"] for op in ops.values() if "appointment_id" in op}
+    appointments = {
+        row.appointment_id: row._asdict() for row in db.session.execute(
+            db.select(
+                Appointment.appointment_id, Appointment.patient_id, Appointment.doctor_id,
+                Appointment.date, Appointment.time, Appointment.status,
+            ).where(Appointment.appointment_id.in_(appointment_ids))
+        )
+    } if appointment_ids else {}
+
+    doctor_ids = {op["doctor_id"] for op in ops.values() if "doctor_id" in op}
+    known_doctors = set(db.session.scalars(
+        db.select(Doctor.doctor_id).where(Doctor.doctor_id.in_(doctor_ids))
+    )) if doctor_ids else set()
+
+    patient_ids = {op["patient_id"] for op in ops.values() if "patient_id" in op}
+    patient_ids |= {appointment["patient_id"] for appointment in appointments.values()}
+    patient_emails = dict(db.session.execute(
+        db.select(Patient.patient_id, Patient.email).where(Patient.patient_id.in_(patient_ids))
+    ).all()) if patient_ids else {}
+
+    targets = set()
+    for op in ops.values():
+        if op["op"] == "book":
+            targets.add((op["doctor_id"], op["date"], op["time"]))
+        elif op["op"] == "reschedule" and op["appointment_id"] in appointments:
+            targets.add((appointments[op["appointment_id"]]["doctor_id"], op["date"], op["time"]))
+    occupied = dict(
+        ((row.doctor_id, row.date, row.time), row.appointment_id) for row in db.session.execute(
+            db.select(Appointment.doctor_id, Appointment.date, Appointment.time, Appointment.appointment_id)
+            .where(Appointment.status.in_(ACTIVE_STATUSES))
+            .where(tuple_(Appointment.doctor_id, Appointment.date, Appointment.time).in_(targets))
+        )
+    ) if targets else {}
+
+    writes = {"book": [], "reschedule": [], "cancel": []}
+    for index, op in ops.items():
+        try:
+            results[index] = _apply(
+                index, op, user_id, role, appointments, known_doctors, patient_emails, occupied, writes,
+            )
+        except BatchItemError as e:
+            results[index] = e
+    _write(writes, results)
+
+    for result in results:
+        if not isinstance(result, BatchItemError):
+            recipient, subject, body = result.pop("notification")
+            enqueue_email(recipient=recipient, subject=subject, body=body)
+
+    output = []
+    for index, (item, result) in enumerate(zip(items, results)):
+        if isinstance(result, BatchItemError):
+            op = item.get("op") if isinstance(item, dict) else None
+            output.append({
+                "index": index, "op": op, "status": "error", "code": result.code, "message": result.message,
+            })
+        else:
+            output.append({"index": index, "status": "success", **result})
+    return output
+
+
+def _apply(index, op, user_id, role, appointments, known_doctors, patient_emails, occupied, writes):
+    """Resolve one parsed operation against the batch snapshot and queue its write."""
+    if op["op"] == "book":
+        if op["doctor_id"] not in known_doctors:
+            raise BatchItemError(404, f"Doctor with ID {op['doctor_id']} not found")
+        if op["patient_id"] not in patient_emails:
+            raise BatchItemError(404, f"Patient with ID {op['patient_id']} not found")
+
+        slot = (op["doctor_id"], op["date"], op["time"])
+        if slot in occupied:
+            raise BatchItemError(409, "Appointment already exists")
+        # Held by this item until the bookings are written.
+        occupied[slot] = index
+        writes["book"].append((index, op["patient_id"], *slot))
+        return {
+            "op": "book",
+            "notification": (
+                patient_emails[op["patient_id"]], "Appointment Confirmation",
+                f"Your appointment is booked for {op['date']} at {op['time'].strftime('%H:%M')}.",
+            ),
+        }
+
+    appointment = appointments.get(op["appointment_id"])
+    if appointment is None:
+        raise BatchItemError(404, f"Appointment with ID {op['appointment_id']} not found")
+    if not _can_manage(appointment, user_id, role):
+        raise BatchItemError(403, f"You are not authorized to {op['op']} this appointment")
+
+    appointment_id = appointment["appointment_id"]
+    old_slot = (appointment["doctor_id"], appointment["date"], appointment["time"])
+    recipient = patient_emails.get(appointment["patient_id"])
+
+    if op["op"] == "cancel":
+        writes["cancel"].append(appointment_id)
+        if occupied.get(old_slot) == appointment_id:
+            del occupied[old_slot]
+        record_slot_change(*old_slot[:2])
+        del appointments[appointment_id]
+        return {
+            "op": "cancel",
+            "data": {"appointmentId": str(appointment_id)},
+            "notification": (recipient, "Appointment Cancellation", "Your appointment has been cancelled."),
+        }
+
+    new_slot = (appointment["doctor_id"], op["date"], op["time"])
+    if occupied.get(new_slot, appointment_id) != appointment_id:
+        raise BatchItemError(409, "Appointment already exists at this time")
+    if occupied.get(old_slot) == appointment_id:
+        del occupied[old_slot]
+    occupied[new_slot] = appointment_id
+    writes["reschedule"].append((index, appointment_id, old_slot, new_slot))
+    appointment.update(date=op["date"], time=op["time"])
+    return {
+        "op": "reschedule",
+        "data": _appointment_data(**appointment),
+        "notification": (
+            recipient, "Appointment Rescheduled",
+            f"Your appointment has been rescheduled to {op['date']} at {op['time']}.",
+        ),
+    }
+
+
+def _write(writes, results):
+    """
+    Issue the queued writes: cancellations, then moves, then bookings.
+
+    That order frees slots before anything moves or books into them. A move or
+    booking that lost its slot to a concurrent request since the batch was
+    read turns its result into a 409.
+    """
+    if writes["cancel"]:
+        db.session.execute(
+            delete(Appointment).where(Appointment.appointment_id.in_(writes["cancel"])),
+            execution_options={"synchronize_session": False},
+        )
+
+    moves = writes["reschedule"]
+    if moves:
+        table = Appointment.__table__
+        stmt = (
+            update(table)
+            .where(table.c.appointment_id == bindparam("moved_id"))
+            .values(date=bindparam("new_date"), time=bindparam("new_time"))
+        )
+        params = [
+            {"moved_id": appointment_id, "new_date": new_slot[1], "new_time": new_slot[2]}
+            for _, appointment_id, _, new_slot in moves
+        ]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(stmt, params)
+        except IntegrityError:
+            # Retry one by one to find the moves that conflict.
+            for (index, *_), move_params in zip(moves, params):
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(stmt, move_params)
+                except IntegrityError:
+                    results[index] = BatchItemError(409, "Appointment already exists at this time")
+        for index, _, old_slot, new_slot in moves:
+            if not isinstance(results[index], BatchItemError):
+                record_slot_change(*old_slot[:2])
+                record_slot_change(*new_slot[:2])
+
+    bookings = writes["book"]
+    for (index, *_), booked in zip(bookings, book_slots([slot for _, *slot in bookings])):
+        if booked is None:
+            # Taken by a concurrent request since the batch was read.
+            results[index] = BatchItemError(409, "Appointment already exists")
+        else:
+            results[index]["data"] = _appointment_data(
+                booked["appointment_id"], booked["patient_id"], booked["doctor_id"],
+                booked["date"], booked["time"], booked["status"],
+            )
@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.appointments.models import Appointment, ACTIVE_STATUSES
+from app.doctors.slots import record_slot_change
+
+_UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _slot_values(patient_id, doctor_id, date, time):
+    return {
+        "appointment_id": uuid.uuid4(),
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "date": date,
+        "time": time,
+        "status": "booked",
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _upsert(rows):
+    """INSERT ... ON CONFLICT DO NOTHING on the active slot index, or None where the dialect lacks it."""
+    upsert = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if upsert is None:
+        return None
+    return upsert(Appointment).values(rows).on_conflict_do_nothing(
+        index_elements=[Appointment.doctor_id, Appointment.date, Appointment.time],
+        index_where=Appointment.status.in_(ACTIVE_STATUSES),
+    )
+
+
+def _insert_in_savepoint(values):
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(Appointment).values(**values))
+    except IntegrityError:
+        return False
+    return True
+
+
+def book_slot(patient_id, doctor_id, date, time):
+    """
+    Book a slot in a single INSERT ... ON CONFLICT DO NOTHING statement.
+
+    The partial unique index on (doctor_id, date, time) decides the race, so
+    concurrent requests for the same slot cannot both succeed.
+
+    Returns:
+        Appointment: The new appointment, or None if the slot is already taken.
+    """
+    values = _slot_values(patient_id, doctor_id, date, time)
+    stmt = _upsert([values])
+
+    if stmt is None:
+        if not _insert_in_savepoint(values):
+            return None
+        record_slot_change(doctor_id, date)
+        return db.session.get(Appointment, values["appointment_id"])
+
+    appointment = db.session.scalars(stmt.returning(Appointment)).first()
+    if appointment:
+        record_slot_change(doctor_id, date)
+    return appointment
+
+
+def book_slots(slots):
+    """
+    Book several slots in one multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+    Args:
+        slots (list): (patient_id, doctor_id, date, time) tuples, each for a
+            different slot.
+
+    Returns:
+        list: The column values of each new appointment, or None where the
+        slot was already taken, in input order.
+    """
+    rows = [_slot_values(*slot) for slot in slots]
+    if not rows:
+        return []
+    stmt = _upsert(rows)
+
+    if stmt is None:
+        booked = {row["appointment_id"] for row in rows if _insert_in_savepoint(row)}
+    else:
+        booked = set(db.session.scalars(stmt.returning(Appointment.appointment_id)))
+
+    results = []
+    for row in rows:
+        if row["appointment_id"] in booked:
+            record_slot_change(row["doctor_id"], row["date"])
+            results.append(row)
+        else:
+            results.append(None)
+    return results
+
+
+def reschedule_slot(appointment, date, time):
+    """
+    Move an appointment to a new slot, relying on the unique index for conflicts.
+
+    Returns:
+        bool: True if the appointment was moved, False if the slot is taken.
+    """
+    try:
+        with db.session.begin_nested():
+            appointment.date = date
+            appointment.time = time
+    except IntegrityError:
+        return False
+    return True
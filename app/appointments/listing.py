@@ -0,0 +1,99 @@
+"""
+Keyset-paginated appointment listings, shared by the WSGI and async handlers.
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import tuple_
+from app import db
+from app.appointments.models import Appointment
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
+
+# Output field name -> column, for the fields= projection on listings.
+APPOINTMENT_FIELDS = {
+    "appointmentId": Appointment.appointment_id,
+    "patientId": Appointment.patient_id,
+    "doctorId": Appointment.doctor_id,
+    "date": Appointment.date,
+    "time": Appointment.time,
+    "status": Appointment.status,
+}
+
+
+def format_time(value):
+    """HH:MM, the time format of the appointments API."""
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+
+def listing_query(user_id, user_role, args):
+    """
+    Build the listing query for a caller from the request's query arguments.
+
+    Raises:
+        ValueError: If an argument is malformed.
+
+    Returns:
+        tuple: (query, fields, limit). The query selects limit + 1 rows.
+    """
+    owner_column = Appointment.doctor_id if user_role == "doctor" else Appointment.patient_id
+
+    limit = parse_limit(args.get("limit"))
+    fields = args.get("fields")
+    fields = fields.split(",") if fields else list(APPOINTMENT_FIELDS)
+    unknown_fields = [field for field in fields if field not in APPOINTMENT_FIELDS]
+    if unknown_fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown_fields)}")
+
+    # The sort key is always selected so the next cursor can be built.
+    columns = [Appointment.date, Appointment.time, Appointment.appointment_id] + [
+        APPOINTMENT_FIELDS[field] for field in fields
+    ]
+    query = db.select(*columns).where(owner_column == user_id)
+
+    if args.get("start_date"):
+        query = query.where(
+            Appointment.date >= datetime.strptime(args["start_date"], "%Y-%m-%d").date()
+        )
+    if args.get("end_date"):
+        query = query.where(
+            Appointment.date <= datetime.strptime(args["end_date"], "%Y-%m-%d").date()
+        )
+    if args.get("status"):
+        query = query.where(Appointment.status.in_(args["status"].split(",")))
+    if args.get("cursor"):
+        cursor_date, cursor_time, cursor_id = decode_cursor(args["cursor"], 3)
+        query = query.where(
+            tuple_(Appointment.date, Appointment.time, Appointment.appointment_id) > tuple_(
+                datetime.strptime(cursor_date, "%Y-%m-%d").date(),
+                datetime.strptime(cursor_time, "%H:%M:%S").time(),
+                uuid.UUID(cursor_id),
+            )
+        )
+
+    query = query.order_by(Appointment.date, Appointment.time, Appointment.appointment_id).limit(limit + 1)
+    return query, fields, limit
+
+
+def listing_response(rows, fields, limit):
+    """Turn the rows of listing_query() into the listing response body."""
+    next_cursor = encode_cursor(*rows[limit - 1][:3]) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    # If no appointments, return an empty list with a success message
+    if not rows:
+        return {
+            "status": "success",
+            "message": "Here is where we will display the appointments",
+            "data": {"appointments": [], "nextCursor": None},
+        }
+
+    # UUIDs and dates are encoded by the JSON serializer; only times need formatting.
+    appointment_list = [dict(zip(fields, row[3:])) for row in rows]
+    if "time" in fields:
+        for appointment in appointment_list:
+            appointment["time"] = format_time(appointment["time"])
+
+    return {
+        "status": "success",
+        "message": "Appointments retrieved successfully",
+        "data": {"appointments": appointment_list, "nextCursor": next_cursor},
+    }
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Time
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Time, Index, literal_column
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app import db
 
+# Statuses that hold a doctor's slot; only one such appointment may exist per slot.
+ACTIVE_STATUSES = ("booked",)
+
 
 class Appointment(db.Model):
     """
@@ -18,9 +21,24 @@ class Appointment(db.Model):
     time = Column(Time, nullable=False)
     status = Column(String(50), default='booked')
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented in SQL by every UPDATE; ETags are built from it (see app.conditional)
+    version = Column(Integer, nullable=False, server_default="1", default=1, onupdate=literal_column("version") + 1)
 
     doctor = relationship("Doctor", back_populates="appointments")
     patient = relationship("Patient", back_populates="appointments")
 
+    __table_args__ = (
+        Index("ix_appointment_doctor_date_time", "doctor_id", "date", "time"),
+        Index("ix_appointment_patient_date_time", "patient_id", "date", "time"),
+        Index(
+            "uq_appointment_active_slot",
+            "doctor_id", "date", "time",
+            unique=True,
+            postgresql_where=status.in_(ACTIVE_STATUSES),
+            sqlite_where=status.in_(ACTIVE_STATUSES),
+        ),
+    )
+
     def __repr__(self):
         return f"<Appointment {self.appointment_id}>"
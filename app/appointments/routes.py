@@ -1,15 +1,18 @@
 from flask_restx import Namespace, Resource
-from flask import request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
-import jwt
+from flask import request, jsonify, current_app
+from app.auth.utils import role_required, current_identity
+from app.metrics.queries import query_budget
+from app.conditional import conditional_get, set_validators
+import uuid
 from app.appointments.models import Appointment
+from app.appointments.booking import book_slot, reschedule_slot
+from app.appointments.batch import apply_batch
 from app import db
 from datetime import datetime
-from utils.mail import send_email
-from config import Config
+from app.notifications.queue import enqueue_email
+from app.appointments.listing import listing_query, listing_response
 from flask import make_response
 from app.patients.models import Patient
-from app.doctors.models import Doctor
 from app.appointments.schemas import (
     appointment_model,
     book_appointment_model,
@@ -17,8 +20,28 @@ from app.appointments.schemas import (
     reschedule_appointment_model,
     error_response_model,
     appointments_list_model,
+    batch_request_model,
+    batch_response_model,
 )
 
+
+def _patient_email(patient_id):
+    """Fetch only the email column of a patient, for notifications."""
+    return db.session.execute(
+        db.select(Patient.email).where(Patient.patient_id == patient_id)
+    ).scalar_one_or_none()
+
+
+def _appointment_with_email(appointment_id):
+    """Load an appointment and its patient's email in one query; (None, None) if missing."""
+    row = db.session.execute(
+        db.select(Appointment, Patient.email)
+        .outerjoin(Patient, Patient.patient_id == Appointment.patient_id)
+        .where(Appointment.appointment_id == appointment_id)
+    ).one_or_none()
+    return tuple(row) if row is not None else (None, None)
+
+
 appointment_namespace = Namespace("appointments", description="Appointments related operations")
 
 appointment_namespace.add_model("Appointment", appointment_model)
@@ -27,6 +50,8 @@ appointment_namespace.add_model("RescheduleAppointment", reschedule_appointment_
 appointment_namespace.add_model("CancelAppointmentResponse", cancel_appointment_response_model)
 appointment_namespace.add_model("ErrorResponse", error_response_model)
 appointment_namespace.add_model("AppointmentsList", appointments_list_model)
+appointment_namespace.add_model("BatchRequest", batch_request_model)
+appointment_namespace.add_model("BatchResponse", batch_response_model)
 
 @appointment_namespace.route("")
 class AppointmentNamespace(Resource):
@@ -40,58 +65,36 @@ class AppointmentNamespace(Resource):
 
 @appointment_namespace.route("/")
 class AppointmentsResource(Resource):
-    @jwt_required()
+    @role_required("patient", "doctor")
+    @query_budget(1)
+    @appointment_namespace.doc(params={
+        "limit": "Page size (default 50, max 200)",
+        "cursor": "nextCursor from the previous page",
+        "start_date": "Only appointments on or after this date (YYYY-MM-DD)",
+        "end_date": "Only appointments on or before this date (YYYY-MM-DD)",
+        "status": "Comma-separated statuses to include",
+        "fields": "Comma-separated fields to return",
+    })
     @appointment_namespace.response(200, "Success", appointments_list_model)
     def get(self):
         """
         Get all appointments related to the logged-in user.
         """
-        current_user_id = get_jwt_identity()
-        user = Patient.query.filter_by(patient_id=current_user_id).first() or Doctor.query.filter_by(doctor_id=current_user_id).first()
-
-        if not user:
-            return {"status": "error", "message": "User not found"}, 404
+        user_id, user_role = current_identity()
 
-        user_role = "patient" if isinstance(user, Patient) else "doctor"
-        user_id = user.patient_id if isinstance(user, Patient) else user.doctor_id
-
-        if user_role == "doctor":
-            appointments = Appointment.query.filter_by(doctor_id=user_id).all()
-        elif user_role == "patient":
-            appointments = Appointment.query.filter_by(patient_id=user_id).all()
-        else:
-            return {"status": "error", "message": "Unauthorized"}, 403
-
-        # If no appointments, return an empty list with a success message
-        if not appointments:
-            return {
-                "status": "success",
-                "message": "Here is where we will display the appointments",
-                "data": {"appointments": []},
-            }, 200
-
-        appointment_list = [
-            {
-                "appointmentId": str(appointment.appointment_id),
-                "patientId": str(appointment.patient_id),
-                "doctorId": str(appointment.doctor_id),
-                "date": appointment.date.strftime("%Y-%m-%d"),
-                "time": appointment.time.strftime("%H:%M"),
-                "status": appointment.status,
-            }
-            for appointment in appointments
-        ]
+        try:
+            query, fields, limit = listing_query(user_id, user_role, request.args)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
 
-        return {
-            "status": "success",
-            "message": "Appointments retrieved successfully",
-            "data": {"appointments": appointment_list},
-        }, 200
+        rows = db.session.execute(query).all()
+        return listing_response(rows, fields, limit), 200
 
 
 @appointment_namespace.route("/book")
 class BookAppointmentResource(Resource):
-    @jwt_required()
+    @role_required("patient", message="Unauthorized, only patients can book appointments")
+    @query_budget(4)
     @appointment_namespace.expect(book_appointment_model)
     @appointment_namespace.response(201, "Appointment booked successfully", appointment_model)
     @appointment_namespace.response(400, "Invalid input", error_response_model)
@@ -101,15 +104,7 @@ class BookAppointmentResource(Resource):
         """
         Book an appointment (Patient only).
         """
-        current_user = get_jwt_identity()
-        user_role = current_user.get("role")
-        user = Patient.query.filter_by(patient_id=current_user.get("id")).first() or Doctor.query.filter_by(doctor_id=current_user.get("id")).first()
-
-        if not user:
-            return {"status": "error", "message": "User not found"}, 404
-
-        if user_role != "patient":
-            return {"status": "error", "message": "Unauthorized, only patients can book appointments"}, 403
+        patient_id, _ = current_identity()
 
         data = request.get_json()
         date = data.get("date")
@@ -119,32 +114,31 @@ class BookAppointmentResource(Resource):
         try:
             appointment_date = datetime.strptime(date, "%Y-%m-%d").date()
             appointment_time = datetime.strptime(time, "%H:%M").time()
+            doctor_id = uuid.UUID(str(doctor_id))
         except ValueError as e:
             return {"status": "error", "message": str(e)}, 400
 
-        existing_appointment = Appointment.query.filter_by(
-            date=appointment_date, time=appointment_time, doctor_id=doctor_id
-        ).first()
-
-        if existing_appointment:
-            return {"status": "error", "message": "Appointment already exists"}, 409
+        patient_email = _patient_email(patient_id)
+        if not patient_email:
+            return {"status": "error", "message": "User not found"}, 404
 
-        new_appointment = Appointment(
-            patient_id=user.patient_id,
+        new_appointment = book_slot(
+            patient_id=patient_id,
             doctor_id=doctor_id,
             date=appointment_date,
             time=appointment_time,
-            status="booked",
         )
 
-        db.session.add(new_appointment)
-        db.session.commit()
+        if not new_appointment:
+            db.session.rollback()
+            return {"status": "error", "message": "Appointment already exists"}, 409
 
-        send_email(
-            recipient=user.email,
+        enqueue_email(
+            recipient=patient_email,
             subject="Appointment Confirmation",
             body=f"Your appointment is booked for {date} at {time}.",
         )
+        db.session.commit()
 
         return {
             "status": "success",
@@ -162,7 +156,8 @@ class BookAppointmentResource(Resource):
 
 @appointment_namespace.route("/cancel/<uuid:appointment_id>")
 class CancelAppointmentResource(Resource):
-    @jwt_required()
+    @role_required("patient", message="Unauthorized, only patients can cancel appointments")
+    @query_budget(3)
     @appointment_namespace.response(200, "Appointment cancelled successfully", cancel_appointment_response_model)
     @appointment_namespace.response(404, "Appointment not found", error_response_model)
     @appointment_namespace.response(403, "You are not authorized to cancel this appointment", error_response_model)
@@ -170,35 +165,25 @@ class CancelAppointmentResource(Resource):
         """
         Cancel an appointment (Patient only).
         """
-        current_user_id = get_jwt_identity()
-        user = Patient.query.filter_by(patient_id=current_user_id).first()
+        current_user_id, _ = current_identity()
 
-        if not user:
-            return {"status": "error", "message": "User not found"}, 404
-
-        user_role = "patient" if isinstance(user, Patient) else "doctor"
-        if user_role != "patient":
-            return {"status": "error", "message": "Unauthorized, only patients can cancel appointments"}, 403
-
-        appointment = Appointment.query.get(appointment_id)
+        appointment, patient_email = _appointment_with_email(appointment_id)
         if not appointment:
             return {"status": "error", "message": f"Appointment with ID {appointment_id} not found"}, 404
 
-        if str(appointment.patient_id) != str(current_user_id):
+        if appointment.patient_id != current_user_id:
             return {"status": "error", "message": "You are not authorized to cancel this appointment"}, 403
 
-        patient = Patient.query.filter_by(patient_id=appointment.patient_id).first()
-        if not patient:
+        if not patient_email:
             return {"status": "error", "message": "Patient not found"}, 404
 
         db.session.delete(appointment)
-        db.session.commit()
-
-        send_email(
-            recipient=patient.email,
+        enqueue_email(
+            recipient=patient_email,
             subject="Appointment Cancellation",
             body="Your appointment has been cancelled.",
         )
+        db.session.commit()
 
         return {
             "status": "success",
@@ -209,7 +194,8 @@ class CancelAppointmentResource(Resource):
 
 @appointment_namespace.route("/reschedule/<uuid:appointment_id>")
 class RescheduleAppointmentResource(Resource):
-    @jwt_required()
+    @role_required("patient", message="Unauthorized, only patients can reschedule appointments")
+    @query_budget(6)
     @appointment_namespace.expect(reschedule_appointment_model)
     @appointment_namespace.response(200, "Appointment rescheduled successfully", appointment_model)
     @appointment_namespace.response(404, "Appointment not found", error_response_model)
@@ -219,21 +205,13 @@ class RescheduleAppointmentResource(Resource):
         """
         Reschedule an appointment (Patient only).
         """
-        current_user_id = get_jwt_identity()
-        user = Patient.query.filter_by(patient_id=current_user_id).first()
-
-        if not user:
-            return {"status": "error", "message": "User not found"}, 404
+        current_user_id, _ = current_identity()
 
-        user_role = "patient" if isinstance(user, Patient) else "doctor"
-        if user_role != "patient":
-            return {"status": "error", "message": "Unauthorized, only patients can reschedule appointments"}, 403
-
-        appointment = Appointment.query.get(appointment_id)
+        appointment, patient_email = _appointment_with_email(appointment_id)
         if not appointment:
             return {"status": "error", "message": f"Appointment with ID {appointment_id} not found"}, 404
 
-        if str(appointment.patient_id) != str(current_user_id):
+        if appointment.patient_id != current_user_id:
             return {"status": "error", "message": "You are not authorized to reschedule this appointment"}, 403
 
         data = request.get_json()
@@ -246,26 +224,18 @@ class RescheduleAppointmentResource(Resource):
         except ValueError as e:
             return {"status": "error", "message": str(e)}, 400
 
-        existing_appointment = Appointment.query.filter_by(
-            date=new_date, time=new_time, doctor_id=appointment.doctor_id
-        ).first()
+        if not patient_email:
+            return {"status": "error", "message": "Patient not found"}, 404
 
-        if existing_appointment:
+        if not reschedule_slot(appointment, new_date, new_time):
             return {"status": "error", "message": "Appointment already exists at this time"}, 409
 
-        appointment.date = new_date
-        appointment.time = new_time
-        db.session.commit()
-
-        patient = Patient.query.filter_by(patient_id=appointment.patient_id).first()
-        if not patient:
-            return {"status": "error", "message": "Patient not found"}, 404
-
-        send_email(
-            recipient=patient.email,
+        enqueue_email(
+            recipient=patient_email,
             subject="Appointment Rescheduled",
             body=f"Your appointment has been rescheduled to {new_date} at {new_time}.",
         )
+        db.session.commit()
 
         return {
             "status": "success",
@@ -281,8 +251,45 @@ class RescheduleAppointmentResource(Resource):
         }, 200
 
 
+@appointment_namespace.route("/batch")
+class BatchAppointmentsResource(Resource):
+    @role_required("patient", "doctor", "admin")
+    @query_budget(10)
+    @appointment_namespace.expect(batch_request_model)
+    @appointment_namespace.response(200, "Operations applied, see per-item results", batch_response_model)
+    @appointment_namespace.response(400, "Invalid input", error_response_model)
+    def post(self):
+        """
+        Book, reschedule and cancel several appointments in one transaction.
+        """
+        user_id, user_role = current_identity()
+
+        data = request.get_json(silent=True) or {}
+        operations = data.get("operations")
+        max_operations = current_app.config["APPOINTMENT_BATCH_MAX_OPERATIONS"]
+        if not isinstance(operations, list) or not operations:
+            return {"status": "error", "message": "operations must be a non-empty list"}, 400
+        if len(operations) > max_operations:
+            return {"status": "error", "message": f"At most {max_operations} operations per batch"}, 400
+
+        results = apply_batch(operations, user_id, user_role)
+        db.session.commit()
+
+        applied = sum(1 for result in results if result["status"] == "success")
+        return {
+            "status": "success",
+            "message": f"{applied} of {len(results)} operations applied",
+            "data": {"results": results},
+        }, 200
+
+
 @appointment_namespace.route("/<uuid:appointment_id>")
 class ViewAppointmentResource(Resource):
+    @role_required("patient", message="Unauthorized, only patients can view appointment details")
+    @query_budget(2)
+    @conditional_get(
+        Appointment.appointment_id, lambda appointment_id: appointment_id, owner_column=Appointment.patient_id
+    )
     @appointment_namespace.response(200, "Appointment details retrieved successfully", appointment_model)
     @appointment_namespace.response(404, "Appointment not found", error_response_model)
     @appointment_namespace.response(403, "You are not authorized to view this appointment", error_response_model)
@@ -290,34 +297,15 @@ class ViewAppointmentResource(Resource):
         """
         Get appointment details (Patient only).
         """
-        current_user = get_jwt_identity()
-        user_role = current_user.get("role")
-        user = Patient.query.filter_by(patient_id=current_user.get("id")).first() or Doctor.query.filter_by(doctor_id=current_user.get("id")).first()
-
-        if not user:
-            return {"status": "error", "message": "User not found"}, 404
-
-        if user_role != "patient":
-            return {"status": "error", "message": "Unauthorized, only patients can view appointment details"}, 403
-
-        appointment = Appointment.query.get(appointment_id)
+        appointment = db.session.get(Appointment, appointment_id)
         if not appointment:
             return {"status": "error", "message": f"Appointment with ID {appointment_id} not found"}, 404
 
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return {"status": "error", "message": "Authorization header missing"}, 400
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded_token = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=["HS256"])
-            patient_id_from_token = decoded_token.get("sub")
-        except (IndexError, jwt.ExpiredSignatureError, jwt.InvalidTokenError):
-            return {"status": "error", "message": "Invalid or expired token"}, 401
-
-        if str(appointment.patient_id) != str(patient_id_from_token):
+        patient_id, _ = current_identity()
+        if appointment.patient_id != patient_id:
             return {"status": "error", "message": "You are not authorized to view this appointment"}, 403
 
+        set_validators(appointment)
         return {
             "status": "success",
             "message": "Appointment details retrieved successfully",
@@ -14,7 +14,8 @@ appointments_list_model = api.model("AppointmentsList", {
     "status": fields.String(example="success"),
     "message": fields.String(example="Appointments retrieved successfully"),
     "data": fields.Nested(api.model("AppointmentsData", {
-        "appointments": fields.List(fields.Nested(appointment_model))
+        "appointments": fields.List(fields.Nested(appointment_model)),
+        "nextCursor": fields.String(description="Cursor for the next page, null on the last page")
     }))
 })
 
@@ -42,3 +43,33 @@ error_response_model = api.model("ErrorResponse", {
     "message": fields.String(example="Invalid input"),
     "errors": fields.List(fields.String(example="Missing required fields"))
 })
+
+batch_operation_model = api.model("BatchOperation", {
+    "op": fields.String(required=True, description="book, reschedule or cancel", example="reschedule"),
+    "appointment_id": fields.String(description="Appointment ID (reschedule and cancel)"),
+    "doctor_id": fields.String(description="Doctor ID (book; taken from the token for doctors)"),
+    "patient_id": fields.String(description="Patient ID (book; taken from the token for patients)"),
+    "date": fields.String(description="Appointment date (YYYY-MM-DD)", example="2025-04-10"),
+    "time": fields.String(description="Appointment time (HH:MM)", example="16:00")
+})
+
+batch_request_model = api.model("BatchRequest", {
+    "operations": fields.List(fields.Nested(batch_operation_model), required=True)
+})
+
+batch_result_model = api.model("BatchResult", {
+    "index": fields.Integer(description="Position of the operation in the request"),
+    "op": fields.String(example="reschedule"),
+    "status": fields.String(example="success"),
+    "code": fields.Integer(description="HTTP-style error code for failed operations", example=409),
+    "message": fields.String(description="Error message for failed operations"),
+    "data": fields.Nested(appointment_model, description="Resulting appointment for successful operations")
+})
+
+batch_response_model = api.model("BatchResponse", {
+    "status": fields.String(example="success"),
+    "message": fields.String(example="2 of 3 operations applied"),
+    "data": fields.Nested(api.model("BatchData", {
+        "results": fields.List(fields.Nested(batch_result_model))
+    }))
+})
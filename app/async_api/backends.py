@@ -0,0 +1,109 @@
+"""
+Async database and cache clients for the ASGI serving mode.
+
+Both are created inside the serving process's event loop (on lifespan
+startup, or on the first request), never at import time, so they are safe
+with forking servers.
+"""
+import asyncio
+from cachelib.serializers import RedisSerializer
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Sync driver backend -> async driver used for the same database.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_uri(uri):
+    """Swap the sync driver of a database URI for its async counterpart."""
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {url.get_backend_name()}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    def __init__(self):
+        self.engine = None
+        self.session = None
+
+    def init(self, config):
+        uri = config.get("ASYNC_DATABASE_URI") or async_database_uri(config["SQLALCHEMY_DATABASE_URI"])
+        from app import engine_options
+
+        options = engine_options(config, uri)
+        if config["DB_PGBOUNCER"] and make_url(uri).get_backend_name() == "postgresql":
+            # asyncpg prepares statements per connection, which PgBouncer's
+            # transaction mode cannot route.
+            options["connect_args"] = {"statement_cache_size": 0}
+        self.engine = create_async_engine(uri, **options)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def close(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+
+class AsyncCache:
+    """
+    Async access to the entries the Flask-Caching backend holds.
+
+    With Redis this talks to the same keys through redis.asyncio, using the
+    backend's key prefix and serializer, so WSGI and ASGI workers share one
+    cache. Other backends are in-process or local, and are called directly.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.backend = None
+        self.prefix = ""
+        self.serializer = RedisSerializer()
+
+    def init(self, config, backend):
+        self.backend = backend
+        if config["CACHE_TYPE"] in ("redis", "RedisCache", "flask_caching.backends.RedisCache"):
+            import redis.asyncio
+
+            self.client = redis.asyncio.from_url(config["CACHE_REDIS_URL"])
+            self.prefix = config.get("CACHE_KEY_PREFIX") or ""
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, key):
+        if self.client is None:
+            return self.backend.get(key)
+        return self.serializer.loads(await self.client.get(self.prefix + key))
+
+    async def get_many(self, *keys):
+        if self.client is None:
+            return self.backend.get_many(*keys)
+        values = await self.client.mget([self.prefix + key for key in keys])
+        return [self.serializer.loads(value) for value in values]
+
+    async def set(self, key, value, timeout):
+        if self.client is None:
+            return self.backend.set(key, value, timeout=timeout)
+        return await self.client.set(self.prefix + key, self.serializer.dumps(value), ex=timeout or None)
+
+    async def add(self, key, value, timeout):
+        if self.client is None:
+            return self.backend.add(key, value, timeout=timeout)
+        added = await self.client.set(self.prefix + key, self.serializer.dumps(value), ex=timeout or None, nx=True)
+        return bool(added)
+
+    async def delete(self, key):
+        if self.client is None:
+            return self.backend.delete(key)
+        return await self.client.delete(self.prefix + key)
+
+
+async def close_all(*clients):
+    await asyncio.gather(*(client.close() for client in clients))
@@ -0,0 +1,81 @@
+"""
+Async handlers for the hot read endpoints.
+
+Each one returns the same body, status and validators as its flask_restx
+resource and reuses the resource's query and formatting helpers.
+"""
+import uuid
+from app.appointments.listing import listing_query, listing_response
+from app.async_api.server import AsyncAPI
+from app.conditional import entity_validators
+from app.doctors.models import Doctor
+from app.doctors.routes import doctor_availability_data, doctor_details_data, doctor_profile_data
+from app.patients.models import Patient
+from app.patients.routes import patient_profile_data
+
+PREFIX = "/api/v1"
+
+
+async def list_appointments(api, request, claims):
+    try:
+        query, fields, limit = listing_query(uuid.UUID(claims["sub"]), claims.get("role"), request.args)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}, 400
+
+    async with api.db.session() as session:
+        rows = (await session.execute(query)).all()
+    return listing_response(rows, fields, limit), 200
+
+
+async def _get(api, model, pk):
+    async with api.db.session() as session:
+        return await session.get(model, pk)
+
+
+async def doctor_details(api, request, claims, doctor_id):
+    async def compute():
+        doctor = await _get(api, Doctor, doctor_id)
+        if not doctor:
+            return {"message": "Requested doctor not found."}, 404
+        return {"status": "success", "data": doctor_details_data(doctor)}, 200, entity_validators(doctor)
+
+    return await api.cached(
+        "doctor_details", request, claims, {"doctor_id": doctor_id}, [f"doctor:{doctor_id}"], compute
+    )
+
+
+async def doctor_availability(api, request, claims, doctor_id):
+    async def compute():
+        doctor = await _get(api, Doctor, doctor_id)
+        if not doctor:
+            return {"message": "Requested doctor not found."}, 404
+        return {"status": "success", "data": doctor_availability_data(doctor)}, 200
+
+    return await api.cached(
+        "doctor_availability", request, claims, {"doctor_id": doctor_id}, [f"doctor:{doctor_id}"], compute
+    )
+
+
+async def doctor_profile(api, request, claims):
+    doctor = await _get(api, Doctor, uuid.UUID(claims["sub"]))
+    if not doctor:
+        return {"message": "Doctor not found."}, 404
+    return {"status": "success", "data": doctor_profile_data(doctor)}, 200, entity_validators(doctor)
+
+
+async def patient_profile(api, request, claims):
+    patient = await _get(api, Patient, uuid.UUID(claims["sub"]))
+    if not patient:
+        return {"message": "Patient not found."}, 404
+    return {"status": "success", "data": patient_profile_data(patient)}, 200, entity_validators(patient)
+
+
+def create_asgi_app(flask_app, fallback=None):
+    """Wrap a Flask app built by create_app() in the async serving layer."""
+    api = AsyncAPI(flask_app, fallback=fallback)
+    api.route(f"{PREFIX}/appointments/", roles=("patient", "doctor"))(list_appointments)
+    api.route(f"{PREFIX}/doctors/{{doctor_id}}", conditional=True)(doctor_details)
+    api.route(f"{PREFIX}/doctors/availability/{{doctor_id}}")(doctor_availability)
+    api.route(f"{PREFIX}/doctors/profile", roles=("doctor",), conditional=True)(doctor_profile)
+    api.route(f"{PREFIX}/patients/profile", roles=("patient",), conditional=True)(patient_profile)
+    return api
@@ -0,0 +1,260 @@
+"""
+ASGI application serving the hot read endpoints natively.
+
+Matching GET requests with a valid access token are answered by async
+handlers on async database and cache clients. Every other request, and any
+request the async path cannot authorize, is handed to the Flask app through
+a WSGI adapter, so error responses and all write endpoints behave exactly as
+they do under gunicorn. Conditional requests to routes that send ETags go
+to Flask too, which answers them from the row version alone.
+"""
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from werkzeug.datastructures import Headers, MultiDict
+from app import cache
+from app.async_api.backends import AsyncDatabase, AsyncCache, close_all
+from app.compression import compress_payload
+from app.serialization import dumps
+from app.auth.tokens import recent_revocation, remember_revocations, revocation_keys
+from app.caching import (
+    TAG_PREFIX, LOCK_PREFIX, local_cache, invalidation_listener, build_cache_key, is_fresh, record_lookup,
+    new_tag_version,
+)
+
+# Same pattern as Werkzeug's uuid converter.
+UUID_PATTERN = r"[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}"
+
+
+class AsyncRequest:
+    def __init__(self, scope):
+        self.scope = scope
+        self.path = scope["path"]
+        self.headers = Headers([
+            (key.decode("latin-1"), value.decode("latin-1")) for key, value in scope["headers"]
+        ])
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        self.args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+
+
+class AsyncAPI:
+    """
+    Dispatch a few GET routes to async handlers and everything else to Flask.
+
+    Args:
+        flask_app (Flask): The application built by create_app().
+        fallback (callable): ASGI app for unmatched requests. Defaults to
+            the Flask app behind asgiref's WsgiToAsgi.
+    """
+
+    def __init__(self, flask_app, fallback=None):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.fallback = fallback or WsgiToAsgi(flask_app)
+        self.db = AsyncDatabase()
+        self.cache = AsyncCache()
+        self.routes = []
+        self._started = False
+
+    def route(self, path, roles=(), conditional=False):
+        """
+        Register an async GET handler. ``{name}`` segments match UUIDs.
+
+        Handlers return (body, status) or (body, status, headers). With
+        conditional=True, requests carrying If-None-Match or
+        If-Modified-Since are left to Flask.
+        """
+        parts = re.split(r"\{(\w+)\}", path)
+        pattern = re.compile("".join(
+            f"(?P<{part}>{UUID_PATTERN})" if index % 2 else re.escape(part)
+            for index, part in enumerate(parts)
+        ))
+
+        def decorator(handler):
+            self.routes.append((pattern, handler, roles, conditional))
+            return handler
+        return decorator
+
+    def startup(self):
+        if not self._started:
+            self.db.init(self.config)
+            self.cache.init(self.config, cache.cache)
+            self._started = True
+
+    async def shutdown(self):
+        if self._started:
+            await close_all(self.db, self.cache)
+            self._started = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            for pattern, handler, roles, conditional in self.routes:
+                match = pattern.fullmatch(scope["path"])
+                if not match:
+                    continue
+                request = AsyncRequest(scope)
+                if conditional and ("If-None-Match" in request.headers or "If-Modified-Since" in request.headers):
+                    break
+                claims = await self.authenticate(request, roles)
+                if claims is None:
+                    break
+                self.startup()
+                kwargs = {name: uuid.UUID(value) for name, value in match.groupdict().items()}
+                body, status, *headers = await handler(self, request, claims, **kwargs)
+                await self._send_json(send, request, body, status, headers[0] if headers else None)
+                return
+
+        await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def authenticate(self, request, roles):
+        """
+        Return the claims of a valid access token allowed on the route.
+
+        Returns None for anything else; the request then goes to Flask, which
+        produces the usual 401/403/422 response.
+        """
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Bearer "):
+            return None
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(header[len("Bearer "):])
+            uuid.UUID(str(claims.get("sub")))
+        except Exception:
+            return None
+
+        if claims.get("type") != "access" or (roles and claims.get("role") not in roles):
+            return None
+        if await self._is_revoked(claims):
+            return None
+        return claims
+
+    async def _is_revoked(self, claims):
+        if not self.config["JWT_DENYLIST_ENABLED"]:
+            return False
+        revoked, missing = recent_revocation(revocation_keys(claims))
+        if revoked or not missing:
+            return revoked
+        return remember_revocations(missing, await self.cache.get_many(*missing))
+
+    async def _send_json(self, send, request, body, status, extra_headers=None):
+        payload, encoding = dumps(body), None
+        if status == 200:
+            payload, encoding = compress_payload(payload, request.headers.get("Accept-Encoding"), self.config)
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        for name, value in (extra_headers or {}).items():
+            if encoding and name == "ETag" and not value.startswith("W/"):
+                # Compressed bytes, same representation; see app.compression.
+                value = "W/" + value
+            headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+        # Mirror the headers the CORS setup in create_app adds to /api/ responses.
+        origin = request.headers.get("Origin")
+        if origin:
+            headers += [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+        else:
+            headers.append((b"access-control-allow-origin", b"*"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    async def tag_versions(self, tags):
+        """Async counterpart of app.caching.tag_versions, reading the same keys."""
+        use_l1 = self.config["CACHE_L1_ENABLED"]
+        if use_l1:
+            invalidation_listener.ensure_started()
+
+        keys = [TAG_PREFIX + tag for tag in tags]
+        versions = [local_cache.get(key) for key in keys] if use_l1 else [None] * len(keys)
+        missing = [index for index, version in enumerate(versions) if version is None]
+        if not missing:
+            return versions
+
+        fetched = await self.cache.get_many(*[keys[index] for index in missing])
+        for index, version in zip(missing, fetched):
+            if version is None:
+                await self.cache.add(keys[index], new_tag_version(), timeout=0)
+                version = await self.cache.get(keys[index])
+            versions[index] = version
+            if use_l1:
+                local_cache.set(keys[index], version)
+        return versions
+
+    async def cached(self, family, request, claims, view_kwargs, tags, compute):
+        """
+        Serve a response through the shared response cache, like cached_response.
+
+        Entries are keyed exactly as the WSGI decorator keys them. A worker
+        that misses while another holds the recompute lock serves the stale
+        copy if there is one and otherwise computes without waiting.
+
+        ``compute`` returns (body, status) or (body, status, validators).
+
+        Returns:
+            tuple: (body, status, validators); validators may be None.
+        """
+        fresh_for = self.config["CACHE_DEFAULT_TIMEOUT"]
+        use_l1 = self.config["CACHE_L1_ENABLED"]
+
+        key = build_cache_key(
+            family,
+            claims.get("role", "anonymous"),
+            view_kwargs,
+            request.args.items(multi=True),
+            zip(tags, await self.tag_versions(tags)),
+        )
+
+        entry = local_cache.get(key) if use_l1 else None
+        if is_fresh(entry):
+            record_lookup(family, "l1_hits")
+            return entry["body"], entry["status"], entry.get("validators")
+
+        entry = await self.cache.get(key)
+        if is_fresh(entry):
+            if use_l1:
+                local_cache.set(key, entry)
+            record_lookup(family, "l2_hits")
+            return entry["body"], entry["status"], entry.get("validators")
+
+        locked = await self.cache.add(LOCK_PREFIX + key, 1, timeout=self.config["CACHE_LOCK_TIMEOUT"])
+        if not locked and entry is not None:
+            record_lookup(family, "stale_hits")
+            return entry["body"], entry["status"], entry.get("validators")
+
+        record_lookup(family, "misses")
+        try:
+            body, status, *validators = await compute()
+            validators = validators[0] if validators else None
+            if status == 200:
+                entry = {"body": body, "status": status, "fresh_until": time.time() + fresh_for}
+                if validators:
+                    entry["validators"] = validators
+                await self.cache.set(key, entry, timeout=fresh_for + self.config["CACHE_STALE_GRACE"])
+                if use_l1:
+                    local_cache.set(key, entry)
+        finally:
+            if locked:
+                await self.cache.delete(LOCK_PREFIX + key)
+        return body, status, validators
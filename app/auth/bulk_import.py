@@ -0,0 +1,203 @@
+"""
+Streaming bulk import of patients and doctors from CSV or JSONL.
+
+Rows are validated with the same rules as registration, passwords are hashed
+in a process pool (inline with a single process, as admin uploads over HTTP
+are), and each chunk is written with one multi-row
+INSERT ... ON CONFLICT DO NOTHING and committed on its own. Rows that fail
+validation or collide with an existing email or phone are reported by row
+number; the rest of the batch carries on.
+"""
+import contextlib
+import csv
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.auth.passwords import password_hasher
+from app.auth.registration import (
+    validate_registration, taken_unique_values, unique_field_errors, constraint_field_errors, UNIQUE_FIELDS,
+)
+from app.caching import invalidate_tags
+from app.doctors.directory import DIRECTORY_TAG
+from utils.error_list import add_error_to_list
+
+_UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+FORMATS = ("csv", "jsonl")
+
+
+def _role_model(role):
+    from app.doctors.models import Doctor
+    from app.patients.models import Patient
+    return {"doctor": Doctor, "patient": Patient}[role]
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (row_number, data, errors_list) for each record of a text stream.
+
+    Row numbers are 1-based data rows, not counting the CSV header.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, {key: (value or "").strip() for key, value in row.items() if key}, []
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            errors_list = []
+            add_error_to_list(errors_list, "row", "Row is not a JSON object")
+            yield number, {}, errors_list
+            continue
+        yield number, data, []
+
+
+def _insert_chunk(model, rows):
+    """Insert cleaned rows and return the set of emails that were actually inserted."""
+    upsert = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+
+    if upsert is None:
+        inserted = set()
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(model).values(**row))
+                inserted.add(row["email"])
+            except IntegrityError:
+                pass
+        return inserted
+
+    stmt = upsert(model).on_conflict_do_nothing().returning(model.email)
+    return set(db.session.scalars(stmt, rows))
+
+
+def import_users(records, role, chunk_size=None, processes=None):
+    """
+    Import users from (row_number, data, errors_list) records.
+
+    Args:
+        records (iterable): Usually the output of read_rows().
+        role (str): "patient" or "doctor".
+        chunk_size (int): Rows per INSERT and commit. Defaults to IMPORT_CHUNK_SIZE.
+        processes (int): Hashing processes. Defaults to IMPORT_HASH_PROCESSES;
+            with 1 passwords are hashed on the calling thread, without a pool.
+
+    Returns:
+        dict: Counts of processed, imported and failed rows, plus per-row errors.
+    """
+    model = _role_model(role)
+    chunk_size = chunk_size or current_app.config["IMPORT_CHUNK_SIZE"]
+    processes = processes or current_app.config["IMPORT_HASH_PROCESSES"]
+    method = password_hasher.method
+
+    report = {"role": role, "processed": 0, "imported": 0, "failed": 0, "errors": []}
+    seen = {field: set() for field in UNIQUE_FIELDS}
+
+    def fail(number, errors_list):
+        report["failed"] += 1
+        report["errors"].append({"row": number, "errors": errors_list})
+
+    records = iter(records)
+    pool = None
+    if processes > 1:
+        # Spawned workers only import werkzeug, and do not inherit the app's threads or connections.
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    with pool or contextlib.nullcontext():
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            valid = []
+            for number, data, errors_list in chunk:
+                report["processed"] += 1
+                if not errors_list:
+                    errors_list, user_data = validate_registration(data, role)
+                if not errors_list:
+                    for field, message in UNIQUE_FIELDS.items():
+                        if user_data[field] in seen[field]:
+                            add_error_to_list(errors_list, field, f"{message} earlier in this file")
+                if errors_list:
+                    fail(number, errors_list)
+                    continue
+                for field in UNIQUE_FIELDS:
+                    seen[field].add(user_data[field])
+                valid.append((number, user_data))
+
+            if not valid:
+                continue
+
+            passwords = [user_data["password"] for _, user_data in valid]
+            if pool is None:
+                hashes = map(password_hasher.hash, passwords)
+            else:
+                batch = max(1, len(passwords) // (processes * 4))
+                hashes = pool.map(generate_password_hash, passwords, repeat(method), chunksize=batch)
+            for (_, user_data), hashed in zip(valid, hashes):
+                user_data["password"] = hashed
+
+            rows = [user_data for _, user_data in valid]
+            try:
+                inserted = _insert_chunk(model, rows)
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                errors_list = constraint_field_errors(e)
+                for number, _ in valid:
+                    fail(number, errors_list or [{"field": "row", "message": str(e.orig)}])
+                continue
+
+            report["imported"] += len(inserted)
+            skipped = [(number, user_data) for number, user_data in valid if user_data["email"] not in inserted]
+            if skipped:
+                taken = taken_unique_values(model, [user_data for _, user_data in skipped])
+                for number, user_data in skipped:
+                    fail(number, unique_field_errors(user_data, taken) or [
+                        {"field": "row", "message": "Conflicts with an existing user"}
+                    ])
+
+    report["errors"].sort(key=lambda error: error["row"])
+    if role == "doctor" and report["imported"]:
+        invalidate_tags(DIRECTORY_TAG)
+    return report
+
+
+@click.command("import-users")
+@click.argument("role", type=click.Choice(["patient", "doctor"]))
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None, help="Defaults to the file extension.")
+@click.option("--chunk-size", type=int, default=None, help="Rows per insert and commit.")
+@click.option("--processes", type=int, default=None, help="Password hashing processes.")
+@click.option("--errors", "errors_file", type=click.File("w"), default=None, help="Write per-row errors as JSONL.")
+@with_appcontext
+def import_users_command(role, source, fmt, chunk_size, processes, errors_file):
+    """Import patients or doctors from a CSV or JSONL file ('-' reads stdin)."""
+    fmt = fmt or ("jsonl" if source.name.endswith((".jsonl", ".json")) else "csv")
+    report = import_users(read_rows(source, fmt), role, chunk_size=chunk_size, processes=processes)
+
+    if errors_file:
+        for error in report["errors"]:
+            errors_file.write(json.dumps(error) + "\n")
+    click.echo(f"Processed {report['processed']} rows: {report['imported']} imported, {report['failed']} failed.")
@@ -0,0 +1,70 @@
+"""
+Password hashing with a configurable cost.
+
+Hashes are computed inline on the request thread, behind a semaphore that
+caps how many run at once in a worker process. hashlib's scrypt and PBKDF2
+release the GIL, so other threads keep serving requests while a login is
+being verified, and the cap bounds how many cores login storms can pin.
+
+Handing the hash to another thread would not help: the request still waits
+for it. Worker concurrency during login storms therefore comes from the
+threaded gunicorn workers this app is deployed with (gthread, see
+gunicorn.conf.py, which warns on start when workers are not threaded).
+"""
+import threading
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasher:
+    def __init__(self, method="scrypt", concurrency=1):
+        self.method = method
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def configure(self, method, concurrency):
+        self.method = method
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def _run(self, fn, *args):
+        with self._slots:
+            return fn(*args)
+
+    @property
+    def prefix(self):
+        """The method and parameters part of hashes made with the configured method."""
+        if self._prefix is None:
+            self._prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+        return self._prefix
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True when a hash was made with other parameters than the configured ones."""
+        return stored_hash.split("$", 1)[0] != self.prefix
+
+
+password_hasher = PasswordHasher()
+
+
+def init_password_hasher(app):
+    password_hasher.configure(app.config["PASSWORD_HASH_METHOD"], app.config["PASSWORD_HASH_CONCURRENCY"])
+
+
+def hash_password(password):
+    """Hash a password with the configured method."""
+    return password_hasher.hash(password)
+
+
+def verify_password(stored_hash, password):
+    """Check a password against a stored hash made with any supported method."""
+    return password_hasher.verify(stored_hash, password)
+
+
+def needs_rehash(stored_hash):
+    """True when a stored hash should be upgraded to the configured method."""
+    return password_hasher.needs_rehash(stored_hash)
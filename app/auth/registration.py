@@ -0,0 +1,98 @@
+"""
+Validation shared by single registration and bulk import.
+"""
+import re
+from datetime import datetime
+from sqlalchemy import or_
+from app import db
+from utils.error_list import add_error_to_list
+
+PHONE_PATTERN = re.compile(r"^(\+2547\d{8}|07\d{8})$")
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
+
+UNIQUE_FIELDS = {
+    "email": "Email already in use",
+    "phone": "Phone number already in use",
+}
+
+
+def validate_registration(data, role):
+    """
+    Check a registration payload without touching the database.
+
+    Args:
+        data (dict): The submitted fields.
+        role (str): "patient" or "doctor".
+
+    Returns:
+        tuple: (errors_list, user_data). user_data holds the cleaned column
+        values, with the password still in plain text.
+    """
+    errors_list = []
+
+    required_fields = ["firstname", "lastname", "email", "phone", "password"]
+    if role == "doctor":
+        required_fields.append("specialization")
+    else:
+        required_fields.append("date_of_birth")
+
+    for field in required_fields:
+        if not data.get(field):
+            add_error_to_list(errors_list, field, f"{field.replace('_', ' ').capitalize()} is required")
+
+    if data.get("phone") and not PHONE_PATTERN.match(data["phone"]):
+        add_error_to_list(errors_list, "phone", "Phone number is invalid")
+
+    if data.get("email") and not EMAIL_PATTERN.match(data["email"]):
+        add_error_to_list(errors_list, "email", "Email is invalid")
+
+    user_data = {
+        "firstname": data.get("firstname"),
+        "lastname": data.get("lastname"),
+        "email": data.get("email"),
+        "phone": data.get("phone"),
+        "password": data.get("password"),
+    }
+
+    if role == "doctor":
+        user_data["specialization"] = data.get("specialization")
+    elif data.get("date_of_birth"):
+        try:
+            user_data["date_of_birth"] = datetime.fromisoformat(data["date_of_birth"])
+        except (TypeError, ValueError):
+            add_error_to_list(errors_list, "date_of_birth", "Date of birth is invalid")
+
+    return errors_list, user_data
+
+
+def taken_unique_values(model, rows):
+    """Return the emails and phones of rows that other users already hold, in one query."""
+    emails = {row.get("email") for row in rows}
+    phones = {row.get("phone") for row in rows}
+    existing = db.session.execute(
+        db.select(model.email, model.phone)
+        .where(or_(model.email.in_(emails), model.phone.in_(phones)))
+    ).all()
+    return {
+        "email": {row.email for row in existing},
+        "phone": {row.phone for row in existing},
+    }
+
+
+def unique_field_errors(data, taken):
+    """Return errors for the unique fields of data found in taken_unique_values()."""
+    errors_list = []
+    for field, message in UNIQUE_FIELDS.items():
+        if data.get(field) in taken[field]:
+            add_error_to_list(errors_list, field, message)
+    return errors_list
+
+
+def constraint_field_errors(error):
+    """Map a unique violation to the field its constraint covers, when the message names one."""
+    errors_list = []
+    message = str(error.orig)
+    for field, text in UNIQUE_FIELDS.items():
+        if field in message:
+            add_error_to_list(errors_list, field, text)
+    return errors_list
@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
-import re
 from flask import request
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from flask_restx import Namespace, Resource
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db, api
-from app.auth.utils import generate_jwt_token
-from utils.error_list import add_error_to_list
-from utils.mail import send_email
+from flask_jwt_extended import jwt_required
+from app.auth.tokens import (
+    generate_jwt_token, generate_refresh_token, new_token_family, current_claims, revoke_token,
+)
+from app.auth.utils import role_required
+from app.metrics.queries import query_budget
+from app.auth.passwords import hash_password, verify_password, needs_rehash
+from app.auth.registration import (
+    validate_registration, taken_unique_values, unique_field_errors, constraint_field_errors,
+)
+from app.doctors.directory import DIRECTORY_TAG
+from app.caching import invalidate_tags
+from app.replicas import remember_writer
 
 
 class UserRegister(Resource):
@@ -14,78 +24,44 @@ class UserRegister(Resource):
         self.model = model
         self.role = role
 
+    @query_budget(2)
     def post(self):
         """Register a new user (generic for patient and doctor)"""
         data = request.json
-        errors_list = []
-
-        required_fields = ["firstname", "lastname", "email", "phone", "password"]
-        if self.role == "doctor":
-            required_fields.append("specialization")
-        else:
-            required_fields.append("date_of_birth")
-
-        for field in required_fields:
-            if not data.get(field):
-                add_error_to_list(errors_list, field, f"{field.replace('_', ' ').capitalize()} is required")
-
-        if self.model.query.filter_by(email=data.get("email")).first():
-            add_error_to_list(errors_list, "email", "Email already in use")
-
-        if self.model.query.filter_by(phone=data.get("phone")).first():
-            add_error_to_list(errors_list, "phone", "Phone number already in use")
-
-        if data.get("phone") and not re.match(r"^(\+2547\d{8}|07\d{8})$", data["phone"]):
-            add_error_to_list(errors_list, "phone", "Phone number is invalid")
-
-        if data.get("email") and not re.match(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", data["email"]):
-            add_error_to_list(errors_list, "email", "Email is invalid")
+        errors_list, user_data = validate_registration(data, self.role)
 
         if errors_list:
             return {"status": "Bad Request", "message": "Registration unsuccessful", "errors": errors_list}, 400
 
-        hashed_password = generate_password_hash(data.get("password"))
-
-        user_data = {
-            "firstname": data.get("firstname"),
-            "lastname": data.get("lastname"),
-            "email": data.get("email"),
-            "phone": data.get("phone"),
-            "password": hashed_password
-        }
+        user_data["password"] = hash_password(user_data["password"])
 
         if self.role == "doctor":
-            user_data["specialization"] = data.get("specialization")
+            returning = [self.model.doctor_id.label("user_id"), self.model.employee_id, self.model.specialization]
         else:
-            user_data["date_of_birth"] = data.get("date_of_birth")
+            returning = [self.model.patient_id.label("user_id"), self.model.date_of_birth]
 
-        new_user = self.model(**user_data)
+        # The unique constraints on email and phone decide races between
+        # concurrent registrations; RETURNING hands back the generated ids.
+        statement = (
+            insert(self.model)
+            .values(**user_data)
+            .returning(*returning, self.model.firstname, self.model.lastname, self.model.email, self.model.phone)
+        )
 
         try:
-            db.session.add(new_user)
+            new_user = db.session.execute(statement).one()
             db.session.commit()
-            db.session.refresh(new_user)
-
-            response_data = {
-                "Id": str(new_user.doctor_id) if self.role == "doctor" else str(new_user.patient_id),
-                "employ_id": str(new_user.employee_id) if self.role == "doctor" else None,
-                "firstName": new_user.firstname,
-                "lastName": new_user.lastname,
-                "email": new_user.email,
-                "phone": new_user.phone,
-            }
-
-            if self.role == "doctor":
-                response_data["specialization"] = new_user.specialization
-            else:
-                response_data["dateOfBirth"] = new_user.date_of_birth.strftime('%Y-%m-%d')
-
-            return {
-                "status": "Success",
-                "message": "Registration successful",
-                "data": {self.role: response_data}
-            }, 201
-
+        except IntegrityError as e:
+            db.session.rollback()
+            taken = taken_unique_values(self.model, [data])
+            errors_list = unique_field_errors(data, taken) or constraint_field_errors(e)
+            if not errors_list:
+                return {
+                    "status": "Internal Server Error",
+                    "message": "Registration unsuccessful",
+                    "errors": str(e),
+                }, 500
+            return {"status": "Bad Request", "message": "Registration unsuccessful", "errors": errors_list}, 400
         except Exception as e:
             db.session.rollback()
             return {
@@ -94,12 +70,39 @@ class UserRegister(Resource):
                 "errors": str(e),
             }, 500
 
+        # The new user's first requests carry a token for this id, not a
+        # caller identity the session could have pinned.
+        remember_writer(new_user.user_id)
+        if self.role == "doctor":
+            invalidate_tags(DIRECTORY_TAG)
+
+        response_data = {
+            "Id": str(new_user.user_id),
+            "employ_id": str(new_user.employee_id) if self.role == "doctor" else None,
+            "firstName": new_user.firstname,
+            "lastName": new_user.lastname,
+            "email": new_user.email,
+            "phone": new_user.phone,
+        }
+
+        if self.role == "doctor":
+            response_data["specialization"] = new_user.specialization
+        else:
+            response_data["dateOfBirth"] = new_user.date_of_birth.strftime('%Y-%m-%d')
+
+        return {
+            "status": "Success",
+            "message": "Registration successful",
+            "data": {self.role: response_data}
+        }, 201
+
 
 class UserLogin(Resource):
     def __init__(self, model, role):
         self.model = model
         self.role = role
 
+    @query_budget(2)
     def post(self):
         """Authenticate a user (generic for patient and doctor)"""
         data = request.json
@@ -124,14 +127,19 @@ class UserLogin(Resource):
         if self.role == "doctor" and user.employee_id != employee_id:
             return {"message": "Invalid employee ID"}, 400
 
-        if not check_password_hash(user.password, password):
+        if not verify_password(user.password, password):
             return {"message": "Invalid password"}, 400
 
+        if needs_rehash(user.password):
+            # The hash parameters changed since this password was stored.
+            user.password = hash_password(password)
+            db.session.commit()
+
         try:
-            if self.role == "doctor":
-                jwt_token = generate_jwt_token(user.doctor_id, role=self.role)
-            else:
-                jwt_token = generate_jwt_token(user.patient_id, role=self.role)
+            user_id = user.doctor_id if self.role == "doctor" else user.patient_id
+            family = new_token_family()
+            jwt_token = generate_jwt_token(user_id, role=self.role, family=family)
+            refresh_token = generate_refresh_token(user_id, role=self.role, family=family)
 
             if not jwt_token:
                 return {
@@ -148,6 +156,7 @@ class UserLogin(Resource):
 
         response_data = {
             "accessToken": jwt_token,
+            "refreshToken": refresh_token,
             self.role: {
                 f"{self.role}Id": str(user.doctor_id if self.role == "doctor" else user.patient_id),
                 "firstName": user.firstname,
@@ -162,3 +171,36 @@ class UserLogin(Resource):
             "message": "Login successful",
             "data": response_data
         }, 200
+
+
+class UserLogout(Resource):
+    def __init__(self, model, role):
+        self.model = model
+        self.role = role
+
+    @role_required()
+    @query_budget(0)
+    def post(self):
+        """Revoke the caller's access token and the refresh token of the same login (generic for patient and doctor)"""
+        revoke_token(current_claims())
+        return {"status": "success", "message": "Logout successful"}, 200
+
+
+class UserTokenRefresh(Resource):
+    def __init__(self, model, role):
+        self.model = model
+        self.role = role
+
+    @jwt_required(refresh=True)
+    @query_budget(0)
+    def post(self):
+        """Exchange a refresh token for a new access token (generic for patient and doctor)"""
+        claims = current_claims()
+        if claims.get("role") != self.role:
+            return {"message": "Invalid refresh token"}, 401
+
+        return {
+            "status": "success",
+            "message": "Token refreshed",
+            "data": {"accessToken": generate_jwt_token(claims["sub"], role=self.role, family=claims.get("fam"))}
+        }, 200
@@ -0,0 +1,137 @@
+"""
+Access and refresh token service.
+
+Tokens are issued and verified only through flask_jwt_extended. A request's
+token is decoded once by the verifying decorator and the claims are kept on
+the request context, so handlers read them with get_jwt() instead of
+decoding the Authorization header again.
+
+Every token issued from one login carries the same family id ("fam"), so a
+logout can revoke the refresh token along with the access token it presents.
+"""
+import time
+import uuid
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt
+from app import cache
+from app.caching import LocalCache
+
+REVOKED_PREFIX = "revoked_jti:"
+REVOKED_FAMILY_PREFIX = "revoked_family:"
+
+# Recent denylist lookups, so most requests skip the shared cache round-trip.
+_revocation_cache = LocalCache()
+
+
+def new_token_family():
+    """Return a fresh family id for the tokens of one login."""
+    return uuid.uuid4().hex
+
+
+def generate_jwt_token(user_id, role, family=None):
+    """
+    Generate a short-lived access token for a user.
+
+    Args:
+        user_id (uuid.UUID): The ID of the user (patient, doctor, or admin).
+        role (str): The role of the user ("patient", "doctor", or "admin").
+        family (str): Family id shared with the refresh token of the same login.
+
+    Returns:
+        str: The encoded access token.
+    """
+    claims = {"role": role}
+    if family:
+        claims["fam"] = family
+    return create_access_token(identity=str(user_id), additional_claims=claims)
+
+
+def generate_refresh_token(user_id, role, family=None):
+    """Generate a long-lived refresh token, only accepted by the refresh endpoints."""
+    claims = {"role": role}
+    if family:
+        claims["fam"] = family
+    return create_refresh_token(identity=str(user_id), additional_claims=claims)
+
+
+def current_claims():
+    """Return the claims of the token verified for this request."""
+    return get_jwt()
+
+
+def revoke_token(claims):
+    """
+    Deny a token until it would have expired anyway.
+
+    The token's family is denied too, for as long as a refresh token can
+    live, so the refresh token of the same login stops working as well.
+    """
+    keys = {}
+    jti = claims.get("jti")
+    if jti:
+        keys[REVOKED_PREFIX + jti] = int(claims.get("exp", 0) - time.time())
+    family = claims.get("fam")
+    if family:
+        keys[REVOKED_FAMILY_PREFIX + family] = int(current_app.config["JWT_REFRESH_TOKEN_EXPIRES"].total_seconds())
+
+    for key, remaining in keys.items():
+        cache.set(key, True, timeout=max(remaining, 1))
+        _revocation_cache.set(key, True)
+
+
+def revocation_keys(claims):
+    """Return the denylist keys that revoke a token: its own and its family's."""
+    keys = []
+    if claims.get("jti"):
+        keys.append(REVOKED_PREFIX + claims["jti"])
+    if claims.get("fam"):
+        keys.append(REVOKED_FAMILY_PREFIX + claims["fam"])
+    return keys
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """
+    Token blocklist loader for flask_jwt_extended.
+
+    Lookups are remembered for JWT_DENYLIST_CACHE_TTL seconds, so other
+    workers may accept a just-revoked token for that long.
+    """
+    if not current_app.config["JWT_DENYLIST_ENABLED"]:
+        return False
+
+    revoked, missing = recent_revocation(revocation_keys(jwt_payload))
+    if revoked or not missing:
+        return revoked
+    return remember_revocations(missing, cache.get_many(*missing))
+
+
+def recent_revocation(keys):
+    """
+    Check remembered denylist lookups.
+
+    Returns:
+        tuple: (revoked, keys that still need a shared cache lookup).
+    """
+    missing = []
+    for key in keys:
+        revoked = _revocation_cache.get(key)
+        if revoked:
+            return True, []
+        if revoked is None:
+            missing.append(key)
+    return False, missing
+
+
+def remember_revocations(keys, values):
+    """Remember shared cache lookups and return whether any of them revokes the token."""
+    revoked = [bool(value) for value in values]
+    for key, value in zip(keys, revoked):
+        _revocation_cache.set(key, value)
+    return any(revoked)
+
+
+def init_denylist(app):
+    """Size the local denylist cache from the app config."""
+    _revocation_cache.max_entries = app.config["JWT_DENYLIST_CACHE_SIZE"]
+    _revocation_cache.ttl = app.config["JWT_DENYLIST_CACHE_TTL"]
+    _revocation_cache.clear()
@@ -1,33 +1,45 @@
-from datetime import datetime, timedelta
-import jwt
-from flask import current_app
-from config import Config
+import functools
+import uuid
+from flask_jwt_extended import verify_jwt_in_request
+from app.auth.tokens import current_claims
 
-def generate_jwt_token(user_id, role):
+
+def current_identity():
     """
-    Generate a JWT token for a user.
+    Return the caller's identity from the verified token claims.
 
-    Args:
-        user_id (int): The ID of the user (patient, doctor, or admin).
-        role (str): The role of the user ("patient", "doctor", or "admin").
+    No database query is made; the role was embedded in the token at login.
 
     Returns:
-        str: The generated JWT token.
+        tuple: The user ID (uuid.UUID) and role (str).
+    """
+    claims = current_claims()
+    return uuid.UUID(claims["sub"]), claims.get("role")
+
+
+def role_required(*roles, message=None):
     """
-    try:
-        jwt_secret_key = Config.JWT_SECRET_KEY
-        if not jwt_secret_key:
-            raise Exception("JWT_SECRET_KEY is not set in the environment variables.")
-        
-        payload = {
-            "exp": datetime.utcnow() + timedelta(hours=1),
-            "iat": datetime.utcnow(),
-            "sub": str(user_id),
-            "role": role
-        }
-
-        jwt_token = jwt.encode(payload, jwt_secret_key, algorithm="HS256")
-        return jwt_token
-    except Exception as e:
-        print(f"JWT Generation Error: {e}")
-        return None
+    Require a valid access token whose role claim is one of the given roles.
+
+    Replaces the Patient/Doctor lookups handlers used to run just to find out
+    who the caller is.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = current_claims()
+
+            try:
+                uuid.UUID(str(claims.get("sub")))
+            except ValueError:
+                return {"status": "error", "message": "Invalid token subject"}, 401
+
+            if roles and claims.get("role") not in roles:
+                return {
+                    "status": "error",
+                    "message": message or f"Unauthorized, only {' or '.join(roles)}s can access this resource",
+                }, 403
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,361 @@
+"""
+Response caching for flask_restx resources.
+
+Entries are keyed by a key family, the route arguments, the query string and
+the caller's role, plus the current version of every tag the entry depends on.
+Invalidating a tag (e.g. ``doctor:<id>``) gives it a new version, which orphans
+every entry built against the old one in a single write.
+
+Each entry carries a soft expiry. Once it passes, one worker takes a short
+lock and recomputes while the others keep serving the stale copy, so an
+expiring hot key does not send every worker to the database at once.
+
+Reads go through two tiers: a small per-process LRU (L1) holding decoded
+entries and tag versions, then the shared Flask-Caching backend (L2). Tag
+invalidations are published on a Redis channel so every worker drops its L1
+copy of the tag; without Redis they are only applied locally and the short
+L1 TTL bounds how long other processes can lag.
+"""
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt
+from app import cache
+from app.replicas import pin_to_primary
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = "cache_tag:"
+LOCK_PREFIX = "cache_lock:"
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {"l1_hits": 0, "l2_hits": 0, "stale_hits": 0, "misses": 0})
+
+
+def record_lookup(family, outcome):
+    """Count a cache lookup outcome for cache_stats()."""
+    with _stats_lock:
+        _stats[family][outcome] += 1
+
+
+def cache_stats():
+    """Return hit/miss counters and per-tier hit ratios per key family for this process."""
+    with _stats_lock:
+        stats = {family: dict(counters) for family, counters in _stats.items()}
+
+    for counters in stats.values():
+        lookups = sum(counters.values())
+        counters["l1_hit_ratio"] = round(counters["l1_hits"] / lookups, 4) if lookups else 0.0
+        l2_lookups = lookups - counters["l1_hits"]
+        counters["l2_hit_ratio"] = round(counters["l2_hits"] / l2_lookups, 4) if l2_lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class LocalCache:
+    """A bounded, thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = LocalCache()
+
+
+class InvalidationListener:
+    """Applies tag invalidations published by other workers to this process's L1."""
+
+    def __init__(self):
+        self.channel = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _redis(self):
+        return getattr(cache.cache, "_write_client", None)
+
+    def enabled(self):
+        return self.channel is not None and self._redis() is not None
+
+    def ensure_started(self):
+        """Start the subscriber thread once per process (threads do not survive a fork)."""
+        if not self.enabled() or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published while we were disconnected was missed.
+                local_cache.clear()
+                for message in pubsub.listen():
+                    tags = message["data"].decode().split("\n")
+                    local_cache.delete_many(*[TAG_PREFIX + tag for tag in tags])
+            except Exception as e:
+                logger.warning("Cache invalidation listener disconnected: %s", e)
+                time.sleep(1)
+
+    def publish(self, tags):
+        if self.enabled():
+            try:
+                self._redis().publish(self.channel, "\n".join(tags))
+            except Exception as e:
+                logger.warning("Could not publish cache invalidation: %s", e)
+
+
+invalidation_listener = InvalidationListener()
+
+
+def init_caching(app):
+    """Configure the L1 tier and cross-worker invalidation from the app config."""
+    local_cache.max_entries = app.config["CACHE_L1_MAX_ENTRIES"]
+    local_cache.ttl = app.config["CACHE_L1_TTL"]
+    local_cache.clear()
+    invalidation_listener.channel = app.config["CACHE_L1_CHANNEL"] if app.config["CACHE_L1_PUBSUB"] else None
+
+
+def _l1_enabled():
+    return current_app.config["CACHE_L1_ENABLED"]
+
+
+def new_tag_version():
+    """A random tag version that also records when it was created."""
+    return f"{time.time():.3f}:{uuid.uuid4().hex}"
+
+
+def changed_within(versions, seconds):
+    """Whether any of the tag versions was created less than ``seconds`` ago."""
+    now = time.time()
+    for version in versions:
+        try:
+            created = float(str(version).split(":", 1)[0])
+        except ValueError:
+            # A version written before versions carried their creation time.
+            continue
+        if now - created < seconds:
+            return True
+    return False
+
+
+def tag_versions(tags):
+    """
+    Return the current version of each tag, creating versions for unknown tags.
+
+    Fresh versions are random, so a tag that was evicted from the backend can
+    never come back with a version an old entry was built against.
+    """
+    if not tags:
+        return []
+
+    use_l1 = _l1_enabled()
+    if use_l1:
+        invalidation_listener.ensure_started()
+
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = [local_cache.get(key) for key in keys] if use_l1 else [None] * len(keys)
+    missing = [index for index, version in enumerate(versions) if version is None]
+    if not missing:
+        return versions
+
+    fetched = cache.get_many(*[keys[index] for index in missing])
+    for index, version in zip(missing, fetched):
+        if version is None:
+            cache.add(keys[index], new_tag_version(), timeout=0)
+            version = cache.get(keys[index])
+        versions[index] = version
+        if use_l1:
+            local_cache.set(keys[index], version)
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Invalidate every cached entry that depends on any of the given tags."""
+    if not tags:
+        return
+    cache.set_many({TAG_PREFIX + tag: new_tag_version() for tag in tags}, timeout=0)
+    local_cache.delete_many(*[TAG_PREFIX + tag for tag in tags])
+    invalidation_listener.publish(tags)
+
+
+def _caller_role():
+    try:
+        return get_jwt().get("role", "anonymous")
+    except RuntimeError:
+        # No JWT was verified for this request.
+        return "anonymous"
+
+
+def build_cache_key(family, role, view_kwargs, query_items, tag_pairs, subject=None):
+    """
+    Build a cache key from already-resolved request parts.
+
+    Shared by the WSGI decorator and the async serving mode so both read and
+    write the same entries.
+    """
+    parts = [
+        role,
+        repr(sorted(view_kwargs.items())),
+        repr(sorted(query_items)),
+        repr(list(tag_pairs)),
+    ]
+    if subject is not None:
+        parts.append(str(subject))
+    digest = hashlib.md5("|".join(parts).encode()).hexdigest()
+    return f"{family}:{digest}"
+
+
+def make_cache_key(family, view_kwargs, tags, versions, per_user=False):
+    """Build the cache key for a request from its arguments, role and tag versions."""
+    return build_cache_key(
+        family,
+        _caller_role(),
+        view_kwargs,
+        request.args.items(multi=True),
+        zip(tags, versions),
+        subject=get_jwt().get("sub") if per_user else None,
+    )
+
+
+def _split_response(response):
+    if isinstance(response, tuple):
+        return response[0], response[1] if len(response) > 1 else 200
+    return response, 200
+
+
+def is_fresh(entry):
+    return entry is not None and entry["fresh_until"] > time.time()
+
+
+def _cached_result(entry):
+    # Hand the ETag and Last-Modified of the cached body to conditional_get.
+    if entry.get("validators"):
+        g.validators = entry["validators"]
+    return entry["body"], entry["status"]
+
+
+def _wait_for_entry(key, lock_timeout):
+    """Poll for an entry another worker is computing, up to the lock timeout."""
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None or not cache.has(LOCK_PREFIX + key):
+            # Either the entry is ready or the winner gave up without caching.
+            return entry
+    return None
+
+
+def cached_response(family, timeout=None, tags=None, per_user=False):
+    """
+    Cache the successful responses of a resource method.
+
+    Args:
+        family (str): Key family, used as key prefix and for hit/miss counters.
+        timeout (int): Seconds an entry is fresh. Defaults to CACHE_DEFAULT_TIMEOUT.
+        tags (callable): Called with the route arguments; returns the tags the
+            response depends on.
+        per_user (bool): Also vary the key on the caller's identity.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            fresh_for = timeout or config["CACHE_DEFAULT_TIMEOUT"]
+            lock_timeout = config["CACHE_LOCK_TIMEOUT"]
+            use_l1 = config["CACHE_L1_ENABLED"]
+            entry_tags = list(tags(**kwargs)) if tags else []
+
+            versions = tag_versions(entry_tags)
+            key = make_cache_key(family, kwargs, entry_tags, versions, per_user=per_user)
+
+            entry = local_cache.get(key) if use_l1 else None
+            if is_fresh(entry):
+                record_lookup(family, "l1_hits")
+                return _cached_result(entry)
+
+            entry = cache.get(key)
+            if is_fresh(entry):
+                if use_l1:
+                    local_cache.set(key, entry)
+                record_lookup(family, "l2_hits")
+                return _cached_result(entry)
+
+            # Only the worker holding the lock recomputes; the rest serve the
+            # stale copy or wait briefly for the winner's result.
+            locked = cache.add(LOCK_PREFIX + key, 1, timeout=lock_timeout)
+            if not locked:
+                if entry is None:
+                    entry = _wait_for_entry(key, lock_timeout)
+                if entry is not None:
+                    record_lookup(family, "stale_hits")
+                    return _cached_result(entry)
+
+            record_lookup(family, "misses")
+            if changed_within(versions, config["REPLICA_MAX_LAG"]):
+                # Rebuilt right after a write: a lagging replica could still
+                # return the old data, which would then be cached in full.
+                pin_to_primary()
+            try:
+                body, status = _split_response(f(*args, **kwargs))
+                if status == 200:
+                    entry = {"body": body, "status": status, "fresh_until": time.time() + fresh_for}
+                    if g.get("validators"):
+                        entry["validators"] = g.validators
+                    cache.set(key, entry, timeout=fresh_for + config["CACHE_STALE_GRACE"])
+                    if use_l1:
+                        local_cache.set(key, entry)
+            finally:
+                if locked:
+                    cache.delete(LOCK_PREFIX + key)
+            return body, status
+        return wrapper
+    return decorator
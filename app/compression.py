@@ -0,0 +1,81 @@
+"""
+Negotiated gzip/brotli compression of API responses.
+
+Bodies of at least COMPRESSION_MIN_SIZE bytes are compressed with the best
+encoding the client accepts: brotli when the ``brotli`` package is
+installed, otherwise gzip. Streamed responses (image downloads), partial
+and empty responses are left alone. A compressed response's ETag is made
+weak, as the bytes differ from the identity encoding while the
+representation is the same, so conditional requests keep matching.
+"""
+import gzip
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/plain", "text/html")
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding):
+    """The encoding to use for a request's Accept-Encoding header, or None."""
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(available_encodings())
+
+
+def compress(payload, encoding, config):
+    if encoding == "br":
+        return brotli.compress(payload, quality=config["COMPRESSION_BROTLI_QUALITY"])
+    return gzip.compress(payload, compresslevel=config["COMPRESSION_GZIP_LEVEL"], mtime=0)
+
+
+def compress_payload(payload, accept_encoding, config):
+    """
+    Compress a body if it is large enough and the client accepts an encoding.
+
+    Returns:
+        tuple: (payload, encoding); encoding is None when left uncompressed.
+    """
+    if not config["COMPRESSION_ENABLED"] or len(payload) < config["COMPRESSION_MIN_SIZE"]:
+        return payload, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return payload, None
+    return compress(payload, encoding, config), encoding
+
+
+def init_compression(app):
+    @app.after_request
+    def compress_response(response):
+        # Every response of a negotiable resource varies on the header, compressed or not.
+        if response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add("Accept-Encoding")
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        payload, encoding = compress_payload(
+            response.get_data(), request.headers.get("Accept-Encoding"), app.config
+        )
+        if encoding is None:
+            return response
+
+        response.set_data(payload)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
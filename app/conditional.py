@@ -0,0 +1,106 @@
+"""
+Conditional GETs answered from row versions.
+
+Patient, Doctor and Appointment carry a ``version`` column that every
+UPDATE issued through SQLAlchemy increments in SQL (``version + 1``), and
+an ``updated_at`` timestamp. The strong ETag of a resource is built from
+its table, id and version. When a request carries If-None-Match or
+If-Modified-Since, only those two columns are selected; if they match, a
+304 goes out without the row being loaded or serialized.
+
+Raw SQL that updates these tables must bump ``version`` itself.
+"""
+import functools
+from datetime import timezone
+from flask import Response, g, request
+from sqlalchemy import inspect
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag, unquote_etag
+from app import db
+from app.auth.utils import current_identity
+
+
+def validators(table, entity_id, version, updated_at):
+    """
+    Build the ETag and Last-Modified headers of a row version.
+
+    Returns:
+        dict: Header name to value, suitable for caching alongside a body.
+    """
+    headers = {"ETag": quote_etag(f"{table}-{entity_id}-{version}")}
+    if updated_at is not None:
+        headers["Last-Modified"] = http_date(updated_at.replace(tzinfo=timezone.utc))
+    return headers
+
+
+def entity_validators(entity):
+    """Validators of a loaded Patient, Doctor or Appointment."""
+    mapper = inspect(entity).mapper
+    entity_id = mapper.primary_key_from_instance(entity)[0]
+    return validators(mapper.local_table.name, entity_id, entity.version, entity.updated_at)
+
+
+def set_validators(entity):
+    """Record the validators of the entity a view is about to return."""
+    g.validators = entity_validators(entity)
+
+
+def is_not_modified(request_headers, headers):
+    """
+    Whether a request's conditional headers match the given validators.
+
+    If-Modified-Since is only looked at when there is no If-None-Match.
+    """
+    if_none_match = request_headers.get("If-None-Match")
+    if if_none_match:
+        etag = headers.get("ETag")
+        return etag is not None and parse_etags(if_none_match).contains_weak(unquote_etag(etag)[0])
+
+    since = parse_date(request_headers.get("If-Modified-Since"))
+    last_modified = parse_date(headers.get("Last-Modified"))
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def not_modified_response(headers):
+    response = Response(status=304)
+    response.headers.update(headers)
+    return response
+
+
+def conditional_get(id_column, entity_id, owner_column=None):
+    """
+    Add ETag and Last-Modified to a GET and answer matching conditional requests with 304.
+
+    The view calls set_validators() on the row it returns, or gets them back
+    from the response cache.
+
+    Args:
+        id_column: Primary key attribute of the model, e.g. Doctor.doctor_id.
+        entity_id (callable): Called with the route arguments; returns the
+            id of the requested row.
+        owner_column: If given, only a caller whose id is in this column gets
+            a 304; anyone else falls through to the view and its 403.
+    """
+    model = id_column.class_
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if "If-None-Match" in request.headers or "If-Modified-Since" in request.headers:
+                row_id = entity_id(**kwargs)
+                columns = [model.version, model.updated_at]
+                if owner_column is not None:
+                    columns.append(owner_column)
+                row = db.session.execute(db.select(*columns).where(id_column == row_id)).one_or_none()
+                if row is not None and (owner_column is None or row[2] == current_identity()[0]):
+                    headers = validators(model.__tablename__, row_id, row[0], row[1])
+                    if is_not_modified(request.headers, headers):
+                        return not_modified_response(headers)
+
+            g.pop("validators", None)
+            response = f(*args, **kwargs)
+            headers = g.pop("validators", None)
+            if headers and isinstance(response, tuple) and len(response) == 2 and response[1] == 200:
+                return response[0], response[1], headers
+            return response
+        return wrapper
+    return decorator
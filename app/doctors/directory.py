@@ -0,0 +1,53 @@
+import uuid
+from sqlalchemy import func, or_, tuple_
+from app import db
+from app.doctors.availability import available_at
+from app.doctors.models import Doctor
+from utils.pagination import encode_cursor, decode_cursor
+
+# Tag shared by every cached directory page.
+DIRECTORY_TAG = "doctor_directory"
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def list_doctors(specialization=None, name_prefix=None, limit=50, cursor=None, available=None):
+    """
+    Return one page of the doctor directory and the cursor of the next page.
+
+    Pages are ordered by (lastname, firstname, doctor_id) and only the listed
+    columns are selected, never passwords or images. available is an optional
+    (weekday, time) pair; only the doctors working then are listed.
+    """
+    query = db.select(Doctor.doctor_id, Doctor.firstname, Doctor.lastname, Doctor.specialization)
+
+    if specialization:
+        query = query.where(Doctor.specialization == specialization)
+    if name_prefix:
+        pattern = _escape_like(name_prefix.lower()) + "%"
+        query = query.where(or_(
+            func.lower(Doctor.lastname).like(pattern, escape="\\"),
+            func.lower(Doctor.firstname).like(pattern, escape="\\"),
+        ))
+    if available:
+        query = query.where(*available_at(*available))
+    if cursor:
+        lastname, firstname, doctor_id = decode_cursor(cursor, 3)
+        query = query.where(
+            tuple_(Doctor.lastname, Doctor.firstname, Doctor.doctor_id)
+            > tuple_(lastname, firstname, uuid.UUID(doctor_id))
+        )
+
+    rows = db.session.execute(
+        query.order_by(Doctor.lastname, Doctor.firstname, Doctor.doctor_id).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.lastname, last.firstname, last.doctor_id)
+
+    # doctor_id stays a UUID; the JSON serializer encodes it.
+    doctors = [row._asdict() for row in rows[:limit]]
+    return doctors, next_cursor
@@ -1,13 +1,30 @@
 # -*- coding: utf-8 -*-
 import uuid
 from datetime import datetime, time
-from sqlalchemy import Column, Integer, String, DateTime, Sequence, Time, Text
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, DateTime, Sequence, Text, Time, Index, func, literal_column,
+)
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app import db
 
 employee_id_seq = Sequence('employee_id_seq')
 
+# Bit N of Doctor.days_mask is weekday N; the partial indexes are named after its first three letters
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def _weekday_indexes(days_mask):
+    """One partial index per weekday over the windows of the doctors working that day."""
+    indexes = []
+    for number, day in enumerate(WEEKDAYS):
+        works_that_day = days_mask.op('&')(1 << number) != 0
+        indexes.append(Index(
+            f'ix_doctors_available_{day[:3]}', 'availability_start', 'availability_end',
+            postgresql_where=works_that_day, sqlite_where=works_that_day,
+        ))
+    return indexes
+
 
 class Doctor(db.Model):
     """
@@ -17,7 +34,10 @@ class Doctor(db.Model):
 
     doctor_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True)
     employee_id = Column(Integer, unique=True, nullable=False, server_default=employee_id_seq.next_value())
-    image = Column(Text, nullable=True)
+    # sha256 key of a blob in the image store, or an external URL
+    image_key = Column(String(512), nullable=True)
+    # The pre-image-store value when migration a3f8c21d7e54 could not convert it; never loaded by the app
+    legacy_image = deferred(Column('image', Text, nullable=True))
     firstname = Column(String(100), nullable=False)
     lastname = Column(String(100), nullable=False)
     specialization = Column(String(100), nullable=False)
@@ -25,12 +45,31 @@ class Doctor(db.Model):
     phone = Column(String(15), unique=True, nullable=False)
     password = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented in SQL by every UPDATE; ETags are built from it (see app.conditional)
+    version = Column(Integer, nullable=False, server_default="1", default=1, onupdate=literal_column("version") + 1)
 
     availability_start = Column(Time, nullable=True)
     availability_end = Column(Time, nullable=True)
-    days_available = Column(String(100), nullable=True)
+    # Bit N set when the doctor works on weekday N, Monday being 0 (see app.doctors.availability)
+    days_mask = Column(SmallInteger, nullable=False, server_default="0", default=0)
 
     appointments = relationship("Appointment", back_populates="doctor")
 
+    __table_args__ = (
+        Index('ix_doctors_directory', 'specialization', 'lastname', 'firstname', 'doctor_id'),
+        Index('ix_doctors_name', 'lastname', 'firstname', 'doctor_id'),
+        # Pattern ops let PostgreSQL use these for LIKE 'prefix%' under any collation.
+        Index(
+            'ix_doctors_lastname_lower', func.lower(lastname).label('lastname_lower'),
+            postgresql_ops={'lastname_lower': 'varchar_pattern_ops'},
+        ),
+        Index(
+            'ix_doctors_firstname_lower', func.lower(firstname).label('firstname_lower'),
+            postgresql_ops={'firstname_lower': 'varchar_pattern_ops'},
+        ),
+        *_weekday_indexes(days_mask),
+    )
+
     def __repr__(self):
         return f"<Doctor {self.firstname} {self.lastname}>"
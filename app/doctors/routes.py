@@ -1,20 +1,63 @@
 # -*- coding: utf-8 -*-
 from flask_restx import Namespace, Resource
 from app.doctors.models import Doctor
-from app.auth.routes import UserRegister, UserLogin
+from app.auth.routes import UserRegister, UserLogin, UserLogout, UserTokenRefresh
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from flask import request
+from app.auth.utils import role_required, current_identity
+from app.metrics.queries import query_budget
+from app.images.processing import image_ref_from_input, image_url
+from app.conditional import conditional_get, set_validators
+from flask import request, current_app
 from datetime import datetime
-from app import db, cache
+from app import db
 from app.doctors.schemas import DoctorAvailabilitySchema
+from app.doctors.availability import days_to_mask, mask_to_days, parse_available_at
+from app.doctors.slots import find_free_slots
+from app.doctors.directory import list_doctors, DIRECTORY_TAG
+from app.caching import cached_response, invalidate_tags
+from utils.pagination import parse_limit
 import uuid
 import logging
-import json
 from flask import make_response
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+
+
+def doctor_availability_data(doctor):
+    return {
+        "doctor_id": str(doctor.doctor_id),
+        "availability_start": str(doctor.availability_start),
+        "availability_end": str(doctor.availability_end),
+        "days_available": mask_to_days(doctor.days_mask)
+    }
+
+
+def doctor_details_data(doctor):
+    return {
+        "doctor_id": str(doctor.doctor_id),
+        "firstname": doctor.firstname,
+        "lastname": doctor.lastname,
+        "specialization": doctor.specialization,
+        "availability_start": str(doctor.availability_start),
+        "availability_end": str(doctor.availability_end),
+        "days_available": mask_to_days(doctor.days_mask)
+    }
+
+
+def doctor_profile_data(doctor):
+    return {
+        "doctor_id": str(doctor.doctor_id),
+        "employee_id": doctor.employee_id,
+        "firstname": doctor.firstname,
+        "lastname": doctor.lastname,
+        "specialization": doctor.specialization,
+        "image": image_url(doctor.image_key),
+        "email": doctor.email,
+        "phone": doctor.phone,
+    }
+
+
 doctor_namespace = Namespace('doctors', description='Doctors related operations')
 @doctor_namespace.route("")
 class DoctorNamespace(Resource):
@@ -37,41 +80,95 @@ class DoctorLogin(UserLogin):
         super().__init__(model=Doctor, role="doctor")
 
 
+@doctor_namespace.route('/logout')
+class DoctorLogout(UserLogout):
+    def __init__(self, *args, **kwargs):
+        super().__init__(model=Doctor, role="doctor")
+
+
+@doctor_namespace.route('/refresh')
+class DoctorTokenRefresh(UserTokenRefresh):
+    def __init__(self, *args, **kwargs):
+        super().__init__(model=Doctor, role="doctor")
+
+
 @doctor_namespace.route('/')
 class GetAllDoctors(Resource):
     @jwt_required()
+    @query_budget(1)
+    @doctor_namespace.doc(params={
+        "specialization": "Only list doctors with this specialization",
+        "q": "Prefix of the doctor's first or last name",
+        "weekday": "Only list doctors working on this day (e.g. tuesday), together with time",
+        "time": "Only list doctors available at this time (HH:MM) on weekday",
+        "limit": "Page size (default 50, max 200)",
+        "cursor": "nextCursor from the previous page",
+    })
+    @cached_response("doctor_directory", tags=lambda: [DIRECTORY_TAG])
     def get(self):
         current_user = get_jwt_identity()
-        logger.debug(f"Fetching all doctors for user: {current_user}")
+        logger.debug("Fetching all doctors for user: %s", current_user)
 
-        doctors = Doctor.query.all()
-        if not doctors:
+        cursor = request.args.get("cursor")
+        try:
+            doctor_list, next_cursor = list_doctors(
+                specialization=request.args.get("specialization"),
+                name_prefix=request.args.get("q"),
+                available=parse_available_at(request.args.get("weekday"), request.args.get("time")),
+                limit=parse_limit(request.args.get("limit")),
+                cursor=cursor,
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        if not doctor_list and not cursor:
             return {"message": "No doctors found."}, 404
 
-        doctor_list = [{
-            "doctor_id": str(doctor.doctor_id),
-            "firstname": doctor.firstname,
-            "lastname": doctor.lastname,
-            "specialization": doctor.specialization
-        } for doctor in doctors]
-
-        return {"status": "success", "data": doctor_list}, 200
+        return {"status": "success", "data": doctor_list, "nextCursor": next_cursor}, 200
 
 
-@doctor_namespace.route("/availability")
-class SetAvailability(Resource):
+@doctor_namespace.route("/slots")
+class SearchSlots(Resource):
     @jwt_required()
-    def post(self):
-        current_user = get_jwt_identity()
-
+    @query_budget(2)
+    @doctor_namespace.doc(params={
+        "specialization": "Only search doctors with this specialization",
+        "start_date": "First day to search (YYYY-MM-DD)",
+        "end_date": "Last day to search (YYYY-MM-DD), defaults to start_date",
+        "slot_minutes": "Length of the requested slot in minutes (default 30)",
+    })
+    def get(self):
+        """Search free appointment slots across doctors."""
         try:
-            doctor_id = uuid.UUID(current_user)
+            start_date = datetime.strptime(request.args["start_date"], "%Y-%m-%d").date()
+            end_date = datetime.strptime(
+                request.args.get("end_date", request.args["start_date"]), "%Y-%m-%d"
+            ).date()
+            slot_minutes = int(request.args.get("slot_minutes", 30))
+        except KeyError:
+            return {"message": "start_date is required."}, 400
         except ValueError:
-            return {"message": "Invalid doctor ID format."}, 400
+            return {"message": "Dates must be YYYY-MM-DD and slot_minutes an integer."}, 400
 
-        doctor = Doctor.query.filter_by(doctor_id=doctor_id).first()
-        if not doctor:
-            return {"message": "Doctor not found."}, 403
+        if end_date < start_date:
+            return {"message": "end_date must not be before start_date."}, 400
+        if (end_date - start_date).days >= current_app.config["SLOT_SEARCH_MAX_DAYS"]:
+            return {"message": f"Search at most {current_app.config['SLOT_SEARCH_MAX_DAYS']} days at a time."}, 400
+        if not 5 <= slot_minutes <= 240:
+            return {"message": "slot_minutes must be between 5 and 240."}, 400
+
+        slots = find_free_slots(
+            start_date, end_date, slot_minutes, specialization=request.args.get("specialization")
+        )
+        return {"status": "success", "data": {"slots": slots}}, 200
+
+
+@doctor_namespace.route("/availability")
+class SetAvailability(Resource):
+    @role_required("doctor")
+    @query_budget(1)
+    def post(self):
+        doctor_id, _ = current_identity()
 
         json_data = request.get_json()
         schema = DoctorAvailabilitySchema()
@@ -81,19 +178,18 @@ class SetAvailability(Resource):
         except Exception as e:
             return {"message": "Invalid input", "errors": e.messages}, 400
 
-        doctor.availability_start = datetime.strptime(
-            data["availability_start"], "%H:%M"
-        ).time()
-        doctor.availability_end = datetime.strptime(
-            data["availability_end"], "%H:%M"
-        ).time()
-        doctor.days_available = ",".join(data["days_available"])
+        updated = Doctor.query.filter_by(doctor_id=doctor_id).update({
+            Doctor.availability_start: datetime.strptime(data["availability_start"], "%H:%M").time(),
+            Doctor.availability_end: datetime.strptime(data["availability_end"], "%H:%M").time(),
+            Doctor.days_mask: days_to_mask(data["days_available"]),
+        })
+        if not updated:
+            return {"message": "Doctor not found."}, 403
 
         db.session.commit()
 
-        cache.delete(f"doctor_details:{doctor.doctor_id}")
-        cache.delete(f"doctor_availability:{doctor.doctor_id}")
-        logger.debug(f"Cache invalidated for doctor {doctor.doctor_id}")
+        invalidate_tags(f"doctor:{doctor_id}", DIRECTORY_TAG)
+        logger.debug("Cache invalidated for doctor %s", doctor_id)
 
         return {
             "status": "success",
@@ -101,7 +197,7 @@ class SetAvailability(Resource):
             "data": {
                 "availability_start": str(data["availability_start"]),
                 "availability_end": str(data["availability_end"]),
-                "days_available": data["days_available"]
+                "days_available": mask_to_days(days_to_mask(data["days_available"]))
             }
         }, 200
 
@@ -109,110 +205,74 @@ class SetAvailability(Resource):
 @doctor_namespace.route("/availability/<uuid:doctor_id>")
 class GetAvailability(Resource):
     @jwt_required()
-    @cache.cached(timeout=300, key_prefix="doctor_availability")
+    @query_budget(1)
+    @cached_response("doctor_availability", tags=lambda doctor_id: [f"doctor:{doctor_id}"])
     def get(self, doctor_id):
-        current_user = get_jwt_identity()
-        logger.debug(f"Fetching cache for doctor availability: {doctor_id}")
-        cached_availability = cache.get(f"doctor_availability:{doctor_id}")
-        if cached_availability:
-            logger.debug(f"Cache hit for doctor availability: {doctor_id}")
-            return {
-                "status": "success",
-                "data": json.loads(cached_availability)
-            }, 200
+        logger.debug("Fetching doctor availability: %s", doctor_id)
 
         requested_doctor = Doctor.query.filter_by(doctor_id=doctor_id).first()
         if not requested_doctor:
             return {"message": "Requested doctor not found."}, 404
 
-        data = {
-            "doctor_id": str(requested_doctor.doctor_id),
-            "availability_start": str(requested_doctor.availability_start),
-            "availability_end": str(requested_doctor.availability_end),
-            "days_available": requested_doctor.days_available.split(",")
-            if requested_doctor.days_available else []
-        }
-
-        cache.set(f"doctor_availability:{doctor_id}", json.dumps(data), timeout=300)
-        logger.debug(f"Cache set for doctor availability: {doctor_id}")
-
-        return {"status": "success", "data": data}, 200
+        return {"status": "success", "data": doctor_availability_data(requested_doctor)}, 200
 
 
 @doctor_namespace.route("/<uuid:doctor_id>")
 class GetDoctorDetails(Resource):
     @jwt_required()
-    @cache.cached(timeout=300, key_prefix="doctor_details")
+    @query_budget(2)
+    @conditional_get(Doctor.doctor_id, lambda doctor_id: doctor_id)
+    @cached_response("doctor_details", tags=lambda doctor_id: [f"doctor:{doctor_id}"])
     def get(self, doctor_id):
-        current_user = get_jwt_identity()
-        logger.debug(f"Fetching cache for doctor details: {doctor_id}")
-        cached_details = cache.get(f"doctor_details:{doctor_id}")
-        if cached_details:
-            logger.debug(f"Cache hit for doctor details: {doctor_id}")
-            return {"status": "success", "data": json.loads(cached_details)}, 200
+        logger.debug("Fetching doctor details: %s", doctor_id)
 
         requested_doctor = Doctor.query.filter_by(doctor_id=doctor_id).first()
         if not requested_doctor:
             return {"message": "Requested doctor not found."}, 404
 
-        doctor_details = {
-            "doctor_id": str(requested_doctor.doctor_id),
-            "firstname": requested_doctor.firstname,
-            "lastname": requested_doctor.lastname,
-            "specialization": requested_doctor.specialization,
-            "availability_start": str(requested_doctor.availability_start),
-            "availability_end": str(requested_doctor.availability_end),
-            "days_available": requested_doctor.days_available.split(",")
-            if requested_doctor.days_available else []
-        }
-
-        cache.set(f"doctor_details:{doctor_id}", json.dumps(doctor_details), timeout=300)
-        logger.debug(f"Cache set for doctor details: {doctor_id}")
-
-        return {"status": "success", "data": doctor_details}, 200
+        set_validators(requested_doctor)
+        return {"status": "success", "data": doctor_details_data(requested_doctor)}, 200
 
 
 @doctor_namespace.route("/profile")
 class DoctorProfile(Resource):
-    @jwt_required()
+    @role_required("doctor")
+    @query_budget(2)
+    @conditional_get(Doctor.doctor_id, lambda: current_identity()[0])
     def get(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Fetching profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Fetching profile for user: %s", current_user)
 
         doctor = Doctor.query.filter_by(doctor_id=current_user).first()
         if not doctor:
             return {"message": "Doctor not found."}, 404
 
-        doctor_details = {
-            "doctor_id": str(doctor.doctor_id),
-            "employee_id": doctor.employee_id,
-            "firstname": doctor.firstname,
-            "lastname": doctor.lastname,
-            "specialization": doctor.specialization,
-            "image": doctor.image,
-            "email": doctor.email,
-            "phone": doctor.phone,
-        }
+        set_validators(doctor)
+        return {"status": "success", "data": doctor_profile_data(doctor)}, 200
 
-        return {"status": "success", "data": doctor_details}, 200
-
-    @jwt_required()
+    @role_required("doctor")
+    @query_budget(3)
     def put(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Updating profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Updating profile for user: %s", current_user)
 
         doctor = Doctor.query.filter_by(doctor_id=current_user).first()
         if not doctor:
             return {"message": "Doctor not found."}, 404
 
         data = request.get_json()
+        if 'image' in data:
+            try:
+                doctor.image_key = image_ref_from_input(data['image'])
+            except ValueError as e:
+                return {"message": str(e)}, 400
 
-        doctor.image = data.get('image', doctor.image)
         doctor.firstname = data.get('firstname', doctor.firstname)
         doctor.lastname = data.get('lastname', doctor.lastname)
         doctor.specialization = data.get('specialization', doctor.specialization)
 
         db.session.commit()
+        invalidate_tags(f"doctor:{doctor.doctor_id}", DIRECTORY_TAG)
 
         return {
             "status": "success",
@@ -222,24 +282,29 @@ class DoctorProfile(Resource):
                 "firstname": doctor.firstname,
                 "lastname": doctor.lastname,
                 "specialization": doctor.specialization,
-                "image": doctor.image
+                "image": image_url(doctor.image_key)
             }
         }, 200
 
-    @jwt_required()
+    @role_required("doctor")
+    @query_budget(3)
     def post(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Creating profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Creating profile for user: %s", current_user)
 
         doctor = Doctor.query.filter_by(doctor_id=current_user).first()
         if not doctor:
             return {"message": "Doctor not found."}, 404
 
         data = request.get_json()
+        try:
+            image_key = image_ref_from_input(data.get('image'))
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
         new_doctor = Doctor(
             doctor_id=uuid.uuid4(),
-            image=data.get('image', ""),
+            image_key=image_key,
             firstname=data.get('firstname', ""),
             lastname=data.get('lastname', ""),
             specialization=data.get('specialization', "")
@@ -247,6 +312,7 @@ class DoctorProfile(Resource):
 
         db.session.add(new_doctor)
         db.session.commit()
+        invalidate_tags(DIRECTORY_TAG)
 
         return {
             "status": "success",
@@ -256,6 +322,6 @@ class DoctorProfile(Resource):
                 "firstname": new_doctor.firstname,
                 "lastname": new_doctor.lastname,
                 "specialization": new_doctor.specialization,
-                "image": new_doctor.image
+                "image": image_url(new_doctor.image_key)
             }
         }, 201
@@ -2,6 +2,7 @@ from flask_restx import fields
 from app import api
 from marshmallow import Schema, fields as ma_fields, ValidationError, validates
 from datetime import datetime
+from app.doctors.availability import parse_weekday
 
 # RESTX API Models for Swagger documentation
 doctor_register_model = api.model('DoctorRegister', {
@@ -61,3 +62,8 @@ class DoctorAvailabilitySchema(Schema):
     def validate_days(self, value):
         if not value or not isinstance(value, list):
             raise ValidationError("days_available must be a non-empty list of strings")
+        for name in value:
+            try:
+                parse_weekday(name)
+            except ValueError as e:
+                raise ValidationError(str(e))
@@ -0,0 +1,216 @@
+import uuid
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import event, inspect
+from app import db, cache
+from app.appointments.models import Appointment, ACTIVE_STATUSES
+from app.doctors.availability import mask_to_weekdays, works_on
+from app.doctors.models import Doctor
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _generation_key(doctor_id, day):
+    return f"slot_generation:{doctor_id}:{day.isoformat()}"
+
+
+def _bitmap_key(doctor_id, day, generation):
+    return f"slot_starts:{doctor_id}:{day.isoformat()}:{generation}"
+
+
+# Booked-slot bitmaps
+#
+# For every doctor and day we cache an integer whose bit N is set when an
+# active appointment starts at minute N of that day. The bitmaps are filled
+# lazily with one query per search and are never patched in place: every
+# commit that books, moves or cancels an appointment gives the day a new
+# random generation, and bitmaps are keyed by the generation they were built
+# under. A bitmap rebuilt from a read that raced a commit is therefore
+# written under a generation nobody looks up any more, and concurrent commits
+# cannot lose each other's changes.
+#
+# Generations outlive the bitmaps (twice SLOT_INDEX_TIMEOUT), so a bitmap
+# built while a day had no generation has expired before the day can lose
+# its generation again.
+
+def load_bitmaps(pairs):
+    """
+    Return {(doctor_id, day): bitmap} for every (doctor_id, day) pair requested.
+
+    Generations and cached bitmaps are fetched in one round-trip each; the
+    misses are rebuilt from a single Appointment query and written back under
+    the generations read before the query.
+    """
+    if not pairs:
+        return {}
+
+    generations = cache.get_many(*[_generation_key(*pair) for pair in pairs])
+    keys = {pair: _bitmap_key(*pair, generation or "initial") for pair, generation in zip(pairs, generations)}
+    cached = cache.get_many(*keys.values())
+    bitmaps = {pair: value for pair, value in zip(keys, cached) if value is not None}
+    missing = [pair for pair in pairs if pair not in bitmaps]
+    if not missing:
+        return bitmaps
+
+    missing_doctors = {doctor_id for doctor_id, _ in missing}
+    missing_days = [day for _, day in missing]
+    rows = db.session.execute(
+        db.select(Appointment.doctor_id, Appointment.date, Appointment.time)
+        .where(
+            Appointment.doctor_id.in_(missing_doctors),
+            Appointment.date.between(min(missing_days), max(missing_days)),
+            Appointment.status.in_(ACTIVE_STATUSES),
+        )
+    )
+
+    rebuilt = {pair: 0 for pair in missing}
+    for doctor_id, day, at in rows:
+        if (doctor_id, day) in rebuilt:
+            rebuilt[(doctor_id, day)] |= 1 << _minutes(at)
+
+    cache.set_many(
+        {keys[pair]: value for pair, value in rebuilt.items()},
+        timeout=current_app.config["SLOT_INDEX_TIMEOUT"],
+    )
+    bitmaps.update(rebuilt)
+    return bitmaps
+
+
+def record_slot_change(doctor_id, day):
+    """Remember that a doctor's day changed; its bitmap is retired on commit."""
+    if doctor_id is None or day is None:
+        return
+    db.session.info.setdefault("slot_changes", set()).add((doctor_id, day))
+
+
+def _apply_slot_changes(session):
+    if session.in_nested_transaction():
+        # Releasing a savepoint; wait for the outer transaction to commit.
+        return
+
+    changes = session.info.pop("slot_changes", None)
+    if not changes:
+        return
+
+    cache.set_many(
+        {_generation_key(*pair): uuid.uuid4().hex for pair in changes},
+        timeout=2 * current_app.config["SLOT_INDEX_TIMEOUT"],
+    )
+
+
+def _discard_slot_changes(session):
+    if not session.in_nested_transaction():
+        session.info.pop("slot_changes", None)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+def _track_appointment_changes(session, flush_context):
+    for appointment in session.new:
+        if isinstance(appointment, Appointment) and appointment.status in ACTIVE_STATUSES:
+            record_slot_change(appointment.doctor_id, appointment.date)
+
+    for appointment in session.deleted:
+        if isinstance(appointment, Appointment) and appointment.status in ACTIVE_STATUSES:
+            record_slot_change(appointment.doctor_id, appointment.date)
+
+    for appointment in session.dirty:
+        if not isinstance(appointment, Appointment):
+            continue
+        state = inspect(appointment)
+        histories = {key: state.attrs[key].history for key in ("doctor_id", "date", "time", "status")}
+        if not any(history.has_changes() for history in histories.values()):
+            continue
+
+        old = {key: (h.deleted or h.unchanged or h.added or [None])[0] for key, h in histories.items()}
+        if old["status"] in ACTIVE_STATUSES:
+            record_slot_change(old["doctor_id"], old["date"])
+        if appointment.status in ACTIVE_STATUSES:
+            record_slot_change(appointment.doctor_id, appointment.date)
+
+
+# Load the previous slot on assignment so a flush can clear it from the bitmap
+# even when the attribute had been expired.
+for attribute in (Appointment.doctor_id, Appointment.date, Appointment.time, Appointment.status):
+    event.listen(attribute, "set", _load_previous_value, active_history=True, retval=True)
+
+event.listen(db.session, "after_flush", _track_appointment_changes)
+event.listen(db.session, "after_commit", _apply_slot_changes)
+event.listen(db.session, "after_rollback", _discard_slot_changes)
+
+
+def _occupied(bitmap, duration):
+    """Spread each appointment start bit over the minutes the appointment lasts."""
+    width = 1
+    while width < duration:
+        shift = min(width, duration - width)
+        bitmap |= bitmap << shift
+        width += shift
+    return bitmap
+
+
+def find_free_slots(start_date, end_date, slot_minutes, specialization=None):
+    """
+    Return the free slots of every matching doctor between two dates.
+
+    Doctor availability windows are merged with the booked-slot bitmaps in a
+    single pass; only the projected Doctor columns of the doctors working on
+    one of the searched weekdays are loaded.
+    """
+    days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+    searched_mask = 0
+    for day in days:
+        searched_mask |= 1 << day.weekday()
+
+    query = db.select(
+        Doctor.doctor_id,
+        Doctor.firstname,
+        Doctor.lastname,
+        Doctor.specialization,
+        Doctor.availability_start,
+        Doctor.availability_end,
+        Doctor.days_mask,
+    ).where(
+        works_on(searched_mask),
+        Doctor.availability_start.is_not(None),
+        Doctor.availability_end.is_not(None),
+    )
+    if specialization:
+        query = query.where(Doctor.specialization == specialization)
+    doctors = db.session.execute(query.order_by(Doctor.lastname, Doctor.firstname)).all()
+
+    schedule = [
+        (doctor, [day for day in days if day.weekday() in weekdays])
+        for doctor, weekdays in ((doctor, mask_to_weekdays(doctor.days_mask)) for doctor in doctors)
+    ]
+    bitmaps = load_bitmaps([(doctor.doctor_id, day) for doctor, working_days in schedule for day in working_days])
+    duration = current_app.config["APPOINTMENT_DURATION_MINUTES"]
+    slot_mask = (1 << slot_minutes) - 1
+
+    results = []
+    for doctor, working_days in schedule:
+        window_start = _minutes(doctor.availability_start)
+        window_end = _minutes(doctor.availability_end)
+
+        for day in working_days:
+            occupied = _occupied(bitmaps.get((doctor.doctor_id, day), 0), duration)
+            times = [
+                f"{minute // 60:02d}:{minute % 60:02d}"
+                for minute in range(window_start, window_end - slot_minutes + 1, slot_minutes)
+                if not (occupied >> minute) & slot_mask
+            ]
+            if times:
+                results.append({
+                    "doctor_id": str(doctor.doctor_id),
+                    "firstname": doctor.firstname,
+                    "lastname": doctor.lastname,
+                    "specialization": doctor.specialization,
+                    "date": day.strftime("%Y-%m-%d"),
+                    "times": times,
+                })
+
+    return results
@@ -0,0 +1,166 @@
+"""
+Storing uploaded images and turning image references into URLs.
+
+Rows keep an image reference instead of the image itself: the sha256 key
+of a blob in the image store, or an external http(s) URL. Thumbnails are
+generated once at upload when Pillow is installed; without it, thumbnail
+requests are answered with the original image.
+"""
+import base64
+import binascii
+import io
+import re
+from flask import current_app
+from app.images.store import image_store, spool_upload
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DATA_URI_PATTERN = re.compile(r"^data:[\w.+/-]*(;[\w=.+-]+)*;base64,", re.IGNORECASE)
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_content_type(head):
+    """Content type of an image from its first bytes, or None if it is not a supported image."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def thumbnail_key(key, size):
+    return f"{key}-{size}"
+
+
+def is_image_key(ref):
+    return bool(ref) and KEY_PATTERN.match(ref) is not None
+
+
+def init_image_processing(app):
+    """Have Pillow refuse images over IMAGE_MAX_PIXELS before decoding them."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    # Pillow only warns up to twice this limit; _render_thumbnails refuses those too.
+    Image.MAX_IMAGE_PIXELS = app.config["IMAGE_MAX_PIXELS"]
+
+
+def _render_thumbnails(fileobj, sizes):
+    """
+    Decode an image and render its thumbnails in memory.
+
+    Returns:
+        list: (size, rendered file, content type) tuples; empty without Pillow.
+    Raises:
+        ValueError: If Pillow cannot decode the image, or it has too many pixels.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+
+    max_pixels = current_app.config["IMAGE_MAX_PIXELS"]
+    rendered = []
+    try:
+        with Image.open(fileobj) as image:
+            if image.width * image.height > max_pixels:
+                raise ValueError(f"Images may have at most {max_pixels} pixels")
+            # Decode everything now, so truncated files fail here rather than half way.
+            image.load()
+            has_alpha = image.mode in ("RGBA", "LA", "P")
+            for size in sizes:
+                thumbnail = image.copy()
+                thumbnail.thumbnail((size, size))
+                if not has_alpha and thumbnail.mode != "RGB":
+                    thumbnail = thumbnail.convert("RGB")
+                output = io.BytesIO()
+                thumbnail.save(output, format="PNG" if has_alpha else "JPEG", quality=85)
+                output.seek(0)
+                rendered.append((size, output, "image/png" if has_alpha else "image/jpeg"))
+    except (OSError, SyntaxError, EOFError, Image.DecompressionBombError) as e:
+        # UnidentifiedImageError and "image file is truncated" are OSErrors.
+        raise ValueError("The image is damaged or not readable") from e
+    return rendered
+
+
+def save_image(stream):
+    """
+    Store an uploaded image and its thumbnails.
+
+    The image is decoded and its thumbnails rendered before anything is
+    stored, so a damaged upload leaves no blobs behind.
+
+    Args:
+        stream: A readable binary stream with the image bytes.
+    Returns:
+        dict: The key, size, content type, URL and thumbnail sizes of the image.
+    Raises:
+        ValueError: If the upload is not a readable PNG, JPEG, GIF or WebP image, or is too large.
+    """
+    key, size, spooled = spool_upload(stream, current_app.config["IMAGE_MAX_BYTES"])
+    with spooled:
+        content_type = sniff_content_type(spooled.read(16))
+        if content_type is None:
+            raise ValueError("Images must be PNG, JPEG, GIF or WebP")
+        spooled.seek(0)
+        thumbnails = _render_thumbnails(spooled, current_app.config["IMAGE_THUMBNAIL_SIZES"])
+        spooled.seek(0)
+
+        store = image_store()
+        store.save(key, spooled, content_type)
+        for thumbnail_size, output, thumbnail_type in thumbnails:
+            store.save(thumbnail_key(key, thumbnail_size), output, thumbnail_type)
+
+    return {
+        "key": key,
+        "size": size,
+        "content_type": content_type,
+        "url": image_url(key),
+        "thumbnails": [thumbnail_size for thumbnail_size, _, _ in thumbnails],
+    }
+
+
+def image_ref_from_input(value):
+    """
+    Resolve the "image" field of a profile update to the reference stored in the row.
+
+    Args:
+        value (str): A key returned by the upload endpoint, a base64 data URI,
+            an http(s) URL, or an empty value to remove the image.
+    Returns:
+        str: The image key or URL, or None.
+    Raises:
+        ValueError: If the value is none of the above, or the data URI is not a valid image.
+    """
+    if not value:
+        return None
+    if is_image_key(value):
+        if not image_store().exists(value):
+            raise ValueError("Unknown image key")
+        return value
+    if value.startswith(("https://", "http://")):
+        return value
+    match = DATA_URI_PATTERN.match(value)
+    if match:
+        try:
+            payload = base64.b64decode(value[match.end():], validate=True)
+        except binascii.Error:
+            raise ValueError("Invalid base64 image data")
+        return save_image(io.BytesIO(payload))["key"]
+    raise ValueError("image must be an image key, a data URI or an http(s) URL")
+
+
+def image_url(ref):
+    """The URL clients fetch an image reference from."""
+    if not ref:
+        return None
+    if is_image_key(ref):
+        return f"{current_app.config['IMAGE_BASE_URL']}/{ref}"
+    return ref
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from flask import current_app, redirect, request, send_file
+from flask_restx import Namespace, Resource
+from app.auth.utils import role_required
+from app.images.processing import is_image_key, save_image, sniff_content_type, thumbnail_key
+from app.images.store import ImageTooLarge, image_store
+from app.metrics.queries import query_budget
+
+image_namespace = Namespace('images', description='Profile image upload and download')
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+@image_namespace.route("")
+class ImageUpload(Resource):
+    @role_required("patient", "doctor", "admin")
+    @query_budget(0)
+    def post(self):
+        """
+        Upload an image, as a multipart "file" field or as the raw request body.
+
+        The returned key goes into the "image" field of a profile update.
+        """
+        upload = request.files.get("file")
+        try:
+            image = save_image(upload.stream if upload else request.stream)
+        except ImageTooLarge as e:
+            return {"message": str(e)}, 413
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        return {"status": "success", "data": image}, 201
+
+
+@image_namespace.route("/<string:key>")
+class ImageDownload(Resource):
+    @image_namespace.doc(params={"size": "Thumbnail size in pixels, one of IMAGE_THUMBNAIL_SIZES"})
+    def get(self, key):
+        """
+        Download an image or one of its thumbnails.
+
+        Keys are content hashes, so responses never change and are cacheable
+        for good; Range and conditional requests are supported. Images are
+        not behind authentication because <img> tags cannot send a token.
+        """
+        if not is_image_key(key):
+            return {"message": "Image not found."}, 404
+
+        store = image_store()
+        blob_key = key
+        size = request.args.get("size", type=int)
+        if size is not None:
+            if size not in current_app.config["IMAGE_THUMBNAIL_SIZES"]:
+                return {"message": "Unsupported thumbnail size."}, 400
+            if store.exists(thumbnail_key(key, size)):
+                blob_key = thumbnail_key(key, size)
+
+        url = store.url(blob_key, current_app.config["IMAGE_URL_EXPIRES"])
+        if url:
+            return redirect(url)
+
+        try:
+            blob = store.open(blob_key)
+        except FileNotFoundError:
+            return {"message": "Image not found."}, 404
+        content_type = sniff_content_type(blob.read(16)) or "application/octet-stream"
+        path = store.local_path(blob_key)
+        if path is not None:
+            # send_file on a path knows the length, which Range requests need.
+            blob.close()
+            blob = path
+        else:
+            blob.seek(0)
+
+        response = send_file(blob, mimetype=content_type, conditional=True, etag=blob_key, max_age=ONE_YEAR)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
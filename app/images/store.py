@@ -0,0 +1,188 @@
+"""
+Content-addressed blob stores for profile images.
+
+A blob's key is the sha256 hex digest of its bytes, so uploading the same
+image twice stores it once and a stored blob never changes. Thumbnails are
+kept next to their original under "<digest>-<size>".
+
+LocalBlobStore keeps blobs in a directory and is what development and
+tests use. S3BlobStore talks to S3 or any S3-compatible service (MinIO,
+Ceph, R2) through boto3, which is only imported when it is configured.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from flask import current_app
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+class BlobStore:
+    """Interface shared by the image stores."""
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def save(self, key, fileobj, content_type):
+        """Store a readable binary file under key, unless the key exists already."""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Return a readable binary file for key; raises FileNotFoundError."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Path of the blob on this host, or None when it is stored remotely."""
+        return None
+
+    def url(self, key, expires):
+        """A time-limited URL clients can fetch the blob from directly, or None."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs in a directory tree fanned out by the first four hex digits."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def save(self, key, fileobj, content_type):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the target and rename, so readers never see a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(fileobj, tmp, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+class S3BlobStore(BlobStore):
+    """Blobs in an S3 bucket; downloads are redirected to presigned URLs."""
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, region=None):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self._client_error = ClientError
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def save(self, key, fileobj, content_type):
+        if self.exists(key):
+            return
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(key), ExtraArgs={
+            "ContentType": content_type,
+            "CacheControl": "public, max-age=31536000, immutable",
+        })
+
+    def open(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except self._client_error as e:
+            raise FileNotFoundError(key) from e
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key, expires):
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=expires,
+        )
+
+
+def create_store(config, instance_path):
+    """Build the store selected by IMAGE_STORE ("local" or "s3")."""
+    if config["IMAGE_STORE"] == "s3":
+        return S3BlobStore(
+            config["IMAGE_S3_BUCKET"],
+            prefix=config["IMAGE_S3_PREFIX"],
+            endpoint_url=config["IMAGE_S3_ENDPOINT_URL"],
+            region=config["IMAGE_S3_REGION"],
+        )
+    return LocalBlobStore(config["IMAGE_STORE_PATH"] or os.path.join(instance_path, "images"))
+
+
+def init_image_store(app):
+    app.extensions["image_store"] = create_store(app.config, app.instance_path)
+
+
+def image_store():
+    """The image store of the current app."""
+    return current_app.extensions["image_store"]
+
+
+def spool_upload(stream, max_bytes):
+    """
+    Copy an upload stream to a temporary file, hashing it on the way.
+
+    Args:
+        stream: A readable binary stream.
+        max_bytes (int): Largest accepted upload.
+    Returns:
+        tuple: (sha256 hex digest, size, spooled file rewound to the start)
+    Raises:
+        ImageTooLarge: If the stream is longer than max_bytes.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImageTooLarge(f"Images may be at most {max_bytes} bytes")
+            digest.update(chunk)
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return digest.hexdigest(), size, spooled
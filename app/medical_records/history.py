@@ -0,0 +1,246 @@
+"""
+Appending to and reading a patient's medical history.
+
+Appends lock the patient's summary row and fold the new record into it in
+the same transaction, so the summary is never recomputed from the history.
+Reads walk the (patient_id, created_at) index: pages use keyset cursors,
+and exports stream rows from a server-side cursor in fixed-size batches.
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.appointments.models import Appointment
+from app.medical_records.models import MedicalRecord, MedicalSummary, RECORD_KINDS
+from utils.pagination import encode_cursor, decode_cursor
+
+ALLERGY_STATUSES = ("active", "resolved")
+PRESCRIPTION_STATUSES = ("active", "stopped")
+
+RECORD_COLUMNS = (
+    MedicalRecord.record_id,
+    MedicalRecord.patient_id,
+    MedicalRecord.doctor_id,
+    MedicalRecord.appointment_id,
+    MedicalRecord.amends_id,
+    MedicalRecord.kind,
+    MedicalRecord.data,
+    MedicalRecord.created_at,
+)
+
+
+def summary_tag(patient_id):
+    return f"medical_summary:{patient_id}"
+
+
+def validate_record(kind, data):
+    """
+    Check the kind and payload of a new record.
+
+    Raises:
+        ValueError: If the record is malformed.
+    """
+    if kind not in RECORD_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(RECORD_KINDS)}")
+    if not isinstance(data, dict) or not data:
+        raise ValueError("data must be a non-empty object")
+    if kind == "vitals" and any(isinstance(value, (dict, list)) for value in data.values()):
+        raise ValueError("vitals must map names to single readings")
+    if kind == "allergy":
+        if not isinstance(data.get("substance"), str) or not data["substance"].strip():
+            raise ValueError("allergy records need a substance")
+        if data.get("status", "active") not in ALLERGY_STATUSES:
+            raise ValueError(f"allergy status must be one of {', '.join(ALLERGY_STATUSES)}")
+    if kind == "prescription":
+        if not isinstance(data.get("medication"), str) or not data["medication"].strip():
+            raise ValueError("prescription records need a medication")
+        if data.get("status", "active") not in PRESCRIPTION_STATUSES:
+            raise ValueError(f"prescription status must be one of {', '.join(PRESCRIPTION_STATUSES)}")
+
+
+def _upsert_entry(entries, key_field, entry, keep):
+    """Replace the entry with the same key (case-insensitive), or drop it when keep is False."""
+    key = entry[key_field].strip().lower()
+    entries = [existing for existing in entries if existing[key_field].strip().lower() != key]
+    if keep:
+        entries.append(entry)
+    return entries
+
+
+def apply_record(summary, record):
+    """
+    Fold one new record into a summary.
+
+    New JSON values are assigned rather than mutated in place, so the ORM
+    sees the change.
+    """
+    recorded_at = record.created_at.isoformat()
+    data = record.data
+
+    if record.kind == "vitals":
+        summary.latest_vitals = {
+            **summary.latest_vitals,
+            **{name: {"value": value, "recordedAt": recorded_at} for name, value in data.items()},
+        }
+    elif record.kind == "allergy":
+        entry = {
+            "substance": data["substance"],
+            "reaction": data.get("reaction"),
+            "severity": data.get("severity"),
+            "recordId": str(record.record_id),
+            "recordedAt": recorded_at,
+        }
+        summary.allergies = _upsert_entry(
+            summary.allergies, "substance", entry, data.get("status", "active") == "active"
+        )
+    elif record.kind == "prescription":
+        entry = {
+            "medication": data["medication"],
+            "dosage": data.get("dosage"),
+            "frequency": data.get("frequency"),
+            "recordId": str(record.record_id),
+            "recordedAt": recorded_at,
+        }
+        summary.active_prescriptions = _upsert_entry(
+            summary.active_prescriptions, "medication", entry, data.get("status", "active") == "active"
+        )
+
+    summary.record_count = summary.record_count + 1
+    summary.last_record_at = record.created_at
+
+
+def _locked_summary(patient_id):
+    """Load the patient's summary FOR UPDATE, creating it on the first append."""
+    query = db.select(MedicalSummary).where(MedicalSummary.patient_id == patient_id).with_for_update()
+    summary = db.session.scalars(query).first()
+    if summary is not None:
+        return summary
+    try:
+        with db.session.begin_nested():
+            summary = MedicalSummary(
+                patient_id=patient_id, latest_vitals={}, allergies=[], active_prescriptions=[], record_count=0
+            )
+            db.session.add(summary)
+    except IntegrityError:
+        # A concurrent first append created it.
+        summary = db.session.scalars(query).one()
+    return summary
+
+
+def append_record(patient_id, doctor_id, kind, data, appointment_id=None, amends_id=None):
+    """
+    Append a record to a patient's history and update the summary.
+
+    The caller commits, then invalidates summary_tag(patient_id).
+
+    Raises:
+        ValueError: If the record is malformed, or its appointment or amended
+            record belongs to another patient.
+    Returns:
+        MedicalRecord: The new record.
+    """
+    validate_record(kind, data)
+    if appointment_id is not None:
+        appointment_patient = db.session.execute(
+            db.select(Appointment.patient_id).where(Appointment.appointment_id == appointment_id)
+        ).scalar_one_or_none()
+        if appointment_patient != patient_id:
+            raise ValueError("appointment_id must be an appointment of the same patient")
+    if amends_id is not None:
+        amended_patient = db.session.execute(
+            db.select(MedicalRecord.patient_id).where(MedicalRecord.record_id == amends_id)
+        ).scalar_one_or_none()
+        if amended_patient != patient_id:
+            raise ValueError("amends must be a record of the same patient")
+
+    summary = _locked_summary(patient_id)
+    record = MedicalRecord(
+        record_id=uuid.uuid4(),
+        patient_id=patient_id,
+        doctor_id=doctor_id,
+        appointment_id=appointment_id,
+        amends_id=amends_id,
+        kind=kind,
+        data=data,
+        created_at=datetime.utcnow(),
+    )
+    db.session.add(record)
+    apply_record(summary, record)
+    return record
+
+
+def history_query(patient_id, kind=None, cursor=None, newest_first=True):
+    """
+    Select a patient's records in created_at order, after a keyset cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    query = db.select(*RECORD_COLUMNS).where(MedicalRecord.patient_id == patient_id)
+    if kind:
+        query = query.where(MedicalRecord.kind == kind)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor, 2)
+        key = tuple_(MedicalRecord.created_at, MedicalRecord.record_id)
+        position = tuple_(datetime.fromisoformat(cursor_created_at), uuid.UUID(cursor_id))
+        query = query.where(key < position if newest_first else key > position)
+    if newest_first:
+        return query.order_by(MedicalRecord.created_at.desc(), MedicalRecord.record_id.desc())
+    return query.order_by(MedicalRecord.created_at, MedicalRecord.record_id)
+
+
+def history_page(patient_id, limit, kind=None, cursor=None):
+    """Return one page of records, newest first, and the cursor of the next page."""
+    rows = db.session.execute(history_query(patient_id, kind, cursor).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), last.record_id)
+    return [record_data(row) for row in rows[:limit]], next_cursor
+
+
+def stream_history(patient_id, kind=None, batch_size=500):
+    """
+    Yield every record of a patient, oldest first, from a server-side cursor.
+
+    Only batch_size rows are held in memory at a time.
+    """
+    result = db.session.execute(
+        history_query(patient_id, kind, newest_first=False),
+        execution_options={"yield_per": batch_size},
+    )
+    try:
+        for row in result:
+            yield record_data(row)
+    finally:
+        result.close()
+
+
+def record_data(row):
+    return {
+        "recordId": row.record_id,
+        "patientId": row.patient_id,
+        "doctorId": row.doctor_id,
+        "appointmentId": row.appointment_id,
+        "amends": row.amends_id,
+        "kind": row.kind,
+        "data": row.data,
+        "createdAt": row.created_at,
+    }
+
+
+def summary_data(patient_id, summary):
+    if summary is None:
+        return {
+            "patientId": patient_id, "latestVitals": {}, "allergies": [], "activePrescriptions": [],
+            "recordCount": 0, "lastRecordAt": None,
+        }
+    return {
+        "patientId": summary.patient_id,
+        "latestVitals": summary.latest_vitals,
+        "allergies": summary.allergies,
+        "activePrescriptions": summary.active_prescriptions,
+        "recordCount": summary.record_count,
+        "lastRecordAt": summary.last_record_at,
+    }
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, event
+from sqlalchemy.dialects.postgresql import UUID
+from app import db
+
+# Kinds of record; vitals, allergy and prescription records also update the summary.
+RECORD_KINDS = ("note", "diagnosis", "vitals", "allergy", "prescription", "lab_result")
+
+
+class AppendOnlyError(Exception):
+    pass
+
+
+class MedicalRecord(db.Model):
+    """
+    One entry of a patient's medical history.
+
+    Records are never updated or deleted. A correction is a new record that
+    points at the one it amends.
+    """
+    __tablename__ = 'medical_records'
+
+    record_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey('patients.patient_id'), nullable=False)
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey('doctors.doctor_id'), nullable=True)
+    appointment_id = Column(UUID(as_uuid=True), ForeignKey('appointment.appointment_id'), nullable=True)
+    amends_id = Column(UUID(as_uuid=True), ForeignKey('medical_records.record_id'), nullable=True)
+    kind = Column(String(30), nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_medical_records_patient_created', 'patient_id', 'created_at', 'record_id'),
+    )
+
+    def __repr__(self):
+        return f"<MedicalRecord {self.kind} {self.record_id}>"
+
+
+class MedicalSummary(db.Model):
+    """
+    Compact per-patient digest of the history, maintained on every append.
+    """
+    __tablename__ = 'medical_summaries'
+
+    patient_id = Column(UUID(as_uuid=True), ForeignKey('patients.patient_id'), primary_key=True)
+    latest_vitals = Column(JSON, nullable=False, default=dict)
+    allergies = Column(JSON, nullable=False, default=list)
+    active_prescriptions = Column(JSON, nullable=False, default=list)
+    record_count = Column(Integer, nullable=False, default=0)
+    last_record_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<MedicalSummary {self.patient_id}>"
+
+
+@event.listens_for(MedicalRecord, "before_update")
+@event.listens_for(MedicalRecord, "before_delete")
+def _reject_change(mapper, connection, target):
+    raise AppendOnlyError("Medical records are append-only; append an amendment instead")
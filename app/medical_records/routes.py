@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import functools
+import uuid
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource
+from app import db
+from app.appointments.models import Appointment
+from app.auth.utils import role_required, current_identity
+from app.caching import cached_response, invalidate_tags
+from app.medical_records.history import (
+    append_record, history_page, stream_history, summary_data, summary_tag,
+)
+from app.medical_records.models import MedicalSummary, RECORD_KINDS
+from app.metrics.queries import query_budget
+from app.serialization import dumps
+from utils.pagination import parse_limit
+
+medical_record_namespace = Namespace('medical-records', description='Patient medical history')
+
+
+def _has_treated(doctor_id, patient_id):
+    """Whether the doctor has, or had, an appointment with the patient."""
+    return db.session.execute(
+        db.select(Appointment.appointment_id)
+        .where(Appointment.doctor_id == doctor_id, Appointment.patient_id == patient_id)
+        .limit(1)
+    ).first() is not None
+
+
+def record_access_required(f):
+    """
+    Allow the patient themselves, or a doctor who has an appointment with them.
+
+    Runs before any response cache, so cached summaries are never served to
+    other callers.
+    """
+    @functools.wraps(f)
+    def wrapper(*args, patient_id, **kwargs):
+        user_id, role = current_identity()
+        if role == "patient":
+            allowed = user_id == patient_id
+        else:
+            allowed = _has_treated(user_id, patient_id)
+        if not allowed:
+            return {"status": "error", "message": "You are not authorized to access this patient's records"}, 403
+        return f(*args, patient_id=patient_id, **kwargs)
+    return wrapper
+
+
+@medical_record_namespace.route("/<uuid:patient_id>")
+class MedicalHistory(Resource):
+    @role_required("patient", "doctor")
+    @query_budget(2)
+    @record_access_required
+    @medical_record_namespace.doc(params={
+        "kind": f"Only records of this kind ({', '.join(RECORD_KINDS)})",
+        "limit": "Page size (default 50, max 200)",
+        "cursor": "nextCursor from the previous page",
+    })
+    def get(self, patient_id):
+        """
+        Page through a patient's medical history, newest first.
+        """
+        try:
+            records, next_cursor = history_page(
+                patient_id,
+                parse_limit(request.args.get("limit")),
+                kind=request.args.get("kind"),
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}, 400
+
+        return {"status": "success", "data": {"records": records, "nextCursor": next_cursor}}, 200
+
+    @role_required("doctor", message="Unauthorized, only doctors can add medical records")
+    @query_budget(10)
+    @record_access_required
+    def post(self, patient_id):
+        """
+        Append a record to a patient's medical history (Doctor only).
+
+        Records cannot be edited; send "amends" with the id of the record a
+        correction replaces.
+        """
+        doctor_id, _ = current_identity()
+        data = request.get_json(silent=True) or {}
+
+        try:
+            appointment_id = uuid.UUID(data["appointment_id"]) if data.get("appointment_id") else None
+            amends_id = uuid.UUID(data["amends"]) if data.get("amends") else None
+            record = append_record(
+                patient_id, doctor_id, data.get("kind"), data.get("data"),
+                appointment_id=appointment_id, amends_id=amends_id,
+            )
+        except ValueError as e:
+            db.session.rollback()
+            return {"status": "error", "message": str(e)}, 400
+
+        db.session.commit()
+        invalidate_tags(summary_tag(patient_id))
+
+        return {
+            "status": "success",
+            "message": "Medical record added successfully",
+            "data": {"recordId": str(record.record_id), "createdAt": record.created_at.isoformat()},
+        }, 201
+
+
+@medical_record_namespace.route("/<uuid:patient_id>/export")
+class MedicalHistoryExport(Resource):
+    @role_required("patient", "doctor")
+    @record_access_required
+    @medical_record_namespace.doc(params={"kind": "Only records of this kind"})
+    def get(self, patient_id):
+        """
+        Stream a patient's full medical history, oldest first, as JSON lines.
+        """
+        kind = request.args.get("kind")
+        batch_size = current_app.config["MEDICAL_RECORDS_STREAM_BATCH"]
+
+        def generate():
+            for record in stream_history(patient_id, kind=kind, batch_size=batch_size):
+                yield dumps(record)
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@medical_record_namespace.route("/<uuid:patient_id>/summary")
+class MedicalSummaryResource(Resource):
+    @role_required("patient", "doctor")
+    @query_budget(2)
+    @record_access_required
+    @cached_response("medical_summary", tags=lambda patient_id: [summary_tag(patient_id)])
+    def get(self, patient_id):
+        """
+        Latest vitals, allergies and active prescriptions of a patient.
+        """
+        summary = db.session.get(MedicalSummary, patient_id)
+        return {"status": "success", "data": summary_data(patient_id, summary)}, 200
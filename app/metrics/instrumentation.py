@@ -0,0 +1,147 @@
+"""
+Request metrics and their Prometheus exposition.
+
+Each request records its latency, plus the number and duration of the SQL
+statements it ran, labelled by Flask endpoint. Cache and connection pool
+figures are read at scrape time from the counters their own modules already
+keep, so they cost nothing per request. With METRICS_DIR set these
+per-process families are merged across workers (see app.metrics.multiprocess).
+
+The email queue depths are COUNT(*) queries shared by every worker, so they
+are cached for METRICS_QUEUE_DEPTH_TTL seconds instead of run per scrape.
+"""
+import time
+from flask import current_app, g, request
+from sqlalchemy import func
+from app.metrics.multiprocess import merge_snapshots, snapshot_writer, write_snapshot
+from app.metrics.queries import instrument_queries, request_queries, check_query_budget
+from app.metrics.registry import Histogram, metric_family
+
+QUEUE_DEPTH_CACHE_KEY = "metrics:email_queue_depth"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint.", ("method", "endpoint", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("endpoint",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_QUERY_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ("endpoint",),
+)
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, endpoint, str(response.status_code))
+    tally = request_queries()
+    REQUEST_QUERIES.observe(tally.count, endpoint)
+    REQUEST_QUERY_TIME.observe(tally.seconds, endpoint)
+    snapshot_writer.ensure_started(current_app._get_current_object())
+    return response
+
+
+def init_metrics(app):
+    """Register SQL timing, the request metrics hooks and query budget checks as configured."""
+    metrics, budgets = app.config["METRICS_ENABLED"], app.config["QUERY_BUDGET_ENABLED"]
+    if not (metrics or budgets):
+        return
+
+    from app import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_queries(engine)
+    if metrics:
+        snapshot_writer.configure(app.config["METRICS_DIR"], app.config["METRICS_FLUSH_INTERVAL"], collect_families)
+        app.before_request(_start_timer)
+        app.after_request(_record_request)
+    if budgets:
+        app.after_request(check_query_budget)
+
+
+def _cache_families():
+    from app.caching import cache_stats
+
+    outcomes = ("l1_hits", "l2_hits", "stale_hits", "misses")
+    return [("cache_lookups_total", "counter", "Response cache lookups by key family and outcome.", [
+        ("", [("family", family), ("outcome", outcome)], counters[outcome])
+        for family, counters in sorted(cache_stats().items()) for outcome in outcomes
+    ])]
+
+
+def _pool_families():
+    from app import db
+    from app.metrics.pool import pool_stats
+
+    stats = pool_stats(db.engines)
+    checkouts = stats["checkouts"]
+    families = []
+    for name, key, help_text in (
+        ("db_pool_checkouts_total", "checkouts", "Connections checked out of the pool."),
+        ("db_pool_overflow_checkouts_total", "overflow_checkouts", "Checkouts that opened an overflow connection."),
+        ("db_pool_timeouts_total", "timeouts", "Checkouts that timed out waiting for a connection."),
+        ("db_pool_wait_seconds_total", "wait_seconds_total", "Time spent waiting for a pooled connection."),
+    ):
+        families.append((name, "counter", help_text, [("", [], checkouts[key])]))
+
+    families.append(("db_pool_held_seconds_total", "counter", "Time connections were held, by endpoint.", [
+        ("", [("endpoint", endpoint)], counters["held_seconds_total"])
+        for endpoint, counters in sorted(stats["held_by_endpoint"].items())
+    ]))
+    for name, key, help_text in (
+        ("db_pool_checked_out", "checked_out", "Connections currently checked out."),
+        ("db_pool_overflow", "overflow", "Overflow connections currently open."),
+    ):
+        families.append((name, "gauge", help_text, [
+            ("", [("bind", bind)], state[key]) for bind, state in sorted(stats["pools"].items()) if key in state
+        ]))
+    return families
+
+
+def _email_queue_depth():
+    from app import cache, db
+    from app.notifications.models import OutboundEmail, DeadLetterEmail
+
+    depth = cache.get(QUEUE_DEPTH_CACHE_KEY)
+    if depth is None:
+        depth = [
+            db.session.scalar(db.select(func.count()).select_from(OutboundEmail)),
+            db.session.scalar(db.select(func.count()).select_from(DeadLetterEmail)),
+        ]
+        cache.set(QUEUE_DEPTH_CACHE_KEY, depth, timeout=current_app.config["METRICS_QUEUE_DEPTH_TTL"])
+    return depth
+
+
+def _email_queue_families():
+    pending, dead = _email_queue_depth()
+    return [
+        ("email_outbox_depth", "gauge", "Emails waiting to be sent.", [("", [], pending)]),
+        ("email_dead_letter_depth", "gauge", "Emails that exhausted their attempts.", [("", [], dead)]),
+    ]
+
+
+def collect_families():
+    """Return the metric families this process keeps, as (name, kind, help_text, samples)."""
+    families = [histogram.family() for histogram in (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_QUERY_TIME)]
+    families += _cache_families()
+    families += _pool_families()
+    return families
+
+
+def render_metrics():
+    """Return the metrics of every worker, or of this process without METRICS_DIR, in the Prometheus text format."""
+    families = collect_families()
+    if snapshot_writer.enabled():
+        write_snapshot(snapshot_writer.directory, families)
+        families = merge_snapshots(snapshot_writer.directory)
+    families += _email_queue_families()
+    return "\n".join(line for family in families for line in metric_family(*family)) + "\n"
@@ -0,0 +1,165 @@
+"""
+Metrics merged across gunicorn workers.
+
+Every worker keeps its figures in memory and writes a snapshot of its metric
+families to METRICS_DIR, every METRICS_FLUSH_INTERVAL seconds from a
+background thread and whenever it serves /metrics. A scrape, whichever
+worker it reaches, merges the snapshots of all workers: counters and
+histograms are summed, including those of workers that have exited so the
+totals never go backwards, while gauges only count live workers. The
+gunicorn hooks in gunicorn.conf.py clear the directory on start and, as
+each worker exits, fold its counters into a single snapshot of all dead
+workers and remove its own, so recycled workers do not pile up files.
+
+Without METRICS_DIR a worker reports its own figures only.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "metrics_"
+DEAD = "dead"
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"{SNAPSHOT_PREFIX}{pid}.json")
+
+
+def _write_json(path, data):
+    partial = f"{path}.{threading.get_ident()}.tmp"
+    with open(partial, "w") as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+
+
+def write_snapshot(directory, families, pid=None):
+    """Atomically replace a process's snapshot with its current families."""
+    _write_json(_snapshot_path(directory, pid or os.getpid()), {"live": True, "families": families})
+
+
+def _read_snapshots(directory):
+    snapshots = {}
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(SNAPSHOT_PREFIX) and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots[name[len(SNAPSHOT_PREFIX):-len(".json")]] = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable metrics snapshot %s: %s", name, e)
+
+    # A worker folded into the dead snapshot while this scrape was reading.
+    for pid in snapshots.get(DEAD, {}).get("pids", []):
+        snapshots.pop(str(pid), None)
+    return list(snapshots.values())
+
+
+def _merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, kind, help_text, samples in snapshot["families"]:
+            if kind == "gauge" and not snapshot["live"]:
+                continue
+            _, _, _, totals = merged.setdefault(name, (name, kind, help_text, {}))
+            for suffix, labels, value in samples:
+                key = (suffix, tuple(tuple(pair) for pair in labels))
+                totals[key] = totals.get(key, 0) + value
+
+    return [
+        (name, kind, help_text, [(suffix, list(labels), value) for (suffix, labels), value in totals.items()])
+        for name, kind, help_text, totals in merged.values()
+    ]
+
+
+def merge_snapshots(directory):
+    """
+    Merge the snapshots of every worker.
+
+    Returns:
+        list: (name, kind, help_text, samples) families, samples summed per
+        suffix and labels.
+    """
+    return _merge(_read_snapshots(directory))
+
+
+def mark_process_dead(directory, pid):
+    """Fold an exited worker's counters into the dead workers' snapshot and remove its own."""
+    path = _snapshot_path(directory, pid)
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    dead_path = _snapshot_path(directory, DEAD)
+    try:
+        with open(dead_path) as f:
+            dead = json.load(f)
+    except FileNotFoundError:
+        dead = {"live": False, "families": [], "pids": []}
+    snapshot["live"] = False
+
+    # Remember the pids whose files may still be seen by a scrape in progress.
+    pids = [other for other in dead["pids"] if os.path.exists(_snapshot_path(directory, other))]
+    _write_json(dead_path, {"live": False, "families": _merge([dead, snapshot]), "pids": pids + [pid]})
+    os.remove(path)
+
+
+def clear_snapshots(directory):
+    """Remove the snapshots of a previous run."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith(SNAPSHOT_PREFIX):
+            os.remove(os.path.join(directory, name))
+
+
+class SnapshotWriter:
+    """Writes this process's families to METRICS_DIR in the background."""
+
+    def __init__(self):
+        self.directory = None
+        self.interval = 5.0
+        self.collect = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def configure(self, directory, interval, collect):
+        self.directory = directory or None
+        self.interval = interval
+        self.collect = collect
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def enabled(self):
+        return self.directory is not None
+
+    def ensure_started(self, app):
+        """Start the writer thread once per process (threads do not survive a fork)."""
+        if not self.enabled() or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, args=(app,), name="metrics-snapshot", daemon=True).start()
+
+    def write(self):
+        write_snapshot(self.directory, self.collect())
+
+    def _run(self, app):
+        while True:
+            time.sleep(self.interval)
+            if not self.enabled():
+                continue
+            try:
+                with app.app_context():
+                    self.write()
+            except Exception as e:
+                logger.warning("Could not write metrics snapshot: %s", e)
+
+
+snapshot_writer = SnapshotWriter()
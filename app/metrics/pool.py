@@ -0,0 +1,137 @@
+"""
+Connection pool instrumentation.
+
+InstrumentedQueuePool times how long every checkout waits for a connection
+and counts checkouts that had to open an overflow connection or gave up with
+a pool timeout. Pool events record how long each connection is held, keyed
+by the Flask endpoint that checked it out ("-" outside a request, e.g. CLI
+commands and the mail worker). Counters are per process, like cache_stats().
+"""
+import threading
+import time
+from collections import defaultdict
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+NO_ENDPOINT = "-"
+CHECKOUT_INFO_KEY = "metrics_checkout"
+
+
+def _empty_checkouts():
+    return {
+        "checkouts": 0, "overflow_checkouts": 0, "timeouts": 0,
+        "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+    }
+
+
+_stats_lock = threading.Lock()
+_checkouts = _empty_checkouts()
+_held = defaultdict(lambda: {"checkouts": 0, "held_seconds_total": 0.0, "held_seconds_max": 0.0})
+
+
+def _record_wait(seconds, overflow=False, timed_out=False):
+    with _stats_lock:
+        _checkouts["timeouts" if timed_out else "checkouts"] += 1
+        _checkouts["overflow_checkouts"] += overflow
+        _checkouts["wait_seconds_total"] += seconds
+        _checkouts["wait_seconds_max"] = max(_checkouts["wait_seconds_max"], seconds)
+
+
+def _record_held(endpoint, seconds):
+    with _stats_lock:
+        counters = _held[endpoint]
+        counters["checkouts"] += 1
+        counters["held_seconds_total"] += seconds
+        counters["held_seconds_max"] = max(counters["held_seconds_max"], seconds)
+
+
+def _current_endpoint():
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return NO_ENDPOINT
+
+
+class InstrumentedQueuePool(QueuePool):
+    """A QueuePool that records checkout wait time, overflow connections and timeouts."""
+
+    def _do_get(self):
+        before = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            _record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        # overflow() counts up from -pool_size as connections are opened, so a
+        # rise past zero means this checkout opened an overflow connection.
+        _record_wait(time.perf_counter() - started, overflow=self.overflow() > max(before, 0))
+        return connection
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info[CHECKOUT_INFO_KEY] = (time.perf_counter(), _current_endpoint())
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    checkout = connection_record.info.pop(CHECKOUT_INFO_KEY, None)
+    if checkout is not None:
+        started, endpoint = checkout
+        _record_held(endpoint, time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """Record connection hold times for every checkout from the engine's pool."""
+    if not event.contains(engine, "checkout", _on_checkout):
+        event.listen(engine, "checkout", _on_checkout)
+        event.listen(engine, "checkin", _on_checkin)
+
+
+def init_pool_metrics(app):
+    from app import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+
+def _pool_state(pool):
+    state = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        state.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return state
+
+
+def pool_stats(engines):
+    """
+    Return checkout counters, hold times per endpoint and live pool state for this process.
+
+    Args:
+        engines (dict): Bind key to engine, as in ``db.engines``.
+    """
+    with _stats_lock:
+        checkouts = dict(_checkouts)
+        held = {endpoint: dict(counters) for endpoint, counters in _held.items()}
+
+    attempts = checkouts["checkouts"] + checkouts["timeouts"]
+    checkouts["wait_seconds_avg"] = checkouts["wait_seconds_total"] / attempts if attempts else 0.0
+    for counters in held.values():
+        counters["held_seconds_avg"] = counters["held_seconds_total"] / counters["checkouts"]
+
+    return {
+        "checkouts": checkouts,
+        "held_by_endpoint": held,
+        "pools": {key or "default": _pool_state(engine.pool) for key, engine in engines.items()},
+    }
+
+
+def reset_pool_stats():
+    with _stats_lock:
+        _checkouts.update(_empty_checkouts())
+        _held.clear()
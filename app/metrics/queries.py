@@ -0,0 +1,132 @@
+"""
+Count the SQL statements each request runs, and the time spent in them.
+
+Engine events time every cursor execution. Statements run during a request
+are added to a per-request tally kept on ``flask.g``; anything outside a
+request (CLI commands, the mail worker) is not counted.
+
+Views declare how many statements they may run with ``@query_budget(n)``.
+A request over its budget is logged, or raises QueryBudgetExceeded when
+QUERY_BUDGET_RAISE is set, as the test suite does. The same statement text
+repeated within one request, the signature of an N+1 lazy load, is reported
+alongside.
+"""
+import functools
+import logging
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+START_INFO_KEY = "metrics_query_started"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryTally:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self):
+        """Statements run more than once, with how often they ran."""
+        return {statement: count for statement, count in self.statements.items() if count > 1}
+
+
+def request_queries():
+    """Return the current request's QueryTally, creating it on first use."""
+    tally = g.get("query_tally")
+    if tally is None:
+        tally = g.query_tally = QueryTally()
+    return tally
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(START_INFO_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info[START_INFO_KEY].pop()
+    if has_request_context():
+        request_queries().record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # The after hook does not run for a failed statement.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(START_INFO_KEY):
+        connection.info[START_INFO_KEY].pop()
+
+
+def instrument_queries(engine):
+    """Time every statement the engine executes."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def query_budget(limit):
+    """
+    Declare the most SQL statements a view may run per request.
+
+    Args:
+        limit (int): Statement budget for the whole request, including
+            statements run by decorators and commit.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            g.query_budget = limit
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def request_report():
+    """
+    Summarize the current request's statements against its budget.
+
+    Returns:
+        dict: endpoint, method, count, budget (None when undeclared), whether
+        it was exceeded, and the repeated statements.
+    """
+    tally = request_queries()
+    budget = g.get("query_budget")
+    return {
+        "endpoint": request.endpoint or "unmatched",
+        "method": request.method,
+        "count": tally.count,
+        "budget": budget,
+        "exceeded": budget is not None and tally.count > budget,
+        "repeated": tally.repeated(),
+    }
+
+
+def format_report(report):
+    lines = [f"{report['method']} {report['endpoint']} ran {report['count']} statements (budget {report['budget']})"]
+    for statement, count in report["repeated"].items():
+        lines.append(f"  {count}x {' '.join(statement.split())}")
+    return "\n".join(lines)
+
+
+def check_query_budget(response):
+    """after_request hook enforcing the budget declared with query_budget()."""
+    report = request_report()
+    if report["exceeded"]:
+        if current_app.config["QUERY_BUDGET_RAISE"]:
+            raise QueryBudgetExceeded(format_report(report))
+        logger.warning("Query budget exceeded: %s", format_report(report))
+    elif report["repeated"]:
+        logger.debug("Repeated statements: %s", format_report(report))
+    return response
@@ -0,0 +1,91 @@
+"""
+Minimal histograms and metric families rendered in the Prometheus text format.
+
+Values live in this process, like the cache and pool counters; under
+gunicorn app.metrics.multiprocess merges every worker's series at scrape time.
+"""
+import bisect
+import threading
+
+# Prometheus client defaults, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metric_family(name, kind, help_text, samples):
+    """
+    Render one metric family.
+
+    Args:
+        name (str): Metric name.
+        kind (str): counter, gauge or histogram.
+        help_text (str): HELP line.
+        samples (iterable): (suffix, labels, value) tuples, where labels is a
+            sequence of (name, value) pairs.
+    Returns:
+        list: Lines of text, without trailing newlines.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+    return lines
+
+
+class Histogram:
+    """A histogram with fixed buckets; observe() is one bisect and a few additions under a lock."""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts, a +Inf bucket, then the sum.
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def family(self):
+        """This histogram as a (name, kind, help_text, samples) family, see metric_family()."""
+        with self._lock:
+            series = sorted((labelvalues, list(values)) for labelvalues, values in self._series.items())
+
+        samples = []
+        for labelvalues, values in series:
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                samples.append(("_bucket", labels + [("le", _number(float(bound)))], cumulative))
+            samples.append(("_sum", labels, values[-1]))
+            samples.append(("_count", labels, cumulative))
+        return self.name, "histogram", self.help_text, samples
+
+    def render(self):
+        return metric_family(*self.family())
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import hmac
+from flask import Blueprint, Response, current_app, request
+from flask_restx import Namespace, Resource
+from app import db
+from app.auth.utils import role_required
+from app.metrics.instrumentation import render_metrics
+from app.metrics.pool import pool_stats
+
+metrics_namespace = Namespace('metrics', description='Operational metrics for this worker process')
+metrics_blueprint = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_namespace.route("/pool")
+class PoolMetrics(Resource):
+    @role_required("admin")
+    def get(self):
+        """Connection pool checkout waits, overflow, timeouts and hold time per endpoint."""
+        return {"status": "success", "data": pool_stats(db.engines)}, 200
+
+
+@metrics_blueprint.route("/metrics")
+def prometheus_metrics():
+    """Metrics of every worker (see METRICS_DIR) in the Prometheus text format."""
+    token = current_app.config["METRICS_TOKEN"]
+    if not token:
+        return Response("Metrics are disabled until METRICS_TOKEN is set\n", status=403, mimetype="text/plain")
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
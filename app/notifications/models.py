@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app import db
+
+
+class OutboundEmail(db.Model):
+    """
+    Represents a notification email waiting to be delivered by the mail worker.
+    """
+    __tablename__ = 'email_outbox'
+
+    email_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True)
+    recipient = Column(String(100), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_email_outbox_next_attempt_at', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.email_id}>"
+
+
+class DeadLetterEmail(db.Model):
+    """
+    Represents a notification email that exhausted its delivery attempts.
+    """
+    __tablename__ = 'email_dead_letter'
+
+    email_id = Column(UUID(as_uuid=True), primary_key=True, unique=True)
+    recipient = Column(String(100), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DeadLetterEmail {self.email_id}>"
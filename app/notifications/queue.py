@@ -0,0 +1,17 @@
+from app import db
+from app.notifications.models import OutboundEmail
+
+
+def enqueue_email(subject, recipient, body):
+    """
+    Queue a notification email for the mail worker.
+
+    The row is only added to the session, so it is committed (or rolled back)
+    together with the caller's own changes.
+    """
+    if not recipient:
+        return None
+
+    email = OutboundEmail(subject=subject, recipient=recipient, body=body)
+    db.session.add(email)
+    return email
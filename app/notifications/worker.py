@@ -0,0 +1,123 @@
+import logging
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+from app import db
+from app.notifications.models import OutboundEmail, DeadLetterEmail
+from utils.mail import mail
+
+logger = logging.getLogger(__name__)
+
+
+def claim_batch(batch_size):
+    """
+    Lock the next batch of due emails.
+
+    SKIP LOCKED lets several workers drain the outbox without picking up
+    the same rows.
+    """
+    return (
+        OutboundEmail.query
+        .filter(OutboundEmail.next_attempt_at <= datetime.utcnow())
+        .order_by(OutboundEmail.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def record_failure(email, error):
+    """Schedule a retry with exponential backoff, or dead-letter the email."""
+    config = current_app.config
+    email.attempts += 1
+    email.last_error = str(error)
+
+    if email.attempts >= config["MAIL_QUEUE_MAX_ATTEMPTS"]:
+        db.session.add(DeadLetterEmail(
+            email_id=email.email_id,
+            recipient=email.recipient,
+            subject=email.subject,
+            body=email.body,
+            attempts=email.attempts,
+            last_error=email.last_error,
+            created_at=email.created_at,
+        ))
+        db.session.delete(email)
+        logger.warning("Email %s moved to dead letter after %s attempts", email.email_id, email.attempts)
+        return
+
+    delay = min(
+        config["MAIL_QUEUE_BACKOFF_SECONDS"] * 2 ** (email.attempts - 1),
+        config["MAIL_QUEUE_MAX_BACKOFF_SECONDS"],
+    )
+    email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+
+def drain_outbox(batch_size=None):
+    """
+    Deliver one batch of queued emails over a single SMTP connection.
+
+    Returns:
+        tuple: The number of emails sent and the number that failed.
+    """
+    batch = claim_batch(batch_size or current_app.config["MAIL_QUEUE_BATCH_SIZE"])
+    if not batch:
+        db.session.commit()
+        return 0, 0
+
+    sender = current_app.config["MAIL_DEFAULT_SENDER"]
+    pending = list(batch)
+    sent = failed = 0
+
+    try:
+        with mail.connect() as connection:
+            while pending:
+                email = pending.pop(0)
+                try:
+                    connection.send(Message(
+                        subject=email.subject,
+                        recipients=[email.recipient],
+                        body=email.body,
+                        sender=sender,
+                    ))
+                    db.session.delete(email)
+                    sent += 1
+                except Exception as e:
+                    record_failure(email, e)
+                    failed += 1
+    except Exception as e:
+        # The connection could not be opened (or dropped): retry the rest later.
+        logger.error("SMTP connection failed: %s", e)
+        for email in pending:
+            record_failure(email, e)
+            failed += 1
+
+    db.session.commit()
+    return sent, failed
+
+
+def run_worker(batch_size=None, poll_interval=None, once=False):
+    """Drain the outbox until interrupted, sleeping while it is empty."""
+    poll_interval = poll_interval or current_app.config["MAIL_QUEUE_POLL_INTERVAL"]
+
+    while True:
+        sent, failed = drain_outbox(batch_size)
+        if sent or failed:
+            logger.info("Mail worker sent %s email(s), %s failed", sent, failed)
+        if once:
+            return
+        if not sent and not failed:
+            time.sleep(poll_interval)
+
+
+@click.command("mail-worker")
+@click.option("--batch-size", type=int, default=None, help="Emails sent per SMTP connection.")
+@click.option("--poll-interval", type=float, default=None, help="Seconds to wait when the outbox is empty.")
+@click.option("--once", is_flag=True, help="Drain a single batch and exit.")
+@with_appcontext
+def mail_worker_command(batch_size, poll_interval, once):
+    """Deliver queued notification emails."""
+    run_worker(batch_size=batch_size, poll_interval=poll_interval, once=once)
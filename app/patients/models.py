@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, literal_column
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app import db
 
 
@@ -13,7 +13,10 @@ class Patient(db.Model):
     __tablename__ = 'patients'
 
     patient_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True)
-    image = Column(Text, nullable=True)
+    # sha256 key of a blob in the image store, or an external URL
+    image_key = Column(String(512), nullable=True)
+    # The pre-image-store value when migration a3f8c21d7e54 could not convert it; never loaded by the app
+    legacy_image = deferred(Column('image', Text, nullable=True))
     blood_group = Column(String(10), nullable=True)
     address = Column(String(255), nullable=True)
     age = Column(String(3), nullable=True)
@@ -26,9 +29,13 @@ class Patient(db.Model):
     date_of_birth = Column(DateTime, nullable=False)
     password = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented in SQL by every UPDATE; ETags are built from it (see app.conditional)
+    version = Column(Integer, nullable=False, server_default="1", default=1, onupdate=literal_column("version") + 1)
 
     appointments = relationship("Appointment", back_populates="patient")
 
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -1,13 +1,32 @@
 from flask_restx import Namespace, Resource
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.auth.routes import UserRegister, UserLogin
+from app.auth.utils import role_required, current_identity
+from app.metrics.queries import query_budget
+from app.images.processing import image_ref_from_input, image_url
+from app.conditional import conditional_get, set_validators
+from app.auth.routes import UserRegister, UserLogin, UserLogout, UserTokenRefresh
 from app.patients.models import Patient
 from app import db
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def patient_profile_data(patient):
+    return {
+        "id": str(patient.patient_id),
+        "image": image_url(patient.image_key),
+        "name": f"{patient.firstname} {patient.lastname}",
+        "email": patient.email,
+        "phone": patient.phone,
+        "address": patient.address,
+        "age": patient.age,
+        "weight": patient.weight,
+        "height": patient.height,
+        "blood_group": patient.blood_group,
+    }
+
+
 patient_namespace = Namespace('patients', description='Patients related operations')
 
 
@@ -23,45 +42,53 @@ class PatientLogin(UserLogin):
         super().__init__(model=Patient, role="patient")
 
 
+@patient_namespace.route('/logout')
+class PatientLogout(UserLogout):
+    def __init__(self, *args, **kwargs):
+        super().__init__(model=Patient, role="patient")
+
+
+@patient_namespace.route('/refresh')
+class PatientTokenRefresh(UserTokenRefresh):
+    def __init__(self, *args, **kwargs):
+        super().__init__(model=Patient, role="patient")
+
+
 @patient_namespace.route('/profile')
 class PatientProfile(Resource):
-    @jwt_required()
+    @role_required("patient")
+    @query_budget(2)
+    @conditional_get(Patient.patient_id, lambda: current_identity()[0])
     def get(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Fetching profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Fetching profile for user: %s", current_user)
 
         patient = Patient.query.filter_by(patient_id=current_user).first()
         if not patient:
             return {"message": "Patient not found."}, 404
 
-        patient_details = {
-            "id": str(patient.patient_id),
-            "image": patient.image,
-            "name": f"{patient.firstname} {patient.lastname}",
-            "email": patient.email,
-            "phone": patient.phone,
-            "address": patient.address,
-            "age": patient.age,
-            "weight": patient.weight,
-            "height": patient.height,
-            "blood_group": patient.blood_group,
-        }
+        set_validators(patient)
         return {
             "status": "success",
-            "data": patient_details
+            "data": patient_profile_data(patient)
         }, 200
 
-    @jwt_required()
+    @role_required("patient")
+    @query_budget(2)
     def put(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Updating profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Updating profile for user: %s", current_user)
 
         patient = Patient.query.filter_by(patient_id=current_user).first()
         if not patient:
             return {"message": "Patient not found."}, 404
 
         data = request.get_json()
-        patient.image = data.get('image', patient.image)
+        if 'image' in data:
+            try:
+                patient.image_key = image_ref_from_input(data['image'])
+            except ValueError as e:
+                return {"message": str(e)}, 400
         patient.firstname = data.get('firstName', patient.firstname)
         patient.lastname = data.get('lastName', patient.lastname)
         patient.email = data.get('email', patient.email)
@@ -79,17 +106,22 @@ class PatientProfile(Resource):
             "message": "Profile updated successfully."
         }, 200
 
-    @jwt_required()
+    @role_required("patient")
+    @query_budget(2)
     def post(self):
-        current_user = get_jwt_identity()
-        logger.debug(f"Creating profile for user: {current_user}")
+        current_user, _ = current_identity()
+        logger.debug("Creating profile for user: %s", current_user)
 
         patient = Patient.query.filter_by(patient_id=current_user).first()
         if not patient:
             return {"message": "Patient not found."}, 404
 
         data = request.get_json()
-        patient.image = data.get('image', patient.image)
+        if 'image' in data:
+            try:
+                patient.image_key = image_ref_from_input(data['image'])
+            except ValueError as e:
+                return {"message": str(e)}, 400
         patient.firstname = data.get('firstName', patient.firstname)
         patient.lastname = data.get('lastName', patient.lastname)
         patient.email = data.get('email', patient.email)
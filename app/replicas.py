@@ -0,0 +1,124 @@
+"""
+Route read-only queries to a replica database.
+
+When SQLALCHEMY_REPLICA_URI is set it is registered as the ``replica`` bind.
+During GET and HEAD requests the session sends plain SELECTs there; flushes,
+DML, locking reads and anything outside a request use the primary.
+
+A session that writes is pinned to the primary for the rest of its life, so
+a request reads its own writes. The writer's identity is also pinned for
+REPLICA_MAX_LAG seconds after the commit, so their next GETs do not read a
+replica that has not caught up yet.
+
+When the replica cannot be connected to, reads fall back to the primary and
+the replica is left alone for REPLICA_RETRY_SECONDS before it is tried again.
+"""
+import logging
+import time
+from flask import current_app, has_request_context, request
+from flask_jwt_extended import get_jwt
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+PIN_PREFIX = "replica_pin:"
+
+# Keys in Session.info
+PINNED = "replica_pinned"
+WROTE = "replica_wrote"
+
+
+def _caller_identity():
+    try:
+        return get_jwt().get("sub")
+    except (RuntimeError, KeyError):
+        # No JWT was verified for this request.
+        return None
+
+
+def remember_writer(identity):
+    """Send the identity's reads to the primary until replicas have caught up."""
+    from app import cache
+
+    if identity and REPLICA_BIND in current_app.config.get("SQLALCHEMY_BINDS", {}):
+        cache.set(PIN_PREFIX + str(identity), 1, timeout=current_app.config["REPLICA_MAX_LAG"])
+
+
+def _wrote_recently(identity):
+    from app import cache
+
+    return identity is not None and bool(cache.get(PIN_PREFIX + str(identity)))
+
+
+def pin_to_primary(session=None):
+    """Read from the primary for the rest of the session."""
+    from app import db
+
+    (session or db.session).info[PINNED] = True
+
+
+def _replica_state():
+    return current_app.extensions.setdefault("replica", {"down_until": 0.0})
+
+
+def replica_available():
+    """Whether the replica has not failed within the last REPLICA_RETRY_SECONDS."""
+    return _replica_state()["down_until"] <= time.monotonic()
+
+
+def mark_replica_down():
+    _replica_state()["down_until"] = time.monotonic() + current_app.config["REPLICA_RETRY_SECONDS"]
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if getattr(clause, "is_dml", False):
+                self.info[PINNED] = self.info[WROTE] = True
+            elif self._reads_from_replica(clause) and self._connect_replica():
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _connect_replica(self):
+        """
+        Check out the session's replica connection, or fall back to the primary.
+
+        The connection stays in the session transaction, so the statement
+        that follows runs on it without a second checkout.
+        """
+        try:
+            self.connection(bind_arguments={"bind": self._db.engines[REPLICA_BIND]})
+        except DBAPIError as e:
+            logger.warning("Replica unavailable, reading from the primary: %s", e)
+            mark_replica_down()
+            self.info[PINNED] = True
+            return False
+        return True
+
+    def _reads_from_replica(self, clause):
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if REPLICA_BIND not in self._db.engines or not replica_available():
+            return False
+        if PINNED not in self.info:
+            # Checked once per session, on its first replica-eligible read.
+            self.info[PINNED] = _wrote_recently(_caller_identity())
+        return not self.info[PINNED]
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.info[PINNED] = session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer_after_commit(session):
+    if session.info.pop(WROTE, False) and has_request_context():
+        remember_writer(_caller_identity())
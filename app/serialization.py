@@ -0,0 +1,60 @@
+"""
+JSON serialization of API responses.
+
+Response bodies are encoded by the serializer named in JSON_SERIALIZER:
+"orjson" when the package is installed, otherwise the standard library.
+Both encode UUIDs, datetimes, dates and times natively (ISO 8601 for the
+date types), so handlers can return them as is. Times the API sends as
+HH:MM are still formatted by the handlers.
+"""
+import json
+import uuid
+from datetime import date, datetime, time
+from flask import make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(data):
+    return (json.dumps(data, default=_default) + "\n").encode()
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(data, default=_default, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+
+
+SERIALIZERS = {"json": _stdlib_dumps}
+if orjson is not None:
+    SERIALIZERS["orjson"] = _orjson_dumps
+
+_dumps = SERIALIZERS.get("orjson", _stdlib_dumps)
+
+
+def init_serialization(app):
+    """Select the serializer named by JSON_SERIALIZER, falling back to the standard library."""
+    global _dumps
+    _dumps = SERIALIZERS.get(app.config["JSON_SERIALIZER"], _stdlib_dumps)
+
+
+def dumps(data):
+    """Encode a response body as UTF-8 JSON bytes, with a trailing newline."""
+    return _dumps(data)
+
+
+def output_json(data, code, headers=None):
+    """flask_restx representation for application/json using the configured serializer."""
+    response = make_response(dumps(data), code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return response
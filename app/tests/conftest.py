@@ -0,0 +1,142 @@
+"""
+Shared fixtures for the app test suite.
+
+Tests run against TEST_DATABASE_URI (an in-memory SQLite database by
+default). Every request is checked against the statement budget its view
+declares with ``@query_budget``: going over raises QueryBudgetExceeded,
+which fails the test. Statements repeated within one request, the usual
+sign of an N+1 lazy load, are listed in the terminal summary.
+"""
+import itertools
+import os
+import tempfile
+import pytest
+from sqlalchemy import DefaultClause, text
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = os.getenv("TEST_DATABASE_URI", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-of-sufficient-length")
+os.environ["CACHE_TYPE"] = "SimpleCache"
+os.environ["QUERY_BUDGET_ENABLED"] = "True"
+os.environ["QUERY_BUDGET_RAISE"] = "True"
+os.environ["IMAGE_STORE_PATH"] = tempfile.mkdtemp(prefix="test-images-")
+
+repeated_statements = []
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app, db
+    from app.doctors.models import Doctor
+    from app.metrics.queries import request_report
+
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+
+    @flask_app.after_request
+    def collect_repeated_statements(response):
+        report = request_report()
+        if report["repeated"]:
+            repeated_statements.append(report)
+        return response
+
+    with flask_app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # SQLite has no sequences; give test doctors a random employee id instead.
+            Doctor.__table__.c.employee_id.server_default = DefaultClause(text("(abs(random()) % 2147483647)"))
+        db.create_all()
+
+    yield flask_app
+
+    with flask_app.app_context():
+        db.session.remove()
+        # Only this app's database; other tests may have registered more binds.
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _register_and_login(client, role, **fields):
+    number = next(_user_numbers)
+    user = {
+        "firstname": "Test",
+        "lastname": f"{role.capitalize()}{number}",
+        "email": f"{role}{number}@example.com",
+        "phone": f"07{number:08d}",
+        "password": "correct horse battery",
+        **fields,
+    }
+    if role == "doctor":
+        user.setdefault("specialization", "Cardiology")
+    else:
+        user.setdefault("date_of_birth", "1990-01-01")
+
+    response = client.post(f"/api/v1/{role}s/register", json=user)
+    assert response.status_code == 201, response.json
+    registered = response.json["data"][role]
+
+    credentials = {"email": user["email"], "password": user["password"]}
+    if role == "doctor":
+        credentials["employee_id"] = int(registered["employ_id"])
+    response = client.post(f"/api/v1/{role}s/login", json=credentials)
+    assert response.status_code == 200, response.json
+    tokens = response.json["data"]
+
+    return {
+        **user,
+        "id": registered["Id"],
+        "credentials": credentials,
+        "headers": bearer(tokens["accessToken"]),
+        "refresh_headers": bearer(tokens["refreshToken"]),
+    }
+
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in another user: make_user("patient") or make_user("doctor")."""
+    return lambda role, **fields: _register_and_login(client, role, **fields)
+
+
+@pytest.fixture
+def patient(client):
+    """A registered, logged-in patient."""
+    return _register_and_login(client, "patient")
+
+
+@pytest.fixture
+def doctor(client):
+    """A registered, logged-in doctor available on weekdays from 08:00 to 17:00."""
+    user = _register_and_login(client, "doctor")
+    response = client.post("/api/v1/doctors/availability", headers=user["headers"], json={
+        "availability_start": "08:00",
+        "availability_end": "17:00",
+        "days_available": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+    })
+    assert response.status_code == 200, response.json
+    return user
+
+
+@pytest.fixture
+def appointment(client, patient, doctor):
+    """An appointment of the patient fixture with the doctor fixture."""
+    response = client.post("/api/v1/appointments/book", headers=patient["headers"], json={
+        "doctor_id": doctor["id"], "date": "2030-01-07", "time": "09:00",
+    })
+    assert response.status_code == 201, response.json
+    return response.json["data"]
+
+
+def pytest_terminal_summary(terminalreporter):
+    from app.metrics.queries import format_report
+
+    if repeated_statements:
+        terminalreporter.section("repeated SQL statements")
+        for report in repeated_statements:
+            terminalreporter.write_line(format_report(report))
@@ -0,0 +1,133 @@
+import base64
+import json
+
+
+def test_book_and_list(client, patient, doctor, appointment):
+    response = client.get("/api/v1/appointments/", headers=patient["headers"])
+
+    assert response.status_code == 200
+    listed = response.json["data"]["appointments"]
+    assert [row["appointmentId"] for row in listed] == [appointment["appointmentId"]]
+
+    response = client.get("/api/v1/appointments/", headers=doctor["headers"])
+    assert [row["appointmentId"] for row in response.json["data"]["appointments"]] == [appointment["appointmentId"]]
+
+
+def test_list_rejects_malformed_cursors(client, patient, appointment):
+    for values in ([1, 2, 3], ["2030-01-07", "09:00:00"], {"date": "2030-01-07"}, ["a", "b", "c"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        response = client.get("/api/v1/appointments/", headers=patient["headers"], query_string={"cursor": cursor})
+
+        assert response.status_code == 400, values
+
+
+def test_book_rejects_taken_slot(client, patient, doctor, appointment):
+    response = client.post("/api/v1/appointments/book", headers=patient["headers"], json={
+        "doctor_id": doctor["id"], "date": "2030-01-07", "time": "09:00",
+    })
+
+    assert response.status_code == 409
+
+
+def test_book_validates_input(client, patient, doctor):
+    response = client.post("/api/v1/appointments/book", headers=patient["headers"], json={
+        "doctor_id": doctor["id"], "date": "07/01/2030", "time": "09:00",
+    })
+
+    assert response.status_code == 400
+
+
+def test_view(client, patient, appointment):
+    response = client.get(f"/api/v1/appointments/{appointment['appointmentId']}", headers=patient["headers"])
+
+    assert response.status_code == 200
+    assert response.json["data"]["time"] == "09:00"
+
+    repeated = client.get(
+        f"/api/v1/appointments/{appointment['appointmentId']}",
+        headers={**patient["headers"], "If-None-Match": response.headers["ETag"]},
+    )
+    assert repeated.status_code == 304
+
+
+def test_view_hides_other_patients_appointments(client, appointment, make_user):
+    other = make_user("patient")
+
+    response = client.get(f"/api/v1/appointments/{appointment['appointmentId']}", headers=other["headers"])
+
+    assert response.status_code == 403
+
+
+def test_reschedule(client, patient, doctor, appointment):
+    response = client.put(
+        f"/api/v1/appointments/reschedule/{appointment['appointmentId']}",
+        headers=patient["headers"], json={"date": "2030-01-08", "time": "10:30"},
+    )
+
+    assert response.status_code == 200
+    assert (response.json["data"]["date"], response.json["data"]["time"]) == ("2030-01-08", "10:30")
+
+    slots = client.get("/api/v1/doctors/slots", headers=patient["headers"], query_string={
+        "start_date": "2030-01-07", "end_date": "2030-01-08",
+    }).json["data"]["slots"]
+    free = {slot["date"]: slot["times"] for slot in slots if slot["doctor_id"] == doctor["id"]}
+    assert "09:00" in free["2030-01-07"]
+    assert "10:30" not in free["2030-01-08"]
+
+
+def test_cancel(client, patient, appointment):
+    response = client.delete(f"/api/v1/appointments/cancel/{appointment['appointmentId']}", headers=patient["headers"])
+
+    assert response.status_code == 200
+    assert client.get(
+        f"/api/v1/appointments/{appointment['appointmentId']}", headers=patient["headers"]
+    ).status_code == 404
+
+
+def test_batch(client, patient, doctor, appointment):
+    response = client.post("/api/v1/appointments/batch", headers=patient["headers"], json={"operations": [
+        {"op": "book", "doctor_id": doctor["id"], "date": "2030-01-09", "time": "11:00"},
+        {"op": "reschedule", "appointment_id": appointment["appointmentId"], "date": "2030-01-09", "time": "11:00"},
+        {"op": "cancel", "appointment_id": appointment["appointmentId"]},
+    ]})
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json["data"]["results"]] == ["success", "error", "success"]
+
+
+def test_batch_reports_item_errors_alongside_successes(client, patient, doctor, appointment, make_user):
+    other = make_user("patient")
+    foreign = client.post("/api/v1/appointments/book", headers=other["headers"], json={
+        "doctor_id": doctor["id"], "date": "2030-01-07", "time": "10:00",
+    }).json["data"]
+    day = [
+        {"op": "book", "doctor_id": doctor["id"], "date": "2030-01-14", "time": f"{hour:02d}:00"}
+        for hour in (9, 10, 11)
+    ]
+
+    response = client.post("/api/v1/appointments/batch", headers=patient["headers"], json={"operations": [
+        day[0],
+        {"op": "cancel", "appointment_id": foreign["appointmentId"]},
+        {"op": "book", "doctor_id": doctor["id"], "date": "2030-01-07", "time": "10:00"},
+        {"op": "reschedule", "appointment_id": appointment["appointmentId"], "date": "2030-01-07", "time": "10:00"},
+        {"op": "rebook", "appointment_id": appointment["appointmentId"]},
+        day[1],
+        {"op": "reschedule", "appointment_id": appointment["appointmentId"], "date": "2030-01-07", "time": "11:00"},
+        day[2],
+    ]})
+
+    assert response.status_code == 200
+    results = response.json["data"]["results"]
+    assert [(result["status"], result.get("code")) for result in results] == [
+        ("success", None), ("error", 403), ("error", 409), ("error", 409), ("error", 400),
+        ("success", None), ("success", None), ("success", None),
+    ]
+    assert response.json["message"] == "4 of 8 operations applied"
+
+    listed = client.get("/api/v1/appointments/", headers=patient["headers"]).json["data"]["appointments"]
+    assert sorted((row["date"], row["time"]) for row in listed) == [
+        ("2030-01-07", "11:00"), ("2030-01-14", "09:00"), ("2030-01-14", "10:00"), ("2030-01-14", "11:00"),
+    ]
+    assert client.get(
+        f"/api/v1/appointments/{foreign['appointmentId']}", headers=other["headers"]
+    ).status_code == 200
@@ -0,0 +1,114 @@
+"""
+The async hot read handlers against the Flask views they mirror.
+
+Both serve the same SQLite file, since an in-memory database is not shared
+between the sync and async engines.
+"""
+import asyncio
+import json
+import pytest
+from app import create_app, db
+from app.tests.conftest import _register_and_login
+
+pytest.importorskip("asgiref")
+pytest.importorskip("aiosqlite")
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+from app.async_api.handlers import create_asgi_app  # noqa: E402
+
+
+class CountingFallback:
+    """The Flask app behind WsgiToAsgi, counting the requests it is handed."""
+
+    def __init__(self, flask_app):
+        self.app = WsgiToAsgi(flask_app)
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.app(scope, receive, send)
+
+
+def _asgi_get(asgi_app, path, headers):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await asgi_app({
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        }, receive, send)
+        await asgi_app.shutdown()
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, json.loads(body)
+
+
+@pytest.fixture
+def served(app, tmp_path, monkeypatch):
+    """
+    An app on a SQLite file with a patient, a doctor and their appointment, and its ASGI wrapper.
+
+    Uses the app fixture for its SQLite schema adjustments.
+    """
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'asgi.db'}")
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+
+    client = flask_app.test_client()
+    patient = _register_and_login(client, "patient")
+    doctor = _register_and_login(client, "doctor")
+    client.post("/api/v1/doctors/availability", headers=doctor["headers"], json={
+        "availability_start": "08:00", "availability_end": "17:00", "days_available": ["Monday"],
+    })
+    booked = client.post("/api/v1/appointments/book", headers=patient["headers"], json={
+        "doctor_id": doctor["id"], "date": "2030-01-07", "time": "09:00",
+    })
+    assert booked.status_code == 201, booked.json
+
+    fallback = CountingFallback(flask_app)
+    yield flask_app, create_asgi_app(flask_app, fallback=fallback), fallback, patient, doctor
+
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize("path, user", [
+    ("/api/v1/appointments/", "patient"),
+    ("/api/v1/appointments/", "doctor"),
+    ("/api/v1/doctors/{doctor}", "patient"),
+    ("/api/v1/doctors/availability/{doctor}", "patient"),
+    ("/api/v1/doctors/profile", "doctor"),
+    ("/api/v1/patients/profile", "patient"),
+])
+def test_async_handlers_match_flask(served, path, user):
+    flask_app, asgi_app, fallback, patient, doctor = served
+    headers = {"patient": patient, "doctor": doctor}[user]["headers"]
+    path = path.format(doctor=doctor["id"])
+
+    expected = flask_app.test_client().get(path, headers=headers)
+    status, response_headers, body = _asgi_get(asgi_app, path, headers)
+
+    assert fallback.calls == 0
+    assert (status, body) == (expected.status_code, expected.json)
+    assert response_headers.get("etag") == expected.headers.get("ETag")
+
+
+def test_unauthenticated_reads_fall_back_to_flask(served):
+    flask_app, asgi_app, fallback, patient, doctor = served
+
+    status, _, _ = _asgi_get(asgi_app, "/api/v1/patients/profile", {})
+
+    assert fallback.calls == 1
+    assert status == flask_app.test_client().get("/api/v1/patients/profile").status_code == 401
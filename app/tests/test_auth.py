@@ -0,0 +1,62 @@
+import pytest
+from app.tests.conftest import bearer
+
+
+@pytest.mark.parametrize("role", ["patient", "doctor"])
+def test_register_rejects_duplicate_email(client, role, request):
+    user = request.getfixturevalue(role)
+    payload = {key: user[key] for key in ("firstname", "lastname", "email", "password")}
+    payload["phone"] = "0799999999"
+    payload.update({"specialization": "Cardiology"} if role == "doctor" else {"date_of_birth": "1990-01-01"})
+
+    response = client.post(f"/api/v1/{role}s/register", json=payload)
+
+    assert response.status_code == 400
+    assert {"field": "email", "message": "Email already in use"} in response.json["errors"]
+
+
+@pytest.mark.parametrize("role", ["patient", "doctor"])
+def test_login_rejects_wrong_password(client, role, request):
+    user = request.getfixturevalue(role)
+
+    response = client.post(f"/api/v1/{role}s/login", json={**user["credentials"], "password": "wrong"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("role", ["patient", "doctor"])
+def test_refresh_issues_access_token(client, role, request):
+    user = request.getfixturevalue(role)
+
+    response = client.post(f"/api/v1/{role}s/refresh", headers=user["refresh_headers"])
+
+    assert response.status_code == 200
+    profile = client.get(f"/api/v1/{role}s/profile", headers=bearer(response.json["data"]["accessToken"]))
+    assert profile.status_code == 200
+
+
+def test_refresh_rejects_access_token(client, patient):
+    response = client.post("/api/v1/patients/refresh", headers=patient["headers"])
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("role", ["patient", "doctor"])
+def test_logout_revokes_access_and_refresh_tokens(client, role, request):
+    user = request.getfixturevalue(role)
+    refreshed = client.post(f"/api/v1/{role}s/refresh", headers=user["refresh_headers"]).json["data"]["accessToken"]
+
+    response = client.post(f"/api/v1/{role}s/logout", headers=user["headers"])
+
+    assert response.status_code == 200
+    assert client.get(f"/api/v1/{role}s/profile", headers=user["headers"]).status_code == 401
+    assert client.get(f"/api/v1/{role}s/profile", headers=bearer(refreshed)).status_code == 401
+    assert client.post(f"/api/v1/{role}s/refresh", headers=user["refresh_headers"]).status_code == 401
+
+
+def test_logout_keeps_other_logins(client, patient):
+    other = client.post("/api/v1/patients/login", json=patient["credentials"]).json["data"]
+
+    client.post("/api/v1/patients/logout", headers=patient["headers"])
+
+    assert client.get("/api/v1/patients/profile", headers=bearer(other["accessToken"])).status_code == 200
@@ -0,0 +1,62 @@
+import uuid
+from datetime import date, time
+import pytest
+from app import db
+from app.appointments import booking
+from app.appointments.models import Appointment
+
+DAY = date(2030, 1, 7)
+
+
+@pytest.fixture(params=["upsert", "savepoint"])
+def insert_path(request, monkeypatch):
+    """Book through INSERT ... ON CONFLICT, or through the savepoint used on other dialects."""
+    if request.param == "savepoint":
+        monkeypatch.setattr(booking, "_UPSERT_DIALECTS", {})
+    return request.param
+
+
+@pytest.fixture
+def ids(patient, doctor):
+    return uuid.UUID(patient["id"]), uuid.UUID(doctor["id"])
+
+
+def test_second_booking_of_an_active_slot_is_refused(app, ids, insert_path):
+    patient_id, doctor_id = ids
+
+    with app.app_context():
+        first = booking.book_slot(patient_id, doctor_id, DAY, time(9, 0))
+        second = booking.book_slot(patient_id, doctor_id, DAY, time(9, 0))
+        db.session.commit()
+
+        assert first is not None and first.status == "booked"
+        assert second is None
+        assert Appointment.query.filter_by(doctor_id=doctor_id, date=DAY).count() == 1
+
+
+def test_cancelled_appointments_free_their_slot(app, ids, insert_path):
+    patient_id, doctor_id = ids
+
+    with app.app_context():
+        first = booking.book_slot(patient_id, doctor_id, DAY, time(9, 0))
+        first.status = "cancelled"
+        db.session.flush()
+
+        assert booking.book_slot(patient_id, doctor_id, DAY, time(9, 0)) is not None
+        db.session.commit()
+
+
+def test_book_slots_skips_taken_slots(app, ids, insert_path):
+    patient_id, doctor_id = ids
+
+    with app.app_context():
+        booking.book_slot(patient_id, doctor_id, DAY, time(10, 0))
+        booked = booking.book_slots([
+            (patient_id, doctor_id, DAY, time(9, 0)),
+            (patient_id, doctor_id, DAY, time(10, 0)),
+            (patient_id, doctor_id, DAY, time(11, 0)),
+        ])
+        db.session.commit()
+
+        assert [row and row["time"] for row in booked] == [time(9, 0), None, time(11, 0)]
+        assert Appointment.query.filter_by(doctor_id=doctor_id, date=DAY).count() == 3
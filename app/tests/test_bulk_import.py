@@ -0,0 +1,126 @@
+import io
+import itertools
+import json
+import uuid
+import pytest
+from flask_jwt_extended import create_access_token
+from app.auth.bulk_import import import_users, read_rows
+from app.patients.models import Patient
+from app.tests.conftest import bearer
+
+_phones = itertools.count(1)
+
+
+def _person(**fields):
+    number = next(_phones)
+    return {
+        "firstname": "Imported",
+        "lastname": f"Patient{number}",
+        "email": f"imported{number}-{uuid.uuid4().hex[:6]}@example.com",
+        "phone": f"079{number:07d}",
+        "password": "correct horse battery",
+        "date_of_birth": "1990-01-01",
+        **fields,
+    }
+
+
+def _csv(rows):
+    fields = list(rows[0])
+    lines = [",".join(fields)] + [",".join(row.get(field, "") for field in fields) for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+def _jsonl(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        return bearer(create_access_token(identity=str(uuid.uuid4()), additional_claims={"role": "admin"}))
+
+
+def test_read_rows_parses_csv():
+    rows = list(read_rows(io.StringIO("firstname,email\n Ann ,ann@example.com\nBob,\n"), "csv"))
+
+    assert rows == [
+        (1, {"firstname": "Ann", "email": "ann@example.com"}, []),
+        (2, {"firstname": "Bob", "email": ""}, []),
+    ]
+
+
+def test_read_rows_parses_jsonl_and_flags_non_objects():
+    rows = list(read_rows(io.StringIO('{"firstname": "Ann"}\n\n[1, 2]\nnot json\n'), "jsonl"))
+
+    assert [(number, data) for number, data, _ in rows] == [(1, {"firstname": "Ann"}), (2, {}), (3, {})]
+    assert rows[0][2] == []
+    assert [error["field"] for _, _, errors_list in rows[1:] for error in errors_list] == ["row", "row"]
+
+
+def test_import_reports_duplicates_and_conflicts_by_row(app, patient):
+    first = _person()
+    rows = [
+        first,
+        _person(email=first["email"]),
+        _person(email=patient["email"]),
+        _person(phone="12345"),
+        _person(),
+    ]
+
+    with app.app_context():
+        report = import_users(read_rows(io.StringIO(_jsonl(rows)), "jsonl"), "patient", chunk_size=2, processes=1)
+
+    assert (report["processed"], report["imported"], report["failed"]) == (5, 2, 3)
+    errors = {error["row"]: error["errors"] for error in report["errors"]}
+    assert sorted(errors) == [2, 3, 4]
+    assert errors[2] == [{"field": "email", "message": "Email already in use earlier in this file"}]
+    assert {"field": "email", "message": "Email already in use"} in errors[3]
+    assert errors[4] == [{"field": "phone", "message": "Phone number is invalid"}]
+
+
+def test_imported_users_can_log_in(app, client):
+    person = _person()
+
+    with app.app_context():
+        report = import_users(read_rows(io.StringIO(_csv([person])), "csv"), "patient", processes=1)
+
+    assert report["imported"] == 1
+    response = client.post("/api/v1/patients/login", json={"email": person["email"], "password": person["password"]})
+    assert response.status_code == 200
+
+
+def test_admin_import_endpoint(client, admin_headers):
+    rows = [_person(), _person()]
+
+    response = client.post(
+        "/api/v1/admin/import/patients", headers=admin_headers,
+        data={"file": (io.BytesIO(_jsonl(rows).encode()), "patients.jsonl")},
+    )
+
+    assert response.status_code == 200, response.json
+    assert (response.json["data"]["imported"], response.json["data"]["failed"]) == (2, 0)
+
+
+def test_admin_import_checks_role_collection_and_format(client, patient, admin_headers):
+    body = _csv([_person()]).encode()
+
+    assert client.post("/api/v1/admin/import/patients", headers=patient["headers"], data=body).status_code == 403
+    assert client.post("/api/v1/admin/import/nurses", headers=admin_headers, data=body).status_code == 404
+    response = client.post(
+        "/api/v1/admin/import/patients", headers=admin_headers, data=body, query_string={"format": "xml"}
+    )
+    assert response.status_code == 400
+
+
+def test_admin_import_refuses_large_uploads(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "IMPORT_HTTP_MAX_ROWS", 2)
+    rows = [_person(), _person(), _person()]
+
+    too_many = client.post("/api/v1/admin/import/patients", headers=admin_headers, data=_csv(rows).encode())
+    monkeypatch.setitem(app.config, "IMPORT_HTTP_MAX_BYTES", 10)
+    too_big = client.post("/api/v1/admin/import/patients", headers=admin_headers, data=_csv(rows[:1]).encode())
+
+    assert too_many.status_code == 413
+    assert too_big.status_code == 413
+    with app.app_context():
+        assert Patient.query.filter(Patient.email.in_([row["email"] for row in rows])).count() == 0
@@ -0,0 +1,102 @@
+import pytest
+from app import cache
+from app.caching import (
+    LOCK_PREFIX, cache_stats, cached_response, invalidate_tags, local_cache, make_cache_key, reset_cache_stats,
+    tag_versions,
+)
+
+
+@pytest.fixture(params=["SimpleCache", "FileSystemCache"])
+def backend(request, app, tmp_path):
+    """Run the test against each backend, then restore the app's cache."""
+    original = app.extensions["cache"][cache]
+    cache.init_app(app, config={"CACHE_TYPE": request.param, "CACHE_DIR": str(tmp_path), "CACHE_THRESHOLD": 500})
+    local_cache.clear()
+    reset_cache_stats()
+    assert type(app.extensions["cache"][cache]).__name__ == request.param
+    yield request.param
+    app.extensions["cache"][cache] = original
+    local_cache.clear()
+    reset_cache_stats()
+
+
+@pytest.fixture
+def doctor_view():
+    """A cached view counting how often it really runs."""
+    calls = []
+
+    @cached_response("test_doctor", tags=lambda doctor_id: [f"doctor:{doctor_id}"])
+    def view(doctor_id):
+        calls.append(doctor_id)
+        return {"doctor": doctor_id, "computed": len(calls)}, 200
+
+    view.calls = calls
+    return view
+
+
+def _call(app, view, **kwargs):
+    with app.test_request_context("/"):
+        return view(**kwargs)
+
+
+def _key(app, doctor_id):
+    with app.test_request_context("/"):
+        tags = [f"doctor:{doctor_id}"]
+        return make_cache_key("test_doctor", {"doctor_id": doctor_id}, tags, tag_versions(tags))
+
+
+def test_invalidating_a_tag_orphans_its_entries(app, backend, doctor_view):
+    _call(app, doctor_view, doctor_id="a")
+    _call(app, doctor_view, doctor_id="b")
+    assert _call(app, doctor_view, doctor_id="a") == ({"doctor": "a", "computed": 1}, 200)
+
+    with app.test_request_context("/"):
+        invalidate_tags("doctor:a")
+
+    assert _call(app, doctor_view, doctor_id="a") == ({"doctor": "a", "computed": 3}, 200)
+    assert _call(app, doctor_view, doctor_id="b") == ({"doctor": "b", "computed": 2}, 200)
+    assert doctor_view.calls == ["a", "b", "a"]
+
+
+def test_stale_entry_is_served_while_another_worker_recomputes(app, backend, doctor_view):
+    key = _key(app, "a")
+    with app.test_request_context("/"):
+        cache.set(key, {"body": {"doctor": "a", "computed": 0}, "status": 200, "fresh_until": 0}, timeout=60)
+        # Another worker holds the recompute lock.
+        cache.add(LOCK_PREFIX + key, 1, timeout=60)
+
+    assert _call(app, doctor_view, doctor_id="a") == ({"doctor": "a", "computed": 0}, 200)
+    assert doctor_view.calls == []
+    assert cache_stats()["test_doctor"]["stale_hits"] == 1
+
+    with app.test_request_context("/"):
+        cache.delete(LOCK_PREFIX + key)
+
+    assert _call(app, doctor_view, doctor_id="a") == ({"doctor": "a", "computed": 1}, 200)
+    with app.test_request_context("/"):
+        assert not cache.has(LOCK_PREFIX + key)
+
+
+def test_lookups_are_counted_per_tier(app, backend, doctor_view):
+    _call(app, doctor_view, doctor_id="a")
+    _call(app, doctor_view, doctor_id="a")
+    local_cache.clear()
+    _call(app, doctor_view, doctor_id="a")
+    _call(app, doctor_view, doctor_id="a")
+
+    stats = cache_stats()["test_doctor"]
+    assert (stats["misses"], stats["l1_hits"], stats["l2_hits"], stats["stale_hits"]) == (1, 2, 1, 0)
+    assert stats["l1_hit_ratio"] == 0.5
+    assert stats["l2_hit_ratio"] == 0.5
+    assert doctor_view.calls == ["a"]
+
+
+def test_lookups_skip_l1_when_disabled(app, backend, doctor_view, monkeypatch):
+    monkeypatch.setitem(app.config, "CACHE_L1_ENABLED", False)
+
+    for _ in range(3):
+        _call(app, doctor_view, doctor_id="a")
+
+    stats = cache_stats()["test_doctor"]
+    assert (stats["misses"], stats["l1_hits"], stats["l2_hits"]) == (1, 0, 2)
+    assert len(local_cache) == 0
@@ -0,0 +1,95 @@
+import gzip
+import json
+import uuid
+from datetime import date, datetime, time
+import pytest
+from flask import Response
+from app.compression import brotli
+from app.serialization import SERIALIZERS
+
+PROFILE = "/api/v1/patients/profile"
+
+
+@pytest.fixture
+def compress_response(app):
+    """The after_request hook init_compression registered."""
+    return next(hook for hook in app.after_request_funcs[None] if hook.__name__ == "compress_response")
+
+
+@pytest.fixture
+def small_min_size(app, monkeypatch):
+    monkeypatch.setitem(app.config, "COMPRESSION_MIN_SIZE", 1)
+
+
+@pytest.mark.parametrize("name", sorted(SERIALIZERS))
+def test_serializers_encode_the_same_json(name):
+    record_id = uuid.uuid4()
+    body = {
+        "id": record_id, "created": datetime(2030, 1, 7, 9, 30), "date": date(2030, 1, 7), "time": time(9, 30),
+        "counts": {1: "one"}, "name": "Zoë",
+    }
+
+    payload = SERIALIZERS[name](body)
+
+    assert payload.endswith(b"\n")
+    assert json.loads(payload) == {
+        "id": str(record_id), "created": "2030-01-07T09:30:00", "date": "2030-01-07", "time": "09:30:00",
+        "counts": {"1": "one"}, "name": "Zoë",
+    }
+
+
+@pytest.mark.parametrize("name", sorted(SERIALIZERS))
+def test_serializers_refuse_unknown_types(name):
+    with pytest.raises(TypeError):
+        SERIALIZERS[name]({"value": object()})
+
+
+@pytest.mark.parametrize("encoding, decompress", [
+    ("gzip", gzip.decompress),
+    pytest.param("br", brotli and brotli.decompress, marks=pytest.mark.skipif(brotli is None, reason="no brotli")),
+])
+def test_large_responses_are_compressed(client, patient, small_min_size, encoding, decompress):
+    plain = client.get(PROFILE, headers=patient["headers"])
+
+    response = client.get(PROFILE, headers={**patient["headers"], "Accept-Encoding": encoding})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(decompress(response.data)) == plain.json
+    assert response.headers["ETag"] == "W/" + plain.headers["ETag"]
+
+    repeated = client.get(PROFILE, headers={
+        **patient["headers"], "Accept-Encoding": encoding, "If-None-Match": response.headers["ETag"],
+    })
+    assert repeated.status_code == 304
+
+
+def test_small_responses_are_left_alone(app, client, patient, monkeypatch):
+    monkeypatch.setitem(app.config, "COMPRESSION_MIN_SIZE", 1024 * 1024)
+
+    response = client.get(PROFILE, headers={**patient["headers"], "Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert not response.headers["ETag"].startswith("W/")
+
+
+def test_error_responses_are_left_alone(client, patient, small_min_size):
+    response = client.get(f"/api/v1/appointments/{uuid.uuid4()}", headers={
+        **patient["headers"], "Accept-Encoding": "gzip",
+    })
+
+    assert response.status_code == 404
+    assert "Content-Encoding" not in response.headers
+    assert response.json["status"] == "error"
+
+
+def test_streamed_responses_are_left_alone(app, compress_response, small_min_size):
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+        response = compress_response(Response(iter([b'{"a": ', b'"b"}']), mimetype="application/json"))
+
+        assert response.is_streamed
+        assert "Content-Encoding" not in response.headers
+        assert b"".join(response.response) == b'{"a": "b"}'
@@ -0,0 +1,124 @@
+import base64
+import json
+from app.tests.conftest import bearer
+
+
+def test_directory_lists_registered_doctor(client, patient, doctor):
+    response = client.get("/api/v1/doctors/", headers=patient["headers"], query_string={"q": doctor["lastname"]})
+
+    assert response.status_code == 200
+    assert [row["doctor_id"] for row in response.json["data"]] == [doctor["id"]]
+
+
+def test_directory_rejects_malformed_cursors(client, patient, doctor):
+    for values in ([1, 2, 3], [doctor["lastname"], "Test"], [doctor["lastname"], "Test", "not-a-uuid"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        response = client.get("/api/v1/doctors/", headers=patient["headers"], query_string={"cursor": cursor})
+
+        assert response.status_code == 400, values
+
+
+def test_directory_filters_by_availability(client, patient, doctor):
+    def listed(**query):
+        response = client.get(
+            "/api/v1/doctors/", headers=patient["headers"], query_string={"q": doctor["lastname"], **query}
+        )
+        return response.status_code, [row["doctor_id"] for row in response.json.get("data", [])]
+
+    assert listed(weekday="tuesday", time="10:00") == (200, [doctor["id"]])
+    assert listed(weekday="tue", time="08:00") == (200, [doctor["id"]])
+    assert listed(weekday="tuesday", time="17:00")[0] == 404
+    assert listed(weekday="saturday", time="10:00")[0] == 404
+    assert listed(weekday="funday", time="10:00")[0] == 400
+    assert listed(weekday="tuesday")[0] == 400
+
+
+def test_slot_search_skips_booked_slots(client, patient, doctor, appointment):
+    response = client.get("/api/v1/doctors/slots", headers=patient["headers"], query_string={
+        "start_date": "2030-01-07", "end_date": "2030-01-13", "slot_minutes": 60,
+    })
+
+    assert response.status_code == 200
+    slots = [slot for slot in response.json["data"]["slots"] if slot["doctor_id"] == doctor["id"]]
+    assert [slot["date"] for slot in slots] == ["2030-01-07", "2030-01-08", "2030-01-09", "2030-01-10", "2030-01-11"]
+    assert "09:00" not in slots[0]["times"]
+    assert "09:00" in slots[1]["times"]
+
+
+def test_slot_search_validates_dates(client, patient):
+    response = client.get("/api/v1/doctors/slots", headers=patient["headers"], query_string={
+        "start_date": "2030-01-07", "end_date": "2030-01-01",
+    })
+
+    assert response.status_code == 400
+
+
+def test_set_availability_rejects_unknown_day(client, doctor):
+    response = client.post("/api/v1/doctors/availability", headers=doctor["headers"], json={
+        "availability_start": "08:00", "availability_end": "12:00", "days_available": ["Funday"],
+    })
+
+    assert response.status_code == 400
+
+
+def test_availability_and_details(client, patient, doctor):
+    availability = client.get(f"/api/v1/doctors/availability/{doctor['id']}", headers=patient["headers"])
+    details = client.get(f"/api/v1/doctors/{doctor['id']}", headers=patient["headers"])
+
+    assert availability.status_code == 200
+    assert availability.json["data"]["days_available"] == ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    assert details.status_code == 200
+    assert details.json["data"]["lastname"] == doctor["lastname"]
+
+
+def test_details_answer_conditional_get(client, patient, doctor):
+    first = client.get(f"/api/v1/doctors/{doctor['id']}", headers=patient["headers"])
+
+    repeated = client.get(
+        f"/api/v1/doctors/{doctor['id']}", headers={**patient["headers"], "If-None-Match": first.headers["ETag"]}
+    )
+
+    assert repeated.status_code == 304
+
+
+def test_availability_update_invalidates_details(client, patient, doctor):
+    client.get(f"/api/v1/doctors/availability/{doctor['id']}", headers=patient["headers"])
+
+    client.post("/api/v1/doctors/availability", headers=doctor["headers"], json={
+        "availability_start": "09:00", "availability_end": "12:00", "days_available": ["Saturday"],
+    })
+
+    response = client.get(f"/api/v1/doctors/availability/{doctor['id']}", headers=patient["headers"])
+    assert response.json["data"]["days_available"] == ["Saturday"]
+    assert response.json["data"]["availability_start"] == "09:00:00"
+
+
+def test_profile(client, doctor):
+    response = client.get("/api/v1/doctors/profile", headers=doctor["headers"])
+
+    assert response.status_code == 200
+    assert response.json["data"]["email"] == doctor["email"]
+
+
+def test_profile_update_after_availability_change(client, doctor):
+    client.post("/api/v1/doctors/availability", headers=doctor["headers"], json={
+        "availability_start": "10:00", "availability_end": "11:00", "days_available": ["Monday"],
+    })
+
+    response = client.put("/api/v1/doctors/profile", headers=doctor["headers"], json={"firstname": "Renamed"})
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/doctors/profile", headers=doctor["headers"]).json["data"]["firstname"] == "Renamed"
+
+
+def test_doctor_routes_reject_patients(client, patient):
+    response = client.post("/api/v1/doctors/availability", headers=patient["headers"], json={
+        "availability_start": "08:00", "availability_end": "12:00", "days_available": ["Monday"],
+    })
+
+    assert response.status_code == 403
+
+
+def test_doctor_routes_require_token(client):
+    assert client.get("/api/v1/doctors/").status_code == 401
+    assert client.get("/api/v1/doctors/profile", headers=bearer("not-a-token")).status_code == 422
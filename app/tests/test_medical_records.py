@@ -0,0 +1,78 @@
+import base64
+import json
+
+
+def _append(client, doctor, patient, **record):
+    return client.post(f"/api/v1/medical-records/{patient['id']}", headers=doctor["headers"], json=record)
+
+
+def test_append_and_page_history(client, patient, doctor, appointment):
+    for reading in (120, 125, 130):
+        response = _append(client, doctor, patient, kind="vitals", data={"systolic": reading})
+        assert response.status_code == 201
+
+    first = client.get(
+        f"/api/v1/medical-records/{patient['id']}", headers=patient["headers"], query_string={"limit": 2}
+    ).json["data"]
+    second = client.get(
+        f"/api/v1/medical-records/{patient['id']}", headers=patient["headers"],
+        query_string={"limit": 2, "cursor": first["nextCursor"]},
+    ).json["data"]
+
+    readings = [record["data"]["systolic"] for record in first["records"] + second["records"]]
+    assert readings == [130, 125, 120]
+    assert second["nextCursor"] is None
+
+
+def test_history_rejects_malformed_cursors(client, patient, doctor, appointment):
+    for values in ([1, 2], ["2030-01-07T09:00:00"], ["yesterday", "not-a-uuid"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        response = client.get(
+            f"/api/v1/medical-records/{patient['id']}", headers=patient["headers"], query_string={"cursor": cursor}
+        )
+
+        assert response.status_code == 400, values
+
+
+def test_summary_follows_appends(client, patient, doctor, appointment):
+    _append(client, doctor, patient, kind="allergy", data={"substance": "Penicillin"})
+    _append(client, doctor, patient, kind="prescription", data={"medication": "Amoxicillin"})
+    assert client.get(f"/api/v1/medical-records/{patient['id']}/summary", headers=patient["headers"]).status_code == 200
+
+    _append(client, doctor, patient, kind="prescription", data={"medication": "Amoxicillin", "status": "stopped"})
+
+    summary = client.get(f"/api/v1/medical-records/{patient['id']}/summary", headers=patient["headers"]).json["data"]
+    assert [allergy["substance"] for allergy in summary["allergies"]] == ["Penicillin"]
+    assert summary["activePrescriptions"] == []
+    assert summary["recordCount"] == 3
+
+
+def test_export_streams_history(client, patient, doctor, appointment):
+    _append(client, doctor, patient, kind="note", data={"text": "first"})
+    _append(client, doctor, patient, kind="note", data={"text": "second"})
+
+    response = client.get(f"/api/v1/medical-records/{patient['id']}/export", headers=doctor["headers"])
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert len(response.data.splitlines()) == 2
+
+
+def test_append_validates_record(client, patient, doctor, appointment):
+    assert _append(client, doctor, patient, kind="gossip", data={"text": "x"}).status_code == 400
+    assert _append(client, doctor, patient, kind="allergy", data={"reaction": "rash"}).status_code == 400
+
+
+def test_records_need_a_treating_doctor(client, patient, make_user):
+    stranger = make_user("doctor")
+
+    assert _append(client, stranger, patient, kind="note", data={"text": "x"}).status_code == 403
+    assert client.get(f"/api/v1/medical-records/{patient['id']}", headers=stranger["headers"]).status_code == 403
+
+
+def test_patients_cannot_read_other_records(client, patient, make_user):
+    other = make_user("patient")
+
+    response = client.get(f"/api/v1/medical-records/{patient['id']}", headers=other["headers"])
+
+    assert response.status_code == 403
@@ -0,0 +1,131 @@
+import os
+import pytest
+from app import cache, db
+from app.metrics.instrumentation import QUEUE_DEPTH_CACHE_KEY, collect_families
+from app.metrics.multiprocess import mark_process_dead, merge_snapshots, snapshot_writer, write_snapshot
+from app.notifications.models import OutboundEmail
+from app.notifications.queue import enqueue_email
+from app.tests.conftest import bearer
+
+TOKEN = "scrape-token"
+
+
+@pytest.fixture
+def scrape(app, client, monkeypatch):
+    """Fetch /metrics with the configured token and return {sample: value}."""
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", TOKEN)
+
+    def fetch():
+        response = client.get("/metrics", headers=bearer(TOKEN))
+        assert response.status_code == 200, response.data
+        samples = {}
+        for line in response.get_data(as_text=True).splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+    return fetch
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    """Share metrics through a snapshot directory, as gunicorn workers do with METRICS_DIR."""
+    monkeypatch.setattr(snapshot_writer, "directory", str(tmp_path))
+    monkeypatch.setattr(snapshot_writer, "collect", collect_families)
+    return tmp_path
+
+
+def test_metrics_are_denied_without_a_configured_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", None)
+    assert client.get("/metrics", headers=bearer("anything")).status_code == 403
+
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", TOKEN)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=bearer("wrong")).status_code == 401
+    assert client.get("/metrics", headers=bearer(TOKEN)).status_code == 200
+
+
+def test_metrics_sum_the_counters_of_every_worker(app, client, patient, scrape, metrics_dir):
+    client.get("/api/v1/patients/profile", headers=patient["headers"])
+    latency = 'http_request_duration_seconds_count{method="GET",endpoint="patients_patient_profile",status="200"}'
+    alone = scrape()
+
+    # Another worker that has served exactly what this one has, with one connection checked out.
+    with app.app_context():
+        families = collect_families() + [("worker_connections", "gauge", "Connections in use.", [("", [], 1)])]
+        write_snapshot(str(metrics_dir), families, pid=1)
+    both = scrape()
+    assert both[latency] == 2 * alone[latency] > 0
+    assert both["worker_connections"] == 1
+
+    # Once it exits its counters stay, but its gauges are dropped.
+    mark_process_dead(str(metrics_dir), 1)
+    after_exit = scrape()
+    assert after_exit[latency] == both[latency]
+    assert "worker_connections" not in after_exit
+
+
+def test_exited_workers_share_one_snapshot(app, client, patient, scrape, metrics_dir):
+    client.get("/api/v1/patients/profile", headers=patient["headers"])
+    latency = 'http_request_duration_seconds_count{method="GET",endpoint="patients_patient_profile",status="200"}'
+    alone = scrape()
+
+    with app.app_context():
+        families = collect_families()
+    for pid in (1, 2, 3):
+        write_snapshot(str(metrics_dir), families, pid=pid)
+        mark_process_dead(str(metrics_dir), pid)
+
+    assert {path.name for path in metrics_dir.glob("*.json")} == {"metrics_dead.json", f"metrics_{os.getpid()}.json"}
+    assert scrape()[latency] == 4 * alone[latency]
+
+
+def test_a_worker_folded_during_a_scrape_is_counted_once(app, metrics_dir):
+    with app.app_context():
+        families = collect_families()
+    write_snapshot(str(metrics_dir), families, pid=1)
+    write_snapshot(str(metrics_dir), families, pid=2)
+    once = merge_snapshots(str(metrics_dir))
+
+    # The dead snapshot is written before the worker's own is removed.
+    mark_process_dead(str(metrics_dir), 1)
+    write_snapshot(str(metrics_dir), families, pid=1)
+
+    assert merge_snapshots(str(metrics_dir)) == once
+
+
+def test_query_counts_are_merged_across_workers(app, client, patient, scrape, metrics_dir):
+    client.get("/api/v1/patients/profile", headers=patient["headers"])
+    queries = 'http_request_db_queries_count{endpoint="patients_patient_profile"}'
+    statements = 'http_request_db_queries_sum{endpoint="patients_patient_profile"}'
+    query_time = 'http_request_db_seconds_count{endpoint="patients_patient_profile"}'
+    alone = scrape()
+    assert alone[statements] > 0
+
+    with app.app_context():
+        write_snapshot(str(metrics_dir), collect_families(), pid=1)
+    both = scrape()
+    for sample in (queries, statements, query_time):
+        assert both[sample] == 2 * alone[sample]
+
+
+def test_email_queue_depth_is_cached(app, scrape):
+    with app.app_context():
+        cache.delete(QUEUE_DEPTH_CACHE_KEY)
+        OutboundEmail.query.delete()
+        db.session.commit()
+    assert scrape()["email_outbox_depth"] == 0
+
+    with app.app_context():
+        enqueue_email(subject="Queued", recipient="queued@example.com", body="Waiting.")
+        db.session.commit()
+    assert scrape()["email_outbox_depth"] == 0
+
+    with app.app_context():
+        cache.delete(QUEUE_DEPTH_CACHE_KEY)
+    assert scrape()["email_outbox_depth"] == 1
+
+    with app.app_context():
+        OutboundEmail.query.delete()
+        db.session.commit()
+        cache.delete(QUEUE_DEPTH_CACHE_KEY)
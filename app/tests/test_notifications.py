@@ -0,0 +1,142 @@
+"""
+The notification outbox and the mail worker, against a local SMTP server.
+"""
+import socket
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.notifications.models import DeadLetterEmail, OutboundEmail
+from app.notifications.queue import enqueue_email
+from app.notifications.worker import drain_outbox
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+REJECTED = "bounce@example.com"
+
+
+class RecordingHandler:
+    """Keep every delivered envelope; refuse mail for REJECTED."""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REJECTED:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    """A debug SMTP server the mail worker delivers to, with an empty outbox."""
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+
+    state = app.extensions["mail"]
+    for name, value in {
+        "server": controller.hostname, "port": controller.port, "use_tls": False, "use_ssl": False,
+        "username": None, "password": None, "suppress": False, "default_sender": "noreply@example.com",
+    }.items():
+        monkeypatch.setattr(state, name, value)
+    monkeypatch.setitem(app.config, "MAIL_DEFAULT_SENDER", "noreply@example.com")
+
+    with app.app_context():
+        OutboundEmail.query.delete()
+        DeadLetterEmail.query.delete()
+        db.session.commit()
+
+    yield controller, handler
+    controller.stop()
+
+
+def _outbox(app):
+    with app.app_context():
+        return OutboundEmail.query.all()
+
+
+def test_enqueued_email_is_only_kept_when_committed(app, smtp_server):
+    with app.app_context():
+        enqueue_email(subject="Dropped", recipient="dropped@example.com", body="Rolled back.")
+        db.session.rollback()
+        enqueue_email(subject="Kept", recipient="kept@example.com", body="Committed.")
+        assert enqueue_email(subject="Nobody", recipient=None, body="No recipient.") is None
+        db.session.commit()
+
+    assert [email.subject for email in _outbox(app)] == ["Kept"]
+
+
+def test_booking_queues_its_confirmation_until_the_relay_delivers_it(app, smtp_server, appointment, patient):
+    _, handler = smtp_server
+    assert [(email.recipient, email.subject) for email in _outbox(app)] == [
+        (patient["email"], "Appointment Confirmation"),
+    ]
+    assert handler.envelopes == []
+
+    with app.app_context():
+        assert drain_outbox() == (1, 0)
+
+    assert _outbox(app) == []
+    [envelope] = handler.envelopes
+    assert envelope.mail_from == "noreply@example.com"
+    assert envelope.rcpt_tos == [patient["email"]]
+    message = envelope.content.decode()
+    assert "Subject: Appointment Confirmation" in message
+    assert "Your appointment is booked for 2030-01-07 at 09:00." in message
+
+
+def test_refused_email_backs_off_then_moves_to_the_dead_letter(app, smtp_server, monkeypatch):
+    _, handler = smtp_server
+    monkeypatch.setitem(app.config, "MAIL_QUEUE_MAX_ATTEMPTS", 2)
+    with app.app_context():
+        enqueue_email(subject="Refused", recipient=REJECTED, body="Never delivered.")
+        enqueue_email(subject="Delivered", recipient="patient@example.com", body="Delivered.")
+        db.session.commit()
+
+        assert drain_outbox() == (1, 1)
+        [email] = OutboundEmail.query.all()
+        assert (email.recipient, email.attempts) == (REJECTED, 1)
+        assert "550" in email.last_error
+        assert email.next_attempt_at > datetime.utcnow()
+
+        # Not due yet: the worker leaves it alone.
+        assert drain_outbox() == (0, 0)
+
+        email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert drain_outbox() == (0, 1)
+
+        assert OutboundEmail.query.count() == 0
+        [dead] = DeadLetterEmail.query.all()
+        assert (dead.recipient, dead.subject, dead.attempts) == (REJECTED, "Refused", 2)
+        assert "550" in dead.last_error
+
+    assert [envelope.rcpt_tos for envelope in handler.envelopes] == [["patient@example.com"]]
+
+
+def test_unreachable_server_reschedules_the_whole_batch(app, smtp_server, monkeypatch):
+    controller, handler = smtp_server
+    monkeypatch.setattr(app.extensions["mail"], "port", _free_port())
+    with app.app_context():
+        enqueue_email(subject="First", recipient="first@example.com", body="Later.")
+        enqueue_email(subject="Second", recipient="second@example.com", body="Later.")
+        db.session.commit()
+
+        assert drain_outbox() == (0, 2)
+        emails = OutboundEmail.query.all()
+        assert [email.attempts for email in emails] == [1, 1]
+        assert all(email.next_attempt_at > datetime.utcnow() for email in emails)
+
+    assert handler.envelopes == []
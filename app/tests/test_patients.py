@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import pytest
+
+# A 1x1 transparent PNG.
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+def test_profile(client, patient):
+    response = client.get("/api/v1/patients/profile", headers=patient["headers"])
+
+    assert response.status_code == 200
+    assert response.json["data"]["email"] == patient["email"]
+    assert response.json["data"]["name"] == f"{patient['firstname']} {patient['lastname']}"
+
+
+def test_profile_answers_conditional_get(client, patient):
+    first = client.get("/api/v1/patients/profile", headers=patient["headers"])
+
+    repeated = client.get(
+        "/api/v1/patients/profile", headers={**patient["headers"], "If-None-Match": first.headers["ETag"]}
+    )
+
+    assert repeated.status_code == 304
+
+
+def test_profile_update_changes_etag(client, patient):
+    before = client.get("/api/v1/patients/profile", headers=patient["headers"]).headers["ETag"]
+
+    response = client.put("/api/v1/patients/profile", headers=patient["headers"], json={"address": "Nairobi"})
+
+    assert response.status_code == 200
+    after = client.get("/api/v1/patients/profile", headers=patient["headers"])
+    assert after.json["data"]["address"] == "Nairobi"
+    assert after.headers["ETag"] != before
+
+
+def test_profile_create(client, patient):
+    response = client.post("/api/v1/patients/profile", headers=patient["headers"], json={
+        "blood_group": "O+", "height": 170, "weight": 65,
+    })
+
+    assert response.status_code == 201
+    assert client.get("/api/v1/patients/profile", headers=patient["headers"]).json["data"]["blood_group"] == "O+"
+
+
+def test_profile_image_upload(client, patient):
+    upload = client.post("/api/v1/images", headers=patient["headers"], data=PNG, content_type="image/png")
+
+    assert upload.status_code == 201
+    image = upload.json["data"]
+    assert image["content_type"] == "image/png"
+
+    response = client.put("/api/v1/patients/profile", headers=patient["headers"], json={"image": image["key"]})
+    assert response.status_code == 200
+    profile = client.get("/api/v1/patients/profile", headers=patient["headers"]).json["data"]
+    assert profile["image"] == image["url"]
+    assert client.get(image["url"]).data == PNG
+
+
+def test_profile_image_rejects_other_files(client, patient):
+    response = client.post("/api/v1/images", headers=patient["headers"], data=b"not an image")
+
+    assert response.status_code == 400
+
+
+def _stored(app, data):
+    from app.images.store import image_store
+
+    with app.app_context():
+        return image_store().exists(hashlib.sha256(data).hexdigest())
+
+
+def test_profile_image_rejects_damaged_images(app, client, patient):
+    pytest.importorskip("PIL")
+    truncated = PNG[:40]
+
+    upload = client.post("/api/v1/images", headers=patient["headers"], data=truncated)
+    data_uri = "data:image/png;base64," + base64.b64encode(truncated).decode()
+    update = client.put("/api/v1/patients/profile", headers=patient["headers"], json={"image": data_uri})
+
+    assert upload.status_code == 400
+    assert update.status_code == 400
+    assert not _stored(app, truncated)
+
+
+def test_profile_image_rejects_too_many_pixels(app, client, patient, monkeypatch):
+    pytest.importorskip("PIL")
+    monkeypatch.setitem(app.config, "IMAGE_MAX_PIXELS", 0)
+    image = PNG + b"pixels"
+
+    response = client.post("/api/v1/images", headers=patient["headers"], data=image)
+
+    assert response.status_code == 400
+    assert "pixels" in response.json["message"]
+    assert not _stored(app, image)
+
+
+def test_profile_rejects_doctors(client, doctor):
+    assert client.get("/api/v1/patients/profile", headers=doctor["headers"]).status_code == 403
@@ -0,0 +1,110 @@
+import uuid
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.doctors.models import Doctor
+from app.replicas import REPLICA_BIND, pin_to_primary, replica_available
+from app.tests.conftest import bearer
+from config import Config
+
+
+def _add_doctor(engine, doctor_id, lastname):
+    with engine.begin() as connection:
+        connection.execute(Doctor.__table__.insert().values(
+            doctor_id=doctor_id, employee_id=1, firstname="Ada", lastname=lastname, specialization="General",
+            email="ada@example.com", phone="0700000001", password="x",
+        ))
+
+
+@pytest.fixture
+def replicated(app, tmp_path, monkeypatch):
+    """
+    An app reading from a replica in a second SQLite file.
+
+    Both files hold the same doctor under different last names, so a
+    response shows which database answered. Uses the app fixture for its
+    SQLite schema adjustments.
+    """
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(Config, "SQLALCHEMY_REPLICA_URI", f"sqlite:///{tmp_path / 'replica.db'}")
+    replicated_app = create_app()
+    replicated_app.config["TESTING"] = True
+
+    doctor_id = uuid.uuid4()
+    with replicated_app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        _add_doctor(db.engine, doctor_id, "Primary")
+        _add_doctor(db.engines[REPLICA_BIND], doctor_id, "Replica")
+        token = create_access_token(identity=str(doctor_id), additional_claims={"role": "doctor"})
+
+    yield replicated_app, doctor_id, bearer(token)
+
+    with replicated_app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _lastname(app, doctor_id, method="GET", before=None):
+    with app.test_request_context("/", method=method):
+        if before:
+            before()
+        lastname = db.session.execute(
+            db.select(Doctor.lastname).where(Doctor.doctor_id == doctor_id)
+        ).scalar_one()
+        db.session.remove()
+        return lastname
+
+
+def test_get_requests_read_from_replica(replicated):
+    app, doctor_id, headers = replicated
+
+    response = app.test_client().get("/api/v1/doctors/profile", headers=headers)
+
+    assert response.json["data"]["lastname"] == "Replica"
+    assert _lastname(app, doctor_id) == "Replica"
+
+
+def test_other_methods_read_from_primary(replicated):
+    app, doctor_id, _ = replicated
+
+    assert _lastname(app, doctor_id, method="POST") == "Primary"
+
+
+def test_pin_to_primary(replicated):
+    app, doctor_id, _ = replicated
+
+    assert _lastname(app, doctor_id, before=pin_to_primary) == "Primary"
+
+
+def test_writes_go_to_primary_and_pin_the_writer(replicated):
+    app, doctor_id, headers = replicated
+    client = app.test_client()
+
+    response = client.put("/api/v1/doctors/profile", headers=headers, json={"firstname": "Grace"})
+
+    assert response.status_code == 200
+    with app.app_context():
+        primary = db.session.execute(db.text("SELECT firstname FROM doctors")).scalar_one()
+        with db.engines[REPLICA_BIND].connect() as connection:
+            replica = connection.execute(db.text("SELECT firstname FROM doctors")).scalar_one()
+    assert (primary, replica) == ("Grace", "Ada")
+    # The writer reads its own write until the replica has had time to catch up.
+    assert client.get("/api/v1/doctors/profile", headers=headers).json["data"]["firstname"] == "Grace"
+
+
+def test_falls_back_to_primary_when_replica_is_down(replicated, tmp_path):
+    app, doctor_id, headers = replicated
+    with app.app_context():
+        db.engines[REPLICA_BIND].dispose()
+    (tmp_path / "replica.db").unlink()
+    (tmp_path / "replica.db").mkdir()  # SQLite cannot open a directory
+
+    response = app.test_client().get("/api/v1/doctors/profile", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json["data"]["lastname"] == "Primary"
+    with app.app_context():
+        assert not replica_available()
+    assert _lastname(app, doctor_id) == "Primary"
@@ -0,0 +1,11 @@
+"""
+ASGI entry point: hot reads are served natively async, everything else by the Flask app.
+
+Install requirements-asgi.txt, then for example:
+    uvicorn asgi:app --workers 2
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --workers 2
+"""
+from app import create_app
+from app.async_api.handlers import create_asgi_app
+
+app = create_asgi_app(create_app())
@@ -0,0 +1,109 @@
+"""
+Fire parallel bookings at the same slot and check that exactly one wins.
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.booking_concurrency --parallel 50 --rounds 20
+"""
+import argparse
+import json
+import threading
+import time as clock
+import uuid
+from datetime import date, datetime, time, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import create_bench_app, summarize
+
+
+def seed(app, patients):
+    from app import db
+    from app.doctors.models import Doctor
+    from app.patients.models import Patient
+    from werkzeug.security import generate_password_hash
+
+    password = generate_password_hash("benchmark")
+    suffix = uuid.uuid4().hex[:8]
+    with app.app_context():
+        doctor = Doctor(
+            employee_id=int(clock.time() * 1000) % 2_000_000_000,
+            firstname="Bench",
+            lastname="Doctor",
+            specialization="General",
+            email=f"doctor-{suffix}@bench.local",
+            phone=f"07{uuid.uuid4().int % 10**8:08d}",
+            password=password,
+        )
+        db.session.add(doctor)
+        patient_rows = [
+            Patient(
+                firstname="Bench",
+                lastname=f"Patient{i}",
+                email=f"patient-{suffix}-{i}@bench.local",
+                phone=f"07{uuid.uuid4().int % 10**8:08d}",
+                date_of_birth=datetime(1990, 1, 1),
+                password=password,
+            )
+            for i in range(patients)
+        ]
+        db.session.add_all(patient_rows)
+        db.session.commit()
+        return doctor.doctor_id, [p.patient_id for p in patient_rows]
+
+
+def run(parallel, rounds):
+    from app import db
+    from app.appointments.booking import book_slot
+
+    app = create_bench_app()
+    doctor_id, patient_ids = seed(app, parallel)
+    slot_day = date.today() + timedelta(days=365 + uuid.uuid4().int % 1000)
+
+    def attempt(barrier, patient_id, slot_time):
+        with app.app_context():
+            barrier.wait()
+            started = clock.perf_counter()
+            try:
+                booked = book_slot(patient_id, doctor_id, slot_day, slot_time) is not None
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                booked = False
+            return booked, clock.perf_counter() - started
+
+    latencies = []
+    winners_per_round = []
+    started = clock.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for r in range(rounds):
+            slot_time = time(hour=8 + (r // 12) % 10, minute=(r % 12) * 5)
+            barrier = threading.Barrier(parallel)
+            results = list(pool.map(lambda p: attempt(barrier, p, slot_time), patient_ids))
+            winners_per_round.append(sum(1 for booked, _ in results if booked))
+            latencies.extend(elapsed for _, elapsed in results)
+    elapsed = clock.perf_counter() - started
+
+    return {
+        "parallel": parallel,
+        "rounds": rounds,
+        "attempts": parallel * rounds,
+        "exactly_one_winner": all(w == 1 for w in winners_per_round),
+        "winners_per_round": winners_per_round,
+        "attempts_per_sec": round(parallel * rounds / elapsed, 1),
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parallel", type=int, default=50, help="Concurrent bookings per slot.")
+    parser.add_argument("--rounds", type=int, default=20, help="Number of distinct slots to contend on.")
+    args = parser.parse_args()
+
+    result = run(args.parallel, args.rounds)
+    print(json.dumps(result, indent=2))
+    if not result["exactly_one_winner"]:
+        raise SystemExit("Double booking detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Time a bulk patient import end to end.
+
+Generates a CSV of synthetic patients and runs it through the import pipeline
+(validation, pooled password hashing, chunked inserts).
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.bulk_import --rows 100000 --processes 8
+"""
+import argparse
+import io
+import json
+import time
+import uuid
+
+from benchmarks.common import create_bench_app
+
+
+def build_csv(rows):
+    suffix = uuid.uuid4().hex[:8]
+    lines = ["firstname,lastname,email,phone,password,date_of_birth"]
+    base = uuid.uuid4().int % 10**7
+    for i in range(rows):
+        lines.append(f"Bench,Patient{i},import-{suffix}-{i}@bench.local,07{(base + i) % 10**8:08d},benchmark,1990-01-01")
+    return "\n".join(lines) + "\n"
+
+
+def run(rows, chunk_size, processes, hash_method):
+    from app.auth.bulk_import import import_users, read_rows
+    from app.auth.passwords import password_hasher
+
+    app = create_bench_app()
+    source = io.StringIO(build_csv(rows))
+
+    with app.app_context():
+        if hash_method:
+            password_hasher.method = hash_method
+        started = time.perf_counter()
+        report = import_users(read_rows(source, "csv"), "patient", chunk_size=chunk_size, processes=processes)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rows": rows,
+        "chunk_size": chunk_size,
+        "processes": processes or app.config["IMPORT_HASH_PROCESSES"],
+        "hash_method": password_hasher.method,
+        "imported": report["imported"],
+        "failed": report["failed"],
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--hash-method", default=None, help="Override PASSWORD_HASH_METHOD")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.chunk_size, args.processes, args.hash_method), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import sys
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def create_bench_app(database_uri=None):
+    """
+    Create the application against the benchmark database and build its schema.
+
+    The database comes from BENCH_DATABASE_URI (falling back to
+    SQLALCHEMY_DATABASE_URI). Benchmarks should point at a throwaway database.
+    """
+    database_uri = database_uri or os.getenv("BENCH_DATABASE_URI") or os.getenv("SQLALCHEMY_DATABASE_URI")
+    if not database_uri:
+        raise SystemExit("Set BENCH_DATABASE_URI to a throwaway database.")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = database_uri
+
+    from app import create_app, db
+    from app.doctors.models import Doctor
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # SQLite has no sequences, so benchmark doctors carry explicit employee ids.
+            Doctor.__table__.c.employee_id.server_default = None
+        db.create_all()
+    return app
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize latency samples (in seconds) as milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
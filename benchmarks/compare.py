@@ -0,0 +1,86 @@
+"""
+Compare benchmark results against a stored baseline.
+
+A flow regresses when its throughput drops, or its p95 or p99 latency
+rises, by more than the threshold. The error rate regresses when it rises
+by more than a percentage point. Flows missing from either side are skipped.
+
+Usage:
+    python -m benchmarks.compare results.json baseline.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+def _change(current, baseline):
+    """Relative change from baseline, in percent."""
+    if not baseline:
+        return 0.0
+    return (current - baseline) / baseline * 100
+
+
+def compare(results, baseline, threshold):
+    """
+    Return the regressions of results against baseline.
+
+    Args:
+        results (dict): Output of benchmarks.load.
+        baseline (dict): An earlier output of benchmarks.load.
+        threshold (float): Allowed change, in percent.
+    Returns:
+        list: One dict per regressed metric with flow, metric, baseline,
+        current and change_pct.
+    """
+    regressions = []
+    for flow, current in results["flows"].items():
+        before = baseline.get("flows", {}).get(flow)
+        if before is None or not current["requests"] or not before["requests"]:
+            continue
+
+        checks = [
+            ("requests_per_sec", current["requests_per_sec"], before["requests_per_sec"], -1),
+            ("p95_ms", current["latency"]["p95_ms"], before["latency"]["p95_ms"], 1),
+            ("p99_ms", current["latency"]["p99_ms"], before["latency"]["p99_ms"], 1),
+        ]
+        for metric, now, then, direction in checks:
+            change = _change(now, then)
+            if change * direction > threshold:
+                regressions.append({
+                    "flow": flow, "metric": metric, "baseline": then, "current": now, "change_pct": round(change, 1),
+                })
+
+        error_rate = current["errors"] / current["requests"] * 100
+        baseline_error_rate = before["errors"] / before["requests"] * 100
+        if error_rate - baseline_error_rate > 1:
+            regressions.append({
+                "flow": flow, "metric": "error_rate_pct", "baseline": round(baseline_error_rate, 2),
+                "current": round(error_rate, 2), "change_pct": round(error_rate - baseline_error_rate, 2),
+            })
+    return regressions
+
+
+def format_regressions(regressions):
+    return "\n".join(
+        f"REGRESSION {r['flow']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change_pct']:+}%)"
+        for r in regressions
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results")
+    parser.add_argument("baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression, in percent")
+    args = parser.parse_args()
+
+    with open(args.results) as results_file, open(args.baseline) as baseline_file:
+        regressions = compare(json.load(results_file), json.load(baseline_file), args.threshold)
+    if regressions:
+        print(format_regressions(regressions))
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Drive the API with a mix of user flows and record throughput and latency.
+
+Run benchmarks.seed first. Each virtual user logs in as a random seeded
+patient, then repeatedly picks a flow by weight:
+
+    register       register a new patient
+    login          log in as a seeded patient
+    book           book a random weekday slot with a random seeded doctor
+    reschedule     move one of this user's appointments to another slot
+    list           list this user's appointments
+    doctor_lookup  doctor details, availability and a directory page
+
+A 409 on book or reschedule means the slot was taken. That is an expected
+outcome under load, so it is counted as a conflict, not as an error.
+Results are written as JSON. With --baseline they are compared against an
+earlier result, and the exit status is 1 if any flow regressed.
+
+Usage:
+    python -m benchmarks.load --url http://127.0.0.1:8000 --concurrency 32 --duration 60 \\
+        --output results.json --baseline baseline.json
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.load --start-server --workers 4
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from benchmarks.common import summarize
+from benchmarks.compare import compare, format_regressions
+from benchmarks.seed import patient_email, SLOTS_PER_DAY, DAY_START, SLOT_MINUTES
+
+FLOWS = ("register", "login", "book", "reschedule", "list", "doctor_lookup")
+DEFAULT_MIX = "register=1,login=1,book=3,reschedule=1,list=4,doctor_lookup=6"
+EXPECTED = {"register": (201,), "login": (200,), "book": (201, 409), "reschedule": (200, 201, 409)}
+
+
+class Client:
+    """One keep-alive HTTP connection, reopened after errors."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, json.loads(data) if data else None
+            except (OSError, http.client.HTTPException, ValueError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+class VirtualUser:
+    def __init__(self, client, manifest, rng):
+        self.client = client
+        self.manifest = manifest
+        self.rng = rng
+        self.token = None
+        self.appointments = []
+
+    def _random_slot(self):
+        day = date.today() + timedelta(days=self.rng.randrange(30, 365))
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        minutes = DAY_START * 60 + self.rng.randrange(SLOTS_PER_DAY) * SLOT_MINUTES
+        return day.isoformat(), f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def _new_phone(self):
+        # Seeded patients use 07 numbers below the patient count.
+        return f"07{self.rng.randrange(self.manifest['patients'], 10**8):08d}"
+
+    def login(self):
+        index = self.rng.randrange(self.manifest["patients"])
+        status, body = self.client.request("POST", "/api/v1/patients/login", {
+            "email": patient_email(index), "password": self.manifest["password"],
+        })
+        if status == 200:
+            self.token = body["data"]["accessToken"]
+            self.appointments = []
+        return [status]
+
+    def register(self):
+        status, _ = self.client.request("POST", "/api/v1/patients/register", {
+            "firstname": "Load", "lastname": "Test", "password": "benchmark", "date_of_birth": "1990-01-01",
+            "email": f"load-{uuid.uuid4().hex}@bench.local", "phone": self._new_phone(),
+        })
+        return [status]
+
+    def book(self):
+        day, slot = self._random_slot()
+        status, body = self.client.request("POST", "/api/v1/appointments/book", {
+            "doctor_id": self.rng.choice(self.manifest["doctor_ids"]), "date": day, "time": slot,
+        }, token=self.token)
+        if status == 201:
+            self.appointments.append(body["data"]["appointmentId"])
+        return [status]
+
+    def reschedule(self):
+        if not self.appointments:
+            return self.book()
+        day, slot = self._random_slot()
+        appointment_id = self.rng.choice(self.appointments)
+        status, _ = self.client.request(
+            "PUT", f"/api/v1/appointments/reschedule/{appointment_id}", {"date": day, "time": slot}, token=self.token,
+        )
+        return [status]
+
+    def list(self):
+        status, _ = self.client.request("GET", "/api/v1/appointments/?limit=50", token=self.token)
+        return [status]
+
+    def doctor_lookup(self):
+        doctor_id = self.rng.choice(self.manifest["doctor_ids"])
+        return [
+            self.client.request("GET", f"/api/v1/doctors/{doctor_id}", token=self.token)[0],
+            self.client.request("GET", f"/api/v1/doctors/availability/{doctor_id}", token=self.token)[0],
+            self.client.request("GET", "/api/v1/doctors/?limit=20", token=self.token)[0],
+        ]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in FLOWS:
+            raise SystemExit(f"Unknown flow {name!r}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def run_load(url, manifest, mix, concurrency, duration, seed):
+    flows, weights = list(mix), list(mix.values())
+    samples = {flow: [] for flow in flows}
+    counts = {flow: {"errors": 0, "conflicts": 0} for flow in flows}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        user = VirtualUser(Client(url), manifest, rng)
+        user.login()
+        local = {flow: ([], 0, 0) for flow in flows}
+        while time.monotonic() < stop_at:
+            flow = rng.choices(flows, weights)[0]
+            started = time.perf_counter()
+            try:
+                statuses = getattr(user, flow)()
+            except (OSError, http.client.HTTPException):
+                statuses = [0]
+            elapsed = time.perf_counter() - started
+
+            latencies, errors, conflicts = local[flow]
+            latencies.append(elapsed)
+            if any(status == 409 for status in statuses):
+                conflicts += 1
+            if any(status not in EXPECTED.get(flow, (200,)) for status in statuses):
+                errors += 1
+            local[flow] = (latencies, errors, conflicts)
+            if 401 in statuses:
+                user.login()
+
+        with lock:
+            for flow, (latencies, errors, conflicts) in local.items():
+                samples[flow].extend(latencies)
+                counts[flow]["errors"] += errors
+                counts[flow]["conflicts"] += conflicts
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for flow in flows:
+        results[flow] = {
+            "requests": len(samples[flow]),
+            "requests_per_sec": round(len(samples[flow]) / elapsed, 2),
+            **counts[flow],
+            "latency": summarize(samples[flow]),
+        }
+    everything = [sample for flow in flows for sample in samples[flow]]
+    results["total"] = {
+        "requests": len(everything),
+        "requests_per_sec": round(len(everything) / elapsed, 2),
+        "errors": sum(counts[flow]["errors"] for flow in flows),
+        "conflicts": sum(counts[flow]["conflicts"] for flow in flows),
+        "latency": summarize(everything),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-server", action="store_true", help="Start gunicorn on the --url port first")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--manifest", default="bench_seed.json")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated flow=weight pairs")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Compare against this earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression, in percent")
+    args = parser.parse_args()
+
+    with open(args.manifest) as manifest_file:
+        manifest = json.load(manifest_file)
+    mix = parse_mix(args.mix)
+
+    server = None
+    if args.start_server:
+        from benchmarks.serving_modes import start_server
+
+        env = dict(os.environ)
+        env.setdefault("SQLALCHEMY_DATABASE_URI", os.getenv("BENCH_DATABASE_URI", ""))
+        server = start_server("wsgi", args.workers, urlsplit(args.url).port or 80, env)
+    try:
+        if args.warmup:
+            run_load(args.url, manifest, mix, args.concurrency, args.warmup, args.seed + 1)
+        flows = run_load(args.url, manifest, mix, args.concurrency, args.duration, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "config": {
+            "url": args.url, "mix": mix, "concurrency": args.concurrency, "duration": args.duration,
+            "doctors": manifest["doctors"], "patients": manifest["patients"],
+            "appointments_per_doctor": manifest["appointments_per_doctor"],
+        },
+        "flows": flows,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(format_regressions(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measure what request metrics cost per request.
+
+The same authenticated profile read (one SQL statement) is timed through the
+test client with the metrics hooks and SQL timing attached and detached, in
+alternating rounds so drift affects both sides equally. Also reports the
+cost of a histogram observation and of rendering /metrics.
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.metrics_overhead --requests 2000 --rounds 5
+"""
+import argparse
+import json
+import time
+import uuid
+from sqlalchemy import event
+
+from benchmarks.common import create_bench_app, summarize
+
+
+def seed(app):
+    client = app.test_client()
+    payload = {
+        "firstname": "Bench", "lastname": "Metrics", "password": "benchmark", "date_of_birth": "1990-01-01",
+        "email": f"metrics-{uuid.uuid4().hex[:8]}@bench.local", "phone": f"07{uuid.uuid4().int % 10**8:08d}",
+    }
+    client.post("/api/v1/patients/register", json=payload)
+    login = client.post("/api/v1/patients/login", json={"email": payload["email"], "password": "benchmark"})
+    return client, {"Authorization": f"Bearer {login.json['data']['accessToken']}"}
+
+
+def set_instrumented(app, enabled):
+    from app import db
+    from app.metrics import instrumentation, queries
+
+    hooks = (
+        (app.before_request_funcs.setdefault(None, []), instrumentation._start_timer),
+        (app.after_request_funcs.setdefault(None, []), instrumentation._record_request),
+    )
+    for registered, hook in hooks:
+        if enabled and hook not in registered:
+            registered.append(hook)
+        elif not enabled and hook in registered:
+            registered.remove(hook)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if enabled:
+                queries.instrument_queries(engine)
+            elif event.contains(engine, "before_cursor_execute", queries._before_cursor_execute):
+                event.remove(engine, "before_cursor_execute", queries._before_cursor_execute)
+                event.remove(engine, "after_cursor_execute", queries._after_cursor_execute)
+                event.remove(engine, "handle_error", queries._handle_error)
+
+
+def time_requests(client, headers, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        client.get("/api/v1/patients/profile", headers=headers)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    client, headers = seed(app)
+    samples = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            set_instrumented(app, enabled)
+            time_requests(client, headers, min(args.requests, 100))  # warm up
+            samples[enabled] += time_requests(client, headers, args.requests)
+
+    from app.metrics.instrumentation import REQUEST_LATENCY, render_metrics
+
+    started = time.perf_counter()
+    for _ in range(100000):
+        REQUEST_LATENCY.observe(0.01, "GET", "benchmark", "200")
+    observe_us = (time.perf_counter() - started) / 100000 * 1e6
+
+    with app.app_context():
+        started = time.perf_counter()
+        body = render_metrics()
+        render_ms = (time.perf_counter() - started) * 1000
+
+    plain, instrumented = summarize(samples[False]), summarize(samples[True])
+    print(json.dumps({
+        "uninstrumented": plain,
+        "instrumented": instrumented,
+        "overhead_per_request_us": round((instrumented["mean_ms"] - plain["mean_ms"]) * 1000, 1),
+        "histogram_observe_us": round(observe_us, 3),
+        "render_ms": round(render_ms, 3),
+        "render_bytes": len(body),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure login cost for each candidate password hashing setting.
+
+For every method the script verifies a stored hash repeatedly on one thread
+(logins/sec per core) and then from concurrent threads through a
+PasswordHasher allowing that many hashes at once, which shows how far
+verification scales across cores while the GIL is released.
+
+Usage:
+    python -m benchmarks.password_hashing --iterations 20 --workers 4
+    python -m benchmarks.password_hashing --method scrypt:16384:8:1 --method pbkdf2:sha256:600000
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import summarize
+
+DEFAULT_METHODS = [
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "pbkdf2:sha256:260000",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:1000000",
+]
+
+
+def bench_method(method, iterations, workers):
+    from werkzeug.security import generate_password_hash, check_password_hash
+    from app.auth.passwords import PasswordHasher
+
+    password = "correct horse battery staple"
+    stored = generate_password_hash(password, method=method)
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        check_password_hash(stored, password)
+        samples.append(time.perf_counter() - started)
+    single = summarize(samples)
+
+    hasher = PasswordHasher(method=method, concurrency=workers)
+    total = iterations * workers
+    started = time.perf_counter()
+    # One caller per hashing slot, as concurrent request threads would be.
+    with ThreadPoolExecutor(max_workers=workers) as callers:
+        list(callers.map(lambda _: hasher.verify(stored, password), range(total)))
+    pooled_elapsed = time.perf_counter() - started
+
+    return {
+        "method": method,
+        "verify": single,
+        "logins_per_sec_per_core": round(iterations / sum(samples), 2),
+        "pooled_workers": workers,
+        "pooled_logins_per_sec": round(total / pooled_elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--method", action="append", dest="methods", help="Hash method (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    results = [bench_method(method, args.iterations, args.workers) for method in args.methods or DEFAULT_METHODS]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Measure registration throughput and database round-trips per registration.
+
+Registers patients through /api/v1/patients/register from parallel clients,
+then re-submits a share of them to exercise the duplicate path. Password
+hashing uses a cheap method by default so the numbers reflect the database
+work; pass --hash-method to include the production cost.
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.registration_throughput --users 2000 --parallel 16
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import create_bench_app, summarize
+
+
+def run(users, parallel, duplicates, hash_method):
+    os.environ["PASSWORD_HASH_METHOD"] = hash_method
+    from sqlalchemy import event
+    from app import db
+
+    app = create_bench_app()
+    statements = {"count": 0}
+    lock = threading.Lock()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        with lock:
+            statements["count"] += 1
+
+    suffix = uuid.uuid4().hex[:8]
+    payloads = [{
+        "firstname": "Bench",
+        "lastname": f"Patient{i}",
+        "email": f"register-{suffix}-{i}@bench.local",
+        "phone": f"07{uuid.uuid4().int % 10**8:08d}",
+        "password": "benchmark",
+        "date_of_birth": "1990-01-01",
+    } for i in range(users)]
+
+    def register(payload):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post("/api/v1/patients/register", json=payload)
+        return response.status_code, time.perf_counter() - started
+
+    def phase(batch):
+        statements["count"] = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            results = list(pool.map(register, batch))
+        elapsed = time.perf_counter() - started
+        codes = {}
+        for code, _ in results:
+            codes[str(code)] = codes.get(str(code), 0) + 1
+        return {
+            "requests": len(batch),
+            "status_codes": codes,
+            "requests_per_sec": round(len(batch) / elapsed, 2),
+            "statements_per_request": round(statements["count"] / len(batch), 2) if batch else 0.0,
+            "latency": summarize([latency for _, latency in results]),
+        }
+
+    return {
+        "users": users,
+        "parallel": parallel,
+        "hash_method": hash_method,
+        "new_users": phase(payloads),
+        "duplicates": phase(payloads[:duplicates]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--parallel", type=int, default=8)
+    parser.add_argument("--duplicates", type=int, default=200, help="How many registrations to re-submit")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:1000")
+    args = parser.parse_args()
+    print(json.dumps(run(args.users, args.parallel, min(args.duplicates, args.users), args.hash_method), indent=2))
+
+
+if __name__ == "__main__":
+    main()
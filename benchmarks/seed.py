@@ -0,0 +1,166 @@
+"""
+Seed a benchmark database with a realistic dataset.
+
+Doctors, patients and appointments are written with chunked Core inserts,
+bypassing the ORM, so millions of appointments load in minutes. Every
+seeded user shares the password "benchmark", hashed once with the
+configured method. Doctors work weekdays 08:00-18:00. Each doctor gets
+``--appointments-per-doctor`` appointments in consecutive 30 minute slots:
+those in the past are completed, the rest are booked.
+
+The dataset is deterministic for a given --seed. A manifest with the counts
+and the doctor ids is written for benchmarks.load to pick users from.
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.seed \\
+        --doctors 2000 --patients 200000 --appointments-per-doctor 500 --manifest bench_seed.json
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, time as time_of_day
+
+from benchmarks.common import create_bench_app
+
+PASSWORD = "benchmark"
+SPECIALIZATIONS = (
+    "Cardiology", "Dermatology", "General", "Neurology", "Oncology",
+    "Orthopedics", "Pediatrics", "Psychiatry", "Radiology", "Urology",
+)
+FIRST_NAMES = ("Amina", "Brian", "Carol", "David", "Esther", "Felix", "Grace", "Hassan", "Irene", "James")
+LAST_NAMES = ("Achieng", "Baraka", "Chege", "Dida", "Etyang", "Fundi", "Gitau", "Hamisi", "Imbuga", "Juma")
+WORKDAYS_MASK = 0b0011111  # Monday to Friday, see app.doctors.availability
+DAY_START, SLOTS_PER_DAY, SLOT_MINUTES = 8, 20, 30
+EMPLOYEE_ID_BASE = 1_000_000
+
+
+def patient_email(index):
+    return f"seed-patient-{index}@bench.local"
+
+
+def doctor_email(index):
+    return f"seed-doctor-{index}@bench.local"
+
+
+def _name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _workday_slots(start_day):
+    """Yield (date, time) for consecutive weekday slots from start_day on."""
+    day = start_day
+    while True:
+        if day.weekday() < 5:
+            for index in range(SLOTS_PER_DAY):
+                minutes = DAY_START * 60 + index * SLOT_MINUTES
+                yield day, time_of_day(minutes // 60, minutes % 60)
+        day += timedelta(days=1)
+
+
+def _insert_chunks(conn, table, rows, chunk_size):
+    chunk, written = [], 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.execute(table.insert(), chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        written += len(chunk)
+    return written
+
+
+def seed(app, doctors, patients, appointments_per_doctor, chunk_size, rng):
+    from app import db
+    from app.auth.passwords import hash_password
+    from app.appointments.models import Appointment
+    from app.doctors.models import Doctor
+    from app.patients.models import Patient
+
+    with app.app_context():
+        password = hash_password(PASSWORD)
+        now = datetime.utcnow()
+        doctor_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(doctors)]
+        patient_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(patients)]
+
+        def doctor_rows():
+            for index, doctor_id in enumerate(doctor_ids):
+                firstname, lastname = _name(rng)
+                yield {
+                    "doctor_id": doctor_id, "employee_id": EMPLOYEE_ID_BASE + index,
+                    "firstname": firstname, "lastname": lastname,
+                    "specialization": SPECIALIZATIONS[index % len(SPECIALIZATIONS)],
+                    "email": doctor_email(index), "phone": f"+2547{index:08d}", "password": password,
+                    "created_at": now, "availability_start": time_of_day(DAY_START),
+                    "availability_end": time_of_day(18), "days_mask": WORKDAYS_MASK,
+                }
+
+        def patient_rows():
+            for index, patient_id in enumerate(patient_ids):
+                firstname, lastname = _name(rng)
+                yield {
+                    "patient_id": patient_id, "firstname": firstname, "lastname": lastname,
+                    "email": patient_email(index), "phone": f"07{index:08d}", "password": password,
+                    "date_of_birth": datetime(1950 + index % 55, 1 + index % 12, 1 + index % 28),
+                    "created_at": now,
+                }
+
+        def appointment_rows():
+            today = date.today()
+            # Half of each doctor's appointments are in the past.
+            first_day = today - timedelta(days=appointments_per_doctor // SLOTS_PER_DAY * 7 // 10 + 1)
+            for doctor_id in doctor_ids:
+                slots = _workday_slots(first_day)
+                for _ in range(appointments_per_doctor):
+                    day, slot = next(slots)
+                    yield {
+                        "appointment_id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                        "patient_id": patient_ids[rng.randrange(patients)], "doctor_id": doctor_id,
+                        "date": day, "time": slot, "status": "completed" if day < today else "booked",
+                        "created_at": now,
+                    }
+
+        timings = {}
+        with db.engine.begin() as conn:
+            for name, table, rows in (
+                ("doctors", Doctor.__table__, doctor_rows()),
+                ("patients", Patient.__table__, patient_rows()),
+                ("appointments", Appointment.__table__, appointment_rows()),
+            ):
+                started = time.perf_counter()
+                count = _insert_chunks(conn, table, rows, chunk_size)
+                timings[name] = {"rows": count, "seconds": round(time.perf_counter() - started, 2)}
+
+    return timings, doctor_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=2000)
+    parser.add_argument("--patients", type=int, default=100000)
+    parser.add_argument("--appointments-per-doctor", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--manifest", default="bench_seed.json", help="Where to write the dataset manifest")
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    timings, doctor_ids = seed(
+        app, args.doctors, args.patients, args.appointments_per_doctor, args.chunk_size, random.Random(args.seed),
+    )
+    with open(args.manifest, "w") as manifest:
+        json.dump({
+            "doctors": args.doctors,
+            "patients": args.patients,
+            "appointments_per_doctor": args.appointments_per_doctor,
+            "password": PASSWORD,
+            "doctor_ids": [str(doctor_id) for doctor_id in doctor_ids],
+        }, manifest)
+    print(json.dumps(timings, indent=2))
+
+
+if __name__ == "__main__":
+    main()
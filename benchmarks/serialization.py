@@ -0,0 +1,105 @@
+"""
+Measure the cost of building and encoding a large appointment listing.
+
+Rows shaped like listing_query() results are turned into a response body
+and encoded four ways:
+
+    legacy          per-field strftime/str() formatting, stdlib json
+    listing_json    listing_response(), stdlib json with native UUID/date encoding
+    listing_orjson  listing_response(), orjson (if installed)
+
+The orjson payload is then compressed with every available encoding, to
+show what the size threshold trades.
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta, time as time_of_day
+
+from benchmarks.common import summarize
+
+
+def make_rows(count, rng):
+    fields = ["appointmentId", "patientId", "doctorId", "date", "time", "status"]
+    patient_id, start = uuid.UUID(int=rng.getrandbits(128), version=4), date(2030, 1, 7)
+    rows = []
+    for index in range(count):
+        day = start + timedelta(days=index // 20)
+        slot = time_of_day(8 + index % 20 // 2, 30 * (index % 2))
+        appointment_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        doctor_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        rows.append((day, slot, appointment_id, appointment_id, patient_id, doctor_id, day, slot, "booked"))
+    return rows, fields
+
+
+def legacy_response(rows, fields):
+    def format_field(value):
+        if isinstance(value, date):
+            return value.strftime("%Y-%m-%d")
+        if isinstance(value, time_of_day):
+            return value.strftime("%H:%M")
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+    return {
+        "status": "success",
+        "message": "Appointments retrieved successfully",
+        "data": {
+            "appointments": [{field: format_field(value) for field, value in zip(fields, row[3:])} for row in rows],
+            "nextCursor": None,
+        },
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(row_count, repeat):
+    from app.appointments.listing import listing_response
+    from app.compression import available_encodings, compress
+    from app.serialization import SERIALIZERS
+
+    rows, fields = make_rows(row_count, random.Random(1))
+    cases = {
+        "legacy": lambda: (json.dumps(legacy_response(rows, fields)) + "\n").encode(),
+        "listing_json": lambda: SERIALIZERS["json"](listing_response(rows, fields, row_count)),
+    }
+    if "orjson" in SERIALIZERS:
+        cases["listing_orjson"] = lambda: SERIALIZERS["orjson"](listing_response(rows, fields, row_count))
+
+    results = {"rows": row_count, "repeat": repeat}
+    for name, fn in cases.items():
+        results[name] = {"bytes": len(fn()), "latency": summarize(timed(fn, repeat))}
+
+    payload = list(cases.values())[-1]()
+    config = {"COMPRESSION_GZIP_LEVEL": 6, "COMPRESSION_BROTLI_QUALITY": 4}
+    for encoding in available_encodings():
+        results[f"compress_{encoding}"] = {
+            "bytes": len(compress(payload, encoding, config)),
+            "latency": summarize(timed(lambda: compress(payload, encoding, config), repeat)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
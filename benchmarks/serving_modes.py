@@ -0,0 +1,193 @@
+"""
+Compare the WSGI (gunicorn sync workers) and ASGI (uvicorn, asgi.py) serving modes.
+
+Both servers are started against the benchmark database and driven with the
+same mix of hot reads: appointment listing, doctor details and availability,
+and profile reads. For each mode the script reports requests/sec, latency
+percentiles and the resident memory of the whole server process tree, so
+worker counts can be chosen to compare the modes at the same memory budget.
+
+Usage:
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.serving_modes \\
+        --wsgi-workers 8 --asgi-workers 2 --concurrency 64 --duration 30
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from benchmarks.common import create_bench_app, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(app, patients):
+    """Create one doctor with appointments and some patients; return auth headers and paths."""
+    client = app.test_client()
+    suffix = uuid.uuid4().hex[:8]
+
+    def register_and_login(kind, index, **extra):
+        payload = {
+            "firstname": "Bench", "lastname": f"{kind}{index}", "password": "benchmark",
+            "email": f"serve-{suffix}-{kind}{index}@bench.local",
+            "phone": f"07{uuid.uuid4().int % 10**8:08d}", **extra,
+        }
+        registered = client.post(f"/api/v1/{kind}/register", json=payload).json["data"]
+        user = next(iter(registered.values()))
+        login = {"email": payload["email"], "password": "benchmark"}
+        if kind == "doctors":
+            login["employee_id"] = int(user["employ_id"])
+        token = client.post(f"/api/v1/{kind}/login", json=login).json["data"]["accessToken"]
+        return user["Id"], {"Authorization": f"Bearer {token}"}
+
+    doctor_id, doctor_headers = register_and_login("doctors", 0, specialization="General")
+    client.post("/api/v1/doctors/availability", headers=doctor_headers, json={
+        "availability_start": "08:00", "availability_end": "18:00",
+        "days_available": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+    })
+
+    day = date.today() + timedelta(days=400 + uuid.uuid4().int % 1000)
+    requests = [("/api/v1/doctors/profile", doctor_headers)]
+    for index in range(patients):
+        _, headers = register_and_login("patients", index, date_of_birth="1990-01-01")
+        slot = f"{8 + index // 12 % 10:02d}:{index % 12 * 5:02d}"
+        client.post("/api/v1/appointments/book", headers=headers, json={
+            "doctor_id": doctor_id, "date": day.isoformat(), "time": slot,
+        })
+        requests += [
+            ("/api/v1/appointments/", headers),
+            (f"/api/v1/doctors/{doctor_id}", headers),
+            (f"/api/v1/doctors/availability/{doctor_id}", headers),
+            ("/api/v1/patients/profile", headers),
+        ]
+    return requests
+
+
+def process_tree_rss(pid):
+    """Resident memory of a process and all of its descendants, in MB."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+                children.setdefault(parent, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+
+    total_kb, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+def start_server(mode, workers, port, env):
+    if mode == "wsgi":
+        command = ["gunicorn", "run:app", "--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "asgi:app", "--workers", str(workers),
+                   "--port", str(port), "--no-access-log"]
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/v1/appointments/")
+            connection.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"{mode} server did not start on port {port}")
+
+
+def drive(port, requests, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed, index = [], 0, offset
+        while time.monotonic() < stop_at:
+            path, headers = requests[index % len(requests)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "latency": summarize(latencies),
+    }
+
+
+def run(args):
+    app = create_bench_app()
+    requests = seed(app, args.patients)
+
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=app.config["SQLALCHEMY_DATABASE_URI"])
+    results = {}
+    for mode, workers, port in (("wsgi", args.wsgi_workers, args.port), ("asgi", args.asgi_workers, args.port + 1)):
+        server = start_server(mode, workers, port, env)
+        try:
+            drive(port, requests, args.concurrency, min(args.duration, 5))  # warm caches and pools
+            result = drive(port, requests, args.concurrency, args.duration)
+            result.update(workers=workers, rss_mb=process_tree_rss(server.pid))
+            results[mode] = result
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wsgi-workers", type=int, default=4)
+    parser.add_argument("--asgi-workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8701)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
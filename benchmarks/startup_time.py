@@ -0,0 +1,109 @@
+"""
+Measure application startup, from a cold interpreter to the first served request.
+
+In-process mode runs a fresh interpreter per sample and splits the time into
+importing the app package, create_app() and the first request through the
+test client. Gunicorn mode starts the server with and without preload_app and
+times the first HTTP response.
+
+Usage:
+    python -m benchmarks.startup_time --runs 5
+    BENCH_DATABASE_URI=postgresql://... python -m benchmarks.startup_time --gunicorn --workers 4
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from app import create_app
+flask_app = create_app()
+created = time.perf_counter()
+flask_app.test_client().get("/api/v1/swagger.json")
+served = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported, "first_request": served - created}))
+"""
+
+
+def in_process(runs, env):
+    phases = {"import": [], "create_app": [], "first_request": [], "interpreter_to_first_request": []}
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        total = time.perf_counter() - started
+        sample = json.loads(output.strip().splitlines()[-1])
+        for phase, seconds in sample.items():
+            phases[phase].append(seconds)
+        phases["interpreter_to_first_request"].append(total)
+    return {phase: summarize(samples) for phase, samples in phases.items()}
+
+
+def _probe(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    connection.request("GET", "/api/v1/swagger.json", headers={"Connection": "close"})
+    connection.getresponse().read()
+
+
+def gunicorn_startup(preload, workers, port, env, runs):
+    """Seconds from launching gunicorn to its first HTTP response."""
+    env = dict(env, GUNICORN_PRELOAD_APP=str(preload), GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f"127.0.0.1:{port}")
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            ["gunicorn", "-c", "gunicorn.conf.py", "run:app"], cwd=ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline:
+                try:
+                    _probe(port)
+                    samples.append(time.perf_counter() - started)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        finally:
+            server.terminate()
+            server.wait()
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gunicorn", action="store_true", help="Also time gunicorn with and without preload")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8711)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", os.getenv("BENCH_DATABASE_URI", "sqlite://"))
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+    env.setdefault("CACHE_TYPE", "SimpleCache")
+
+    results = {"in_process": in_process(args.runs, env)}
+    if args.gunicorn:
+        results["gunicorn"] = {
+            f"preload_{preload}".lower(): gunicorn_startup(preload, args.workers, args.port + index, env, args.runs)
+            for index, preload in enumerate((True, False))
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure the per-request cost of verifying an access token.
+
+Compares the old path (flask_jwt_extended verification followed by a second
+PyJWT decode in the handler) with the single verification the token service
+does now, and with reading the already-verified claims again.
+
+Usage:
+    python -m benchmarks.token_verify --iterations 20000
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+from benchmarks.common import summarize
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(iterations):
+    os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+    os.environ.setdefault("CACHE_TYPE", "SimpleCache")
+
+    import jwt
+    from flask_jwt_extended import verify_jwt_in_request
+    from app import create_app
+    from app.auth.tokens import generate_jwt_token, current_claims
+
+    app = create_app()
+    app.config["JWT_DENYLIST_ENABLED"] = False
+    with app.app_context():
+        token = generate_jwt_token(uuid.uuid4(), role="patient")
+    headers = {"Authorization": f"Bearer {token}"}
+    secret = app.config["JWT_SECRET_KEY"]
+
+    def verify():
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+
+    def verify_twice():
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+            jwt.decode(token, secret, algorithms=["HS256"])
+
+    def request_context_only():
+        with app.test_request_context(headers=headers):
+            pass
+
+    with app.test_request_context(headers=headers):
+        verify_jwt_in_request()
+        cached = timed(current_claims, iterations)
+
+    baseline = summarize(timed(request_context_only, iterations))
+    return {
+        "iterations": iterations,
+        "request_context_only": baseline,
+        "verify_once": summarize(timed(verify, iterations)),
+        "verify_twice_legacy": summarize(timed(verify_twice, iterations)),
+        "cached_claims_read": summarize(cached),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
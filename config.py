@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+from datetime import timedelta
 import os
 
 load_dotenv()
@@ -13,6 +14,86 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_NAME = "Authorization"
     JWT_HEADER_TYPE = "Bearer"
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", 30)))
+    JWT_DENYLIST_ENABLED = os.getenv("JWT_DENYLIST_ENABLED", "True") == "True"
+    JWT_DENYLIST_CACHE_SIZE = int(os.getenv("JWT_DENYLIST_CACHE_SIZE", 10000))
+    JWT_DENYLIST_CACHE_TTL = float(os.getenv("JWT_DENYLIST_CACHE_TTL", 5))
+
+    # Database pool Config
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+    # Behind PgBouncer in transaction mode: no local pool, no server-side prepared statements
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "False") == "True"
+
+    # Read replica Config; GET requests read from it when set
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI")
+    # Seconds a replica may lag: writers and just-invalidated cache entries read from the primary this long
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+    # Seconds reads stay on the primary after the replica could not be connected to
+    REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", 30))
+
+    # Metrics Config; /metrics is only served with "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # Directory where gunicorn workers share their metrics; unset, each worker reports its own
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+    # Seconds the email outbox and dead letter counts are cached for
+    METRICS_QUEUE_DEPTH_TTL = int(os.getenv("METRICS_QUEUE_DEPTH_TTL", 15))
+
+    # SQL statement budgets per request (see app.metrics.queries.query_budget)
+    QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", "True") == "True"
+    QUERY_BUDGET_RAISE = os.getenv("QUERY_BUDGET_RAISE", "False") == "True"
+
+    # Image store Config; IMAGE_STORE is "local" (IMAGE_STORE_PATH, default <instance>/images) or "s3"
+    IMAGE_STORE = os.getenv("IMAGE_STORE", "local")
+    IMAGE_STORE_PATH = os.getenv("IMAGE_STORE_PATH")
+    IMAGE_S3_BUCKET = os.getenv("IMAGE_S3_BUCKET")
+    IMAGE_S3_PREFIX = os.getenv("IMAGE_S3_PREFIX", "images/")
+    IMAGE_S3_ENDPOINT_URL = os.getenv("IMAGE_S3_ENDPOINT_URL")
+    IMAGE_S3_REGION = os.getenv("IMAGE_S3_REGION")
+    IMAGE_URL_EXPIRES = int(os.getenv("IMAGE_URL_EXPIRES", 3600))
+    IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/api/v1/images")
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+    # Largest width x height decoded; larger images are refused as decompression bombs
+    IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 5000 * 5000))
+    IMAGE_THUMBNAIL_SIZES = tuple(int(size) for size in os.getenv("IMAGE_THUMBNAIL_SIZES", "64,256").split(","))
+
+    # Response encoding Config; JSON_SERIALIZER is "orjson" (when installed) or "json"
+    JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "orjson")
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True") == "True"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+    # Password hashing Config, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", os.cpu_count() or 1))
+
+    # Bulk import Config
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    IMPORT_HASH_PROCESSES = int(os.getenv("IMPORT_HASH_PROCESSES", os.cpu_count() or 1))
+    # Largest upload to /admin/import; bigger files go through `flask import-users`
+    IMPORT_HTTP_MAX_ROWS = int(os.getenv("IMPORT_HTTP_MAX_ROWS", 200))
+    IMPORT_HTTP_MAX_BYTES = int(os.getenv("IMPORT_HTTP_MAX_BYTES", 256 * 1024))
+
+    # Gunicorn Config (gunicorn.conf.py)
+    GUNICORN_BIND = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+    GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+    GUNICORN_WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", 4))
+    GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", 30))
+    GUNICORN_KEEPALIVE = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+    GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+    GUNICORN_PRELOAD_APP = os.getenv("GUNICORN_PRELOAD_APP", "True") == "True"
+
+    # Async serving Config (asgi.py); derived from SQLALCHEMY_DATABASE_URI when unset
+    ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI")
 
     # Email Config
     MAIL_SERVER = os.getenv("MAIL_SERVER")
@@ -22,8 +103,36 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
 
+    # Email queue Config
+    MAIL_QUEUE_BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", 50))
+    MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", 5))
+    MAIL_QUEUE_BACKOFF_SECONDS = int(os.getenv("MAIL_QUEUE_BACKOFF_SECONDS", 30))
+    MAIL_QUEUE_MAX_BACKOFF_SECONDS = int(os.getenv("MAIL_QUEUE_MAX_BACKOFF_SECONDS", 3600))
+    MAIL_QUEUE_POLL_INTERVAL = float(os.getenv("MAIL_QUEUE_POLL_INTERVAL", 2))
+
+    # Scheduling Config
+    APPOINTMENT_DURATION_MINUTES = int(os.getenv("APPOINTMENT_DURATION_MINUTES", 30))
+    SLOT_SEARCH_MAX_DAYS = int(os.getenv("SLOT_SEARCH_MAX_DAYS", 31))
+    APPOINTMENT_BATCH_MAX_OPERATIONS = int(os.getenv("APPOINTMENT_BATCH_MAX_OPERATIONS", 500))
+    SLOT_INDEX_TIMEOUT = int(os.getenv("SLOT_INDEX_TIMEOUT", 3600))
+
+    # Medical records Config; rows fetched per round trip when streaming a history export
+    MEDICAL_RECORDS_STREAM_BATCH = int(os.getenv("MEDICAL_RECORDS_STREAM_BATCH", 500))
+
+    # Cache Config (SimpleCache or FileSystemCache work without Redis)
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "RedisCache")
+    CACHE_DIR = os.getenv("CACHE_DIR")
+    CACHE_STALE_GRACE = int(os.getenv("CACHE_STALE_GRACE", 60))
+    CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", 5))
+
+    # Per-worker L1 cache in front of the shared backend
+    CACHE_L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "True") == "True"
+    CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", 1024))
+    CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", 5))
+    CACHE_L1_PUBSUB = os.getenv("CACHE_L1_PUBSUB", "True") == "True"
+    CACHE_L1_CHANNEL = os.getenv("CACHE_L1_CHANNEL", "cache-invalidation")
+
     # Redis Config
-    CACHE_TYPE = "redis"
     CACHE_REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     CACHE_REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
     CACHE_REDIS_DB = 0
@@ -0,0 +1,53 @@
+"""
+Gunicorn settings, taken from config.Config.
+
+gunicorn reads ./gunicorn.conf.py on its own, so `gunicorn run:app` picks
+these up. With preload_app the application is imported and built once in
+the master and shared with the workers copy-on-write; post_fork then drops
+the database and Redis connections each worker inherited. With METRICS_DIR
+set, the master clears the workers' metric snapshots on start and folds
+each exiting worker's counters into one snapshot of dead workers, so
+/metrics sums every worker's counters.
+
+The app expects threaded workers (gthread with two or more threads, the
+default). Password hashes run on the request thread and release the GIL
+(see app.auth.passwords), so a login only ties up its own thread while the
+worker's other threads keep serving. A sync worker is blocked by every
+login, and under gevent or eventlet a hash stalls every greenlet in the
+worker; the master warns about both on start.
+"""
+from config import Config
+
+bind = Config.GUNICORN_BIND
+workers = Config.GUNICORN_WORKERS
+worker_class = Config.GUNICORN_WORKER_CLASS
+threads = Config.GUNICORN_THREADS
+timeout = Config.GUNICORN_TIMEOUT
+keepalive = Config.GUNICORN_KEEPALIVE
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = Config.GUNICORN_MAX_REQUESTS_JITTER
+preload_app = Config.GUNICORN_PRELOAD_APP
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import reset_after_fork
+        reset_after_fork(server.app.wsgi())
+
+
+def on_starting(server):
+    if server.cfg.worker_class_str != "gthread" or server.cfg.threads < 2:
+        server.log.warning(
+            "Worker class %s with %d thread(s): password hashing will block whole workers during logins; "
+            "use gthread with GUNICORN_THREADS of 2 or more",
+            server.cfg.worker_class_str, server.cfg.threads,
+        )
+    if Config.METRICS_DIR:
+        from app.metrics.multiprocess import clear_snapshots
+        clear_snapshots(Config.METRICS_DIR)
+
+
+def child_exit(server, worker):
+    if Config.METRICS_DIR:
+        from app.metrics.multiprocess import mark_process_dead
+        mark_process_dead(Config.METRICS_DIR, worker.pid)
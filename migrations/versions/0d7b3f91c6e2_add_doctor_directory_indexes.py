@@ -0,0 +1,38 @@
+"""Add doctor directory indexes
+
+Revision ID: 0d7b3f91c6e2
+Revises: e5a9d0c4f2b8
+Create Date: 2025-04-16 15:21:09.774380
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d7b3f91c6e2'
+down_revision = 'e5a9d0c4f2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        batch_op.create_index('ix_doctors_directory', ['specialization', 'lastname', 'firstname', 'doctor_id'], unique=False)
+        batch_op.create_index('ix_doctors_name', ['lastname', 'firstname', 'doctor_id'], unique=False)
+
+    # Pattern ops let PostgreSQL use the index for LIKE 'prefix%' under any collation.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX ix_doctors_lastname_lower ON doctors (lower(lastname) varchar_pattern_ops)')
+        op.execute('CREATE INDEX ix_doctors_firstname_lower ON doctors (lower(firstname) varchar_pattern_ops)')
+    else:
+        op.create_index('ix_doctors_lastname_lower', 'doctors', [sa.text('lower(lastname)')], unique=False)
+        op.create_index('ix_doctors_firstname_lower', 'doctors', [sa.text('lower(firstname)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_doctors_firstname_lower', table_name='doctors')
+    op.drop_index('ix_doctors_lastname_lower', table_name='doctors')
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        batch_op.drop_index('ix_doctors_name')
+        batch_op.drop_index('ix_doctors_directory')
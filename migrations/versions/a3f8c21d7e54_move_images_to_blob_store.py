@@ -0,0 +1,148 @@
+"""Move patient and doctor images to the blob store
+
+Revision ID: a3f8c21d7e54
+Revises: 0d7b3f91c6e2
+Create Date: 2025-04-17 10:42:31.208815
+
+"""
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f8c21d7e54'
+down_revision = '0d7b3f91c6e2'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+BATCH_SIZE = 500
+TABLES = (('patients', 'patient_id'), ('doctors', 'doctor_id'))
+# Frozen copies of the app's rules at this revision.
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+DATA_URI_PATTERN = re.compile(r'^data:[\w.+/-]*(;[\w=.+-]+)*;base64,', re.IGNORECASE)
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+def _batches(bind, table, pk, column):
+    """Yield (pk, value) rows with a non-null column, BATCH_SIZE at a time, in pk order."""
+    last = None
+    while True:
+        query = sa.select(table.c[pk], table.c[column]).where(table.c[column].isnot(None))
+        if last is not None:
+            query = query.where(table.c[pk] > last)
+        rows = bind.execute(query.order_by(table.c[pk]).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _image_store():
+    from flask import current_app
+    from app.images.store import create_store
+
+    return create_store(current_app.config, current_app.instance_path)
+
+
+def _content_type(data):
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    return None
+
+
+def _image_ref(store, value):
+    """The image_key of a stored image value, or None when it cannot be converted."""
+    value = value.strip()
+    if value.startswith(('https://', 'http://')) or KEY_PATTERN.match(value):
+        return value
+    # A data URI, or the bare base64 some clients sent.
+    match = DATA_URI_PATTERN.match(value)
+    try:
+        data = base64.b64decode(value[match.end():] if match else value, validate=True)
+    except binascii.Error:
+        return None
+    content_type = _content_type(data[:16])
+    if content_type is None:
+        return None
+    # Originals only: without thumbnails the image endpoint serves the original.
+    key = hashlib.sha256(data).hexdigest()
+    store.save(key, io.BytesIO(data), content_type)
+    return key
+
+
+def upgrade():
+    # The image column is kept: values that cannot be converted stay in it
+    # for a later revision to deal with, converted ones are cleared.
+    store = _image_store()
+    for table_name, pk in TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('image_key', sa.String(length=512), nullable=True))
+
+        bind = op.get_bind()
+        table = sa.table(table_name, sa.column(pk), sa.column('image', sa.Text), sa.column('image_key', sa.String))
+        moved = kept = 0
+        for rows in _batches(bind, table, pk, 'image'):
+            updates = []
+            for row_id, image in rows:
+                image_key = _image_ref(store, image)
+                if image_key is None and image.strip():
+                    logger.warning('Keeping the unreadable image of %s %s in its image column', table_name, row_id)
+                    kept += 1
+                    continue
+                updates.append({'row_id': row_id, 'new_value': image_key})
+            if updates:
+                bind.execute(
+                    table.update().where(table.c[pk] == sa.bindparam('row_id'))
+                    .values(image_key=sa.bindparam('new_value'), image=None),
+                    updates,
+                )
+            moved += len(updates)
+        logger.info('Moved %d %s images to the image store, kept %d unreadable ones', moved, table_name, kept)
+
+
+def downgrade():
+    store = _image_store()
+    for table_name, pk in TABLES:
+        bind = op.get_bind()
+        table = sa.table(table_name, sa.column(pk), sa.column('image', sa.Text), sa.column('image_key', sa.String))
+        for rows in _batches(bind, table, pk, 'image_key'):
+            updates = []
+            for row_id, image_key in rows:
+                if not KEY_PATTERN.match(image_key):
+                    updates.append({'row_id': row_id, 'new_value': image_key})
+                    continue
+                try:
+                    with store.open(image_key) as blob:
+                        data = blob.read()
+                except FileNotFoundError:
+                    logger.warning('Image %s of %s %s is missing from the store', image_key, table_name, row_id)
+                    continue
+                content_type = _content_type(data[:16]) or 'application/octet-stream'
+                updates.append({
+                    'row_id': row_id,
+                    'new_value': f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}",
+                })
+            if updates:
+                bind.execute(
+                    table.update().where(table.c[pk] == sa.bindparam('row_id')).values(image=sa.bindparam('new_value')),
+                    updates,
+                )
+
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column('image_key')
@@ -0,0 +1,33 @@
+"""Add unique index on active appointment slots
+
+Revision ID: b82f6c3e1d47
+Revises: 4c1e2b7d9a10
+Create Date: 2025-04-15 11:03:27.904116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b82f6c3e1d47'
+down_revision = '4c1e2b7d9a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing double bookings must be resolved before this index can be built.
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_appointment_active_slot',
+            ['doctor_id', 'date', 'time'],
+            unique=True,
+            postgresql_where=sa.text("status IN ('booked')"),
+            sqlite_where=sa.text("status IN ('booked')"),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('uq_appointment_active_slot')
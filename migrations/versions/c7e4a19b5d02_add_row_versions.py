@@ -0,0 +1,33 @@
+"""Add row version and updated_at columns
+
+Revision ID: c7e4a19b5d02
+Revises: a3f8c21d7e54
+Create Date: 2025-04-18 09:12:47.530211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e4a19b5d02'
+down_revision = 'a3f8c21d7e54'
+branch_labels = None
+depends_on = None
+
+TABLES = ('patients', 'doctors', 'appointment')
+
+
+def upgrade():
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.execute(f'UPDATE {table_name} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)')
+
+
+def downgrade():
+    for table_name in reversed(TABLES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column('version')
+            batch_op.drop_column('updated_at')
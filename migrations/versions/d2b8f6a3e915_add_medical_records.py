@@ -0,0 +1,75 @@
+"""Add medical records and summaries
+
+Revision ID: d2b8f6a3e915
+Revises: c7e4a19b5d02
+Create Date: 2025-04-19 11:03:55.184627
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8f6a3e915'
+down_revision = 'c7e4a19b5d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('medical_records',
+    sa.Column('record_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('patient_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('doctor_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('appointment_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('amends_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['amends_id'], ['medical_records.record_id'], ),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointment.appointment_id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.doctor_id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.patient_id'], ),
+    sa.PrimaryKeyConstraint('record_id')
+    )
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.create_index('ix_medical_records_patient_created', ['patient_id', 'created_at', 'record_id'], unique=False)
+
+    op.create_table('medical_summaries',
+    sa.Column('patient_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('latest_vitals', sa.JSON(), nullable=False),
+    sa.Column('allergies', sa.JSON(), nullable=False),
+    sa.Column('active_prescriptions', sa.JSON(), nullable=False),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.Column('last_record_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.patient_id'], ),
+    sa.PrimaryKeyConstraint('patient_id')
+    )
+
+    # Enforce append-only storage in the database too, not just in the ORM.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            CREATE FUNCTION medical_records_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'medical_records is append-only';
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER medical_records_append_only
+            BEFORE UPDATE OR DELETE ON medical_records
+            FOR EACH ROW EXECUTE FUNCTION medical_records_append_only()
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER medical_records_append_only ON medical_records')
+        op.execute('DROP FUNCTION medical_records_append_only()')
+
+    op.drop_table('medical_summaries')
+    with op.batch_alter_table('medical_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_medical_records_patient_created')
+
+    op.drop_table('medical_records')
@@ -0,0 +1,116 @@
+"""Store doctor working days as a weekday bitmask
+
+Revision ID: e7c3a5f19b42
+Revises: d2b8f6a3e915
+Create Date: 2025-04-20 09:17:42.551903
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3a5f19b42'
+down_revision = 'd2b8f6a3e915'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+BATCH_SIZE = 500
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+DOCTORS = sa.table(
+    'doctors', sa.column('doctor_id'), sa.column('days_available', sa.String), sa.column('days_mask', sa.SmallInteger)
+)
+
+
+def _batches(bind, column):
+    """Yield (doctor_id, value) rows, BATCH_SIZE at a time, in doctor_id order."""
+    last = None
+    while True:
+        query = sa.select(DOCTORS.c.doctor_id, DOCTORS.c[column])
+        if last is not None:
+            query = query.where(DOCTORS.c.doctor_id > last)
+        rows = bind.execute(query.order_by(DOCTORS.c.doctor_id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _mask(days_available):
+    # The same matching the old string parsing used: names and abbreviations
+    # of at least three letters, anything else ignored.
+    mask = 0
+    for name in (days_available or '').split(','):
+        name = name.strip().lower()
+        for number, weekday in enumerate(WEEKDAYS):
+            if len(name) >= 3 and weekday.startswith(name):
+                mask |= 1 << number
+    return mask
+
+
+def _weekday_indexes(batch_op):
+    for number, day in enumerate(('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')):
+        where = sa.text(f'(days_mask & {1 << number}) != 0')
+        batch_op.create_index(
+            f'ix_doctors_available_{day}', ['availability_start', 'availability_end'], unique=False,
+            postgresql_where=where, sqlite_where=where,
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('days_mask', sa.SmallInteger(), server_default='0', nullable=False))
+
+    bind = op.get_bind()
+    converted = 0
+    for rows in _batches(bind, 'days_available'):
+        updates = [
+            {'row_id': doctor_id, 'new_value': _mask(days_available)}
+            for doctor_id, days_available in rows
+            if days_available
+        ]
+        unreadable = [update['row_id'] for update in updates if not update['new_value']]
+        if unreadable:
+            logger.warning('No weekdays recognised in days_available of doctors %s', unreadable)
+        if updates:
+            bind.execute(
+                DOCTORS.update().where(DOCTORS.c.doctor_id == sa.bindparam('row_id')).values(days_mask=sa.bindparam('new_value')),
+                updates,
+            )
+        converted += len(updates) - len(unreadable)
+    logger.info('Converted the working days of %d doctors', converted)
+
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        batch_op.drop_column('days_available')
+        _weekday_indexes(batch_op)
+
+
+def downgrade():
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        for day in ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'):
+            batch_op.drop_index(f'ix_doctors_available_{day}')
+        batch_op.add_column(sa.Column('days_available', sa.String(length=100), nullable=True))
+
+    bind = op.get_bind()
+    for rows in _batches(bind, 'days_mask'):
+        updates = [
+            {
+                'row_id': doctor_id,
+                'new_value': ','.join(
+                    weekday.capitalize() for number, weekday in enumerate(WEEKDAYS) if days_mask >> number & 1
+                ),
+            }
+            for doctor_id, days_mask in rows
+            if days_mask
+        ]
+        if updates:
+            bind.execute(
+                DOCTORS.update().where(DOCTORS.c.doctor_id == sa.bindparam('row_id')).values(days_available=sa.bindparam('new_value')),
+                updates,
+            )
+
+    with op.batch_alter_table('doctors', schema=None) as batch_op:
+        batch_op.drop_column('days_mask')
@@ -0,0 +1,39 @@
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    raw = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, length=None):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor.
+        length (int): How many values the cursor must hold, when given.
+    Returns:
+        list: The values, all strings.
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Invalid cursor")
+    if length is not None and len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default=50, maximum=200):
+    """Parse a page size query argument, clamping it to [1, maximum]."""
+    if value is None:
+        return default
+    return max(1, min(int(value), maximum))